@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк определения пола: прежний перебор окончаний по спискам
+против скомпилированного SuffixClassifier на 100 000 имён.
+Запуск: python bench_gender.py [количество имён]
+"""
+
+import sys
+import os
+import random
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from greetings_generator import GenderDetector
+
+# Прежние правила: списки и последовательный перебор окончаний
+LEGACY_FEMALE_NAMES = list(GenderDetector.FEMALE_NAMES)
+LEGACY_MALE_NAMES = list(GenderDetector.MALE_NAMES)
+LEGACY_UNISEX_NAMES = list(GenderDetector.UNISEX_NAMES)
+
+def legacy_classify(first_name: str) -> str:
+    """Прежняя реализация GenderDetector.detect_gender (без извлечения имени)."""
+    name_lower = first_name.lower()
+    
+    if name_lower in LEGACY_FEMALE_NAMES:
+        return 'female'
+    
+    if name_lower in LEGACY_MALE_NAMES:
+        return 'male'
+    
+    if name_lower in LEGACY_UNISEX_NAMES:
+        return 'unknown'
+    
+    for ending in GenderDetector.FEMALE_ENDINGS:
+        if name_lower.endswith(ending):
+            if len(name_lower) > len(ending):
+                return 'female'
+    
+    for ending in GenderDetector.MALE_ENDINGS:
+        if name_lower.endswith(ending):
+            if name_lower not in LEGACY_FEMALE_NAMES:
+                if len(name_lower) > len(ending):
+                    return 'male'
+    
+    return 'unknown'
+
+def make_names(count: int, seed: int = 1) -> list:
+    """Смесь известных имён и случайных слов из кириллицы."""
+    rnd = random.Random(seed)
+    known = LEGACY_FEMALE_NAMES + LEGACY_MALE_NAMES + LEGACY_UNISEX_NAMES
+    letters = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+    names = []
+    for _ in range(count):
+        if rnd.random() < 0.5:
+            names.append(rnd.choice(known).capitalize())
+        else:
+            names.append(''.join(rnd.choice(letters) for _ in range(rnd.randint(1, 9))).capitalize())
+    return names
+
+def bench(func, names: list) -> float:
+    started = time.perf_counter()
+    func(names)
+    return time.perf_counter() - started
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    names = make_names(count)
+
+    legacy = [legacy_classify(name) for name in names]
+    compiled = GenderDetector.classify_first_names(names)
+    assert legacy == compiled, "результаты расходятся"
+
+    legacy_time = bench(lambda items: [legacy_classify(n) for n in items], names)
+    compiled_time = bench(GenderDetector.classify_first_names, names)
+
+    print(f"Имён: {count}")
+    print(f"Прежняя реализация: {legacy_time:.3f} с ({count / legacy_time:,.0f} имён/с)")
+    print(f"SuffixClassifier:   {compiled_time:.3f} с ({count / compiled_time:,.0f} имён/с)")
+    print(f"Ускорение: x{legacy_time / compiled_time:.1f}")
+
+if __name__ == '__main__':
+    main()
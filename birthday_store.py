@@ -0,0 +1,208 @@
+"""
+Общее кэширующее хранилище дней рождения для всего процесса.
+Данные загружаются один раз и отдаются всем обработчикам и планировщику.
+Перечитываются только при изменении отпечатка хранилища (mtime/размер файла);
+изменения через само хранилище применяются к данным в памяти.
+В памяти данные лежат колоночной таблицей (utils.BirthdayTable);
+список словарей собирается только по запросу birthdays().
+"""
+
+import logging
+import threading
+
+from search import NameSearchIndex
+from storage import get_storage
+from utils import BirthdayTable, diff_birthdays
+
+logger = logging.getLogger(__name__)
+
+class BirthdayStore:
+    """Кэш таблицы записей поверх BirthdayStorage."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.storage = get_storage(url)
+        self._lock = threading.RLock()
+        self._table = None
+        self._fingerprint = None
+        # Данные, вычисляемые из записей (например, страницы /list)
+        self._derived = {}
+        # Растёт при каждом изменении или перечитывании данных
+        self.version = 0
+        # Счётчики для /status
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_loaded(self) -> None:
+        """Перечитывает данные, если хранилище изменилось."""
+        fingerprint = self.storage.fingerprint()
+        if self._table is not None and fingerprint is not None and fingerprint == self._fingerprint:
+            self.hits += 1
+            return
+        self.misses += 1
+        self._table = self.storage.load_table()
+        self._fingerprint = fingerprint
+        self._changed()
+        logger.info(f"📂 Хранилище перечитано: {len(self._table)} записей")
+
+    def _changed(self) -> None:
+        """Данные изменились: производные значения нужно пересчитать."""
+        self._derived.clear()
+        self.version += 1
+
+    def _apply(self, diff: dict) -> None:
+        """
+        Применяет к данным в памяти разницу, уже записанную в хранилище.
+        Поисковый индекс обновляется только по затронутым записям,
+        остальные производные значения пересчитываются при обращении.
+        """
+        search = self._derived.get('search')
+        try:
+            self._table = self._table.apply_diff(diff)
+        except KeyError:
+            # Данные в памяти разошлись с хранилищем - перечитаем
+            self.invalidate()
+            return
+        self._fingerprint = self.storage.fingerprint()
+        self._changed()
+        if search is not None:
+            search.apply_diff(diff)
+            self._derived['search'] = search
+
+    def invalidate(self) -> None:
+        """Сбрасывает кэш: следующее чтение загрузит данные заново."""
+        with self._lock:
+            self._table = None
+            self._fingerprint = None
+            self._changed()
+
+    # ----- чтение -----
+
+    def birthdays(self) -> list:
+        """Возвращает все записи (общий список, изменять нельзя)."""
+        return self.derived('records', BirthdayTable.records)
+
+    def index(self) -> BirthdayTable:
+        """Возвращает таблицу записей: выборки по датам, имена, сортировка."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._table
+
+    def derived(self, key: str, builder):
+        """
+        Значение, вычисленное builder(table) из текущей таблицы записей.
+        Кэшируется до следующего изменения данных.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._derived:
+                self._derived[key] = builder(self._table)
+            return self._derived[key]
+
+    # Индекс поиска меняется на месте при записи, поэтому читается под блокировкой
+
+    def find(self, query: str) -> list:
+        """Поиск записей по части имени, результат отсортирован по (месяц, день)."""
+        with self._lock:
+            return self.derived('search', NameSearchIndex).search(query)
+
+    def find_fuzzy(self, query: str, limit: int = 5) -> list:
+        """Нечёткий поиск: [(запись, оценка)] по убыванию сходства."""
+        with self._lock:
+            return self.derived('search', NameSearchIndex).fuzzy(query, limit)
+
+    def find_exact(self, name: str) -> list:
+        """Записи с точно таким именем."""
+        with self._lock:
+            return self.derived('search', NameSearchIndex).exact(name)
+
+    def stats(self) -> dict:
+        """Статистика кэша: попадания, промахи, число записей."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'records': len(self._table) if self._table is not None else 0,
+            }
+
+    # ----- запись -----
+
+    # Если запись не удалась, отпечаток хранилища не совпадёт с запомненным
+    # и следующее чтение перечитает данные
+
+    def add(self, name: str, birthday: str) -> tuple[bool, str]:
+        """Добавляет запись. Возвращает (успех, сообщение)."""
+        with self._lock:
+            self._ensure_loaded()
+            try:
+                # Проверка на дубликат (имя + дата)
+                if self.storage.contains(name, birthday):
+                    return False, f"❌ {name} уже есть в списке с датой {birthday}."
+                self.storage.add(name.strip(), birthday)
+            except Exception as e:
+                logger.error(f"Ошибка сохранения данных: {e}")
+                return False, "❌ Ошибка сохранения"
+            self._apply({'added': [{'name': name.strip(), 'birthday': birthday}], 'removed': [], 'changed': []})
+            return True, f"✅ Добавлен {name} ({birthday})"
+
+    def remove(self, name: str) -> tuple[bool, str, int]:
+        """Удаляет записи по имени (без учёта регистра). Возвращает (успех, сообщение, кол-во удалённых)."""
+        with self._lock:
+            matches = self.find_exact(name)
+            try:
+                removed = self.storage.remove_by_name(name)
+            except Exception as e:
+                logger.error(f"Ошибка сохранения данных: {e}")
+                self.invalidate()
+                return False, "❌ Ошибка сохранения", 0
+            if removed == len(matches):
+                if matches:
+                    self._apply({'added': [], 'removed': matches, 'changed': []})
+            else:
+                # Данные в хранилище отличались от данных в памяти
+                self.invalidate()
+            if removed == 0:
+                return False, f"❌ Именинник '{name}' не найден.", 0
+            return True, f"✅ Удалено {removed} запись(и) для '{name}'.", removed
+
+    def merge(self, uploaded: list) -> dict:
+        """
+        Приводит данные к загруженному списку, записывая только разницу.
+        Таблица и поисковый индекс в памяти меняются только
+        в затронутых записях, хранилище не перечитывается.
+        Возвращает разницу из diff_birthdays.
+        """
+        with self._lock:
+            birthdays = self.birthdays()
+            diff = diff_birthdays(birthdays, uploaded)
+            if not (diff['added'] or diff['removed'] or diff['changed']):
+                return diff
+
+            try:
+                self.storage.apply_diff(diff)
+            except Exception:
+                self.invalidate()
+                raise
+
+            self._apply(diff)
+            return diff
+
+    def replace_all(self, birthdays: list) -> bool:
+        """Полностью заменяет данные."""
+        with self._lock:
+            result = self.storage.save_all(birthdays)
+            self.invalidate()
+            return result
+
+# ===================== ОБЩИЙ ЭКЗЕМПЛЯР =====================
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(url: str) -> BirthdayStore:
+    """Возвращает общий для процесса BirthdayStore для STORAGE_URL."""
+    with _stores_lock:
+        store = _stores.get(url)
+        if store is None:
+            store = _stores[url] = BirthdayStore(url)
+        return store
@@ -34,4 +34,88 @@ if not AUTHORIZED_USER_IDS:
     print("Error: No authorized users configured. Check your .env file")
     exit(1)
 
-DATA_FILE = "data/birthdays.json"
\ No newline at end of file
+DATA_FILE = os.getenv("DATA_FILE", "data/birthdays.json")
+
+# Хранилище данных: путь к JSON-файлу (по умолчанию DATA_FILE)
+# снимок с журналом изменений journal://data/birthdays.snapshot.json,
+# двоичный снимок snapshot://data/birthdays.bin
+# или SQLite-база в формате sqlite:///data/birthdays.db
+STORAGE_URL = os.getenv("STORAGE_URL", DATA_FILE)
+
+# Рассылка ежедневных уведомлений
+SEND_CONCURRENCY = int(os.getenv("SEND_CONCURRENCY", "20"))        # одновременных запросов
+SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "25"))      # сообщений в секунду всего
+SEND_PER_CHAT_RATE = float(os.getenv("SEND_PER_CHAT_RATE", "1"))   # сообщений в секунду в один чат
+SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "3"))         # повторов при RetryAfter/сетевых ошибках
+
+# Режим планировщика: application - JobQueue бота (по умолчанию),
+# background - отдельный поток BackgroundScheduler
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "application").strip().lower()
+
+# Загрузка Excel-файла: merge - записываются только изменения (по умолчанию),
+# replace - данные перезаписываются целиком
+IMPORT_MODE = os.getenv("IMPORT_MODE", "merge").strip().lower()
+
+# Размер кэша разбора имён (имя для обращения и пол), 0 - без кэша
+NAME_CACHE_SIZE = int(os.getenv("NAME_CACHE_SIZE", "4096"))
+
+# История поздравлений: сколько последних поздравлений помнить
+# для каждого именинника, чтобы не повторяться
+GREETING_HISTORY_FILE = os.getenv("GREETING_HISTORY_FILE", "data/greeting_history.json")
+GREETING_HISTORY_SIZE = int(os.getenv("GREETING_HISTORY_SIZE", "30"))
+
+# Пулы для блокирующей работы: потоки для диска, процессы для разбора
+# больших Excel-файлов (от IMPORT_PROCESS_THRESHOLD байт)
+DISK_IO_WORKERS = int(os.getenv("DISK_IO_WORKERS", "4"))
+IMPORT_PROCESS_WORKERS = int(os.getenv("IMPORT_PROCESS_WORKERS", "2"))
+IMPORT_PROCESS_THRESHOLD = int(os.getenv("IMPORT_PROCESS_THRESHOLD", "1000000"))
+
+# Заранее подготовленные поздравления на сегодня и завтра
+GREETING_CACHE_FILE = os.getenv("GREETING_CACHE_FILE", "data/greeting_cache.json")
+
+# Время рассылки по умолчанию; каждый пользователь может задать
+# свой часовой пояс и время командой /settings (хранятся в PREFERENCES_FILE).
+# Ведущая копия проверяет файл каждые PREFERENCES_CHECK_INTERVAL секунд:
+# так до неё доходят настройки, изменённые через другие копии
+NOTIFY_TIMEZONE = os.getenv("NOTIFY_TIMEZONE", "Europe/Moscow")
+NOTIFY_TIME = os.getenv("NOTIFY_TIME", "09:00")
+PREFERENCES_FILE = os.getenv("PREFERENCES_FILE", "data/preferences.json")
+PREFERENCES_CHECK_INTERVAL = int(os.getenv("PREFERENCES_CHECK_INTERVAL", "60"))
+
+# Журнал доставки (SQLite): кому и что уже отправлено сегодня.
+# После перезапуска пропущенная рассылка досылается, если её время
+# прошло не больше DELIVERY_CATCHUP_HOURS часов назад; неудачные
+# отправки повторяются каждые DELIVERY_RETRY_INTERVAL секунд,
+# не больше DELIVERY_MAX_ATTEMPTS попыток
+DELIVERY_LEDGER_FILE = os.getenv("DELIVERY_LEDGER_FILE", "data/deliveries.db")
+DELIVERY_CATCHUP_HOURS = float(os.getenv("DELIVERY_CATCHUP_HOURS", "3"))
+DELIVERY_RETRY_INTERVAL = int(os.getenv("DELIVERY_RETRY_INTERVAL", "300"))
+DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "5"))
+
+# Несколько копий бота: задачи по расписанию выполняет только ведущая копия,
+# которая держит блокировку LEADER_LOCK_FILE; остальные проверяют блокировку
+# каждые LEADER_POLL_INTERVAL секунд. Пустое значение - без блокировки
+LEADER_LOCK_FILE = os.getenv("LEADER_LOCK_FILE", "data/leader.lock")
+LEADER_POLL_INTERVAL = float(os.getenv("LEADER_POLL_INTERVAL", "1"))
+
+# Получение обновлений: polling - опрос getUpdates (по умолчанию),
+# webhook - Telegram присылает обновления на WEBHOOK_URL, бот слушает
+# WEBHOOK_LISTEN:WEBHOOK_PORT/WEBHOOK_PATH и проверяет WEBHOOK_SECRET_TOKEN
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN", "")
+
+# Сколько обновлений обрабатывать одновременно (1 - строго по очереди)
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "1"))
+
+# Отбрасывать ли при запуске обновления, пришедшие, пока бот был выключен
+DROP_PENDING_UPDATES = os.getenv("DROP_PENDING_UPDATES", "false").strip().lower() in ("1", "true", "yes")
+
+# Адрес Bot API (по умолчанию - Telegram). Для замеров без Telegram:
+# python fake_bot_api.py и BOT_API_BASE_URL=http://127.0.0.1:8081/bot,
+# BOT_API_BASE_FILE_URL=http://127.0.0.1:8081/file/bot
+BOT_API_BASE_URL = os.getenv("BOT_API_BASE_URL", "")
+BOT_API_BASE_FILE_URL = os.getenv("BOT_API_BASE_FILE_URL", "")
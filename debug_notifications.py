@@ -3,8 +3,7 @@
 
 import sys
 import os
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import asyncio
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -16,45 +15,45 @@ def check_system():
     # 1. Проверка базовых импортов
     print("\n1. 📦 Проверка импортов...")
     try:
-        from config import BOT_TOKEN, AUTHORIZED_USER_IDS, DATA_FILE
+        from config import BOT_TOKEN, AUTHORIZED_USER_IDS, STORAGE_URL
         print(f"   ✅ config: BOT_TOKEN={'установлен' if BOT_TOKEN else 'НЕТ'}")
         print(f"   ✅ config: Пользователи: {AUTHORIZED_USER_IDS}")
-        print(f"   ✅ config: Файл данных: {DATA_FILE}")
+        print(f"   ✅ config: Хранилище: {STORAGE_URL}")
         return True
     except Exception as e:
         print(f"   ❌ config: {e}")
         return False
 
 def check_data():
-    """Проверка файла данных."""
-    print("\n2. 📁 Проверка файла данных...")
+    """Проверка данных (через то же хранилище, что и бот: JSON, SQLite, журнал или снимок)."""
+    print("\n2. 📁 Проверка данных...")
     try:
-        from config import DATA_FILE
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            print(f"   ✅ Файл существует: {DATA_FILE}")
+        from config import STORAGE_URL
+        from birthday_store import get_store
+        data = get_store(STORAGE_URL).birthdays()
+        if data:
+            print(f"   ✅ Хранилище: {STORAGE_URL}")
             print(f"   ✅ Записей: {len(data)}")
             
             # Показываем первые 3 записи
-            if data:
-                print(f"   📊 Примеры записей:")
-                for i, item in enumerate(data[:3], 1):
-                    print(f"     {i}. {item.get('name', 'N/A')} - {item.get('birthday', 'N/A')}")
+            print(f"   📊 Примеры записей:")
+            for i, item in enumerate(data[:3], 1):
+                print(f"     {i}. {item.get('name', 'N/A')} - {item.get('birthday', 'N/A')}")
             return True
         else:
-            print(f"   ❌ Файл не существует: {DATA_FILE}")
+            print(f"   ❌ Нет записей в хранилище: {STORAGE_URL}")
             return False
     except Exception as e:
-        print(f"   ❌ Ошибка чтения файла: {e}")
+        print(f"   ❌ Ошибка чтения данных: {e}")
         return False
 
 def check_utils():
     """Проверка утилит."""
     print("\n3. ⚙️ Проверка утилит...")
     try:
-        from utils import get_today_date, get_tomorrow_date, load_birthdays
-        from config import DATA_FILE
+        from utils import get_today_date, get_tomorrow_date
+        from config import STORAGE_URL
+        from birthday_store import get_store
         
         today = get_today_date()
         tomorrow = get_tomorrow_date()
@@ -62,12 +61,13 @@ def check_utils():
         print(f"   ✅ utils: Завтра - {tomorrow}")
         
         # Проверка загрузки данных
-        birthdays = load_birthdays(DATA_FILE)
-        print(f"   ✅ utils: Данные загружены ({len(birthdays)} записей)")
+        index = get_store(STORAGE_URL).index()
+        print(f"   ✅ utils: Данные загружены ({len(index)} записей)")
         
         # Ищем совпадения
-        today_birthdays = [b['name'] for b in birthdays if b['birthday'] == today]
-        tomorrow_birthdays = [b['name'] for b in birthdays if b['birthday'] == tomorrow]
+        now = datetime.now()
+        today_birthdays = index.names_on(now)
+        tomorrow_birthdays = index.names_on(now + timedelta(days=1))
         
         print(f"   🎂 Совпадений на сегодня: {len(today_birthdays)}")
         print(f"   📅 Совпадений на завтра: {len(tomorrow_birthdays)}")
@@ -87,13 +87,14 @@ async def check_telegram_api():
     print("\n5. 🤖 Проверка Telegram API...")
     try:
         from telegram import Bot
+        from scheduler import bot_api_urls
         from config import BOT_TOKEN
         
         if not BOT_TOKEN or BOT_TOKEN == 'ваш_токен_бота_от_BotFather':
             print(f"   ❌ BOT_TOKEN не установлен или имеет значение по умолчанию")
             return False
         
-        bot = Bot(token=BOT_TOKEN)
+        bot = Bot(token=BOT_TOKEN, **bot_api_urls())
         me = await bot.get_me()
         print(f"   ✅ Бот: @{me.username} ({me.first_name})")
         print(f"   ✅ Бот ID: {me.id}")
@@ -111,21 +112,22 @@ async def send_real_notification():
     
     try:
         from telegram import Bot
+        from scheduler import bot_api_urls
         from config import BOT_TOKEN, AUTHORIZED_USER_IDS
         
         if not AUTHORIZED_USER_IDS:
             print("❌ Нет авторизованных пользователей")
             return False
         
-        bot = Bot(token=BOT_TOKEN)
+        bot = Bot(token=BOT_TOKEN, **bot_api_urls())
         
         # Получаем данные для персонализированного сообщения
-        from utils import get_today_date, load_birthdays
-        from config import DATA_FILE
+        from utils import get_today_date
+        from config import STORAGE_URL
+        from birthday_store import get_store
         
         today = get_today_date()
-        birthdays = load_birthdays(DATA_FILE)
-        today_birthdays = [b['name'] for b in birthdays if b['birthday'] == today]
+        today_birthdays = get_store(STORAGE_URL).index().names_on(datetime.now())
         
         if today_birthdays:
             test_message = (
@@ -169,22 +171,25 @@ async def test_scheduler_function():
     
     try:
         # Импортируем нужные функции
-        from utils import get_today_date, get_tomorrow_date, load_birthdays, format_birthday_message
-        from config import DATA_FILE, AUTHORIZED_USER_IDS
+        from utils import get_today_date, get_tomorrow_date, format_birthday_message
+        from config import STORAGE_URL, AUTHORIZED_USER_IDS
+        from birthday_store import get_store
         from telegram import Bot
+        from scheduler import bot_api_urls
         from config import BOT_TOKEN
         
         # Загружаем данные
-        birthdays = load_birthdays(DATA_FILE)
+        index = get_store(STORAGE_URL).index()
         today = get_today_date()
         tomorrow = get_tomorrow_date()
         
         print(f"📅 Сегодня: {today}, Завтра: {tomorrow}")
-        print(f"📊 Всего записей: {len(birthdays)}")
+        print(f"📊 Всего записей: {len(index)}")
         
         # Ищем совпадения
-        today_birthdays = [b['name'] for b in birthdays if b['birthday'] == today]
-        tomorrow_birthdays = [b['name'] for b in birthdays if b['birthday'] == tomorrow]
+        now = datetime.now()
+        today_birthdays = index.names_on(now)
+        tomorrow_birthdays = index.names_on(now + timedelta(days=1))
         
         print(f"🎂 На сегодня: {len(today_birthdays)}, На завтра: {len(tomorrow_birthdays)}")
         
@@ -210,7 +215,7 @@ async def test_scheduler_function():
             
             # Проверяем, можем ли отправить
             print("\n🔍 Проверка возможности отправки...")
-            bot = Bot(token=BOT_TOKEN)
+            bot = Bot(token=BOT_TOKEN, **bot_api_urls())
             
             for user_id in AUTHORIZED_USER_IDS:
                 try:
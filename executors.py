@@ -0,0 +1,160 @@
+"""
+Блокирующая работа вне event loop.
+- run_io: ограниченный пул потоков для диска и хранилища
+- run_write: то же для изменений данных, по одному изменению за раз
+- run_cpu: пул процессов для разбора больших Excel-файлов
+- метрики: время обработчиков и задержка event loop (видны в /status)
+"""
+
+import asyncio
+import atexit
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from config import DISK_IO_WORKERS, IMPORT_PROCESS_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# ===================== ПУЛЫ =====================
+
+_disk_executor = None
+_process_executor = None
+_executors_lock = threading.Lock()
+
+def get_disk_executor() -> ThreadPoolExecutor:
+    """Пул потоков для дискового ввода-вывода (создаётся при первом обращении)."""
+    global _disk_executor
+    with _executors_lock:
+        if _disk_executor is None:
+            _disk_executor = ThreadPoolExecutor(max_workers=DISK_IO_WORKERS, thread_name_prefix='disk-io')
+        return _disk_executor
+
+def get_process_executor() -> ProcessPoolExecutor:
+    """Пул процессов для тяжёлого разбора (создаётся при первом обращении)."""
+    global _process_executor
+    with _executors_lock:
+        if _process_executor is None:
+            _process_executor = ProcessPoolExecutor(max_workers=IMPORT_PROCESS_WORKERS)
+        return _process_executor
+
+def shutdown_executors() -> None:
+    """Останавливает пулы (при выходе)."""
+    global _disk_executor, _process_executor
+    with _executors_lock:
+        for executor in (_disk_executor, _process_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        _disk_executor = None
+        _process_executor = None
+
+atexit.register(shutdown_executors)
+
+async def run_io(func, *args, **kwargs):
+    """Выполняет func(*args, **kwargs) в пуле дискового ввода-вывода."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_disk_executor(), functools.partial(func, *args, **kwargs))
+
+_write_lock = None
+
+async def run_write(func, *args, **kwargs):
+    """
+    Выполняет изменение данных в пуле ввода-вывода.
+    Изменения выполняются строго по одному: пока одно пишется,
+    остальные ждут в event loop, а не занимают потоки пула.
+    """
+    global _write_lock
+    if _write_lock is None:
+        _write_lock = asyncio.Lock()
+    async with _write_lock:
+        return await run_io(func, *args, **kwargs)
+
+async def run_cpu(func, *args):
+    """
+    Выполняет func(*args) в отдельном процессе.
+    func и аргументы должны сериализоваться pickle.
+    """
+    global _process_executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_process_executor(), func, *args)
+    except BrokenProcessPool:
+        # Процесс пула упал - следующий вызов создаст новый пул
+        with _executors_lock:
+            _process_executor = None
+        raise
+
+# ===================== МЕТРИКИ =====================
+
+class LatencyStats:
+    """Последние замеры времени по именам: число, среднее, p95, максимум."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def summary(self) -> dict:
+        """{имя: {'count', 'avg', 'p95', 'max'}} по последним замерам (в секундах)."""
+        with self._lock:
+            result = {}
+            for name, samples in self._samples.items():
+                ordered = sorted(samples)
+                result[name] = {
+                    'count': self._counts[name],
+                    'avg': sum(ordered) / len(ordered),
+                    'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    'max': ordered[-1],
+                }
+            return result
+
+handler_latency = LatencyStats()
+loop_lag = LatencyStats()
+
+def timed(handler):
+    """Декоратор обработчика: записывает время выполнения в handler_latency."""
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            handler_latency.record(handler.__name__, time.perf_counter() - started)
+    return wrapper
+
+async def probe_loop_lag(interval: float = 0.5) -> None:
+    """
+    Бесконечно замеряет задержку event loop: насколько позже
+    запланированного просыпается asyncio.sleep(interval).
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        loop_lag.record('loop', max(0.0, loop.time() - started - interval))
+
+def format_metrics() -> str:
+    """Текст метрик для /status."""
+    lines = []
+    lag = loop_lag.summary().get('loop')
+    if lag:
+        lines.append(f"⏱ Задержка event loop: p95 {lag['p95'] * 1000:.0f} мс, макс. {lag['max'] * 1000:.0f} мс")
+    for name, stats in sorted(handler_latency.summary().items()):
+        lines.append(
+            f"  • {name}: {stats['count']} раз, среднее {stats['avg'] * 1000:.0f} мс, "
+            f"p95 {stats['p95'] * 1000:.0f} мс"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Локальная замена Telegram Bot API для нагрузочных тестов и замеров.
+Реализует getMe, sendMessage, editMessageText, getUpdates, getFile
+(и скачивание файла), методы webhook; остальные методы отвечают True.
+Умеет добавлять задержку, отвечать 429 (RetryAfter) и 403 (бот
+заблокирован) и записывает каждый запрос.
+
+Бот направляется сюда настройкой BOT_API_BASE_URL (и BOT_API_BASE_FILE_URL):
+    python fake_bot_api.py --port 8081 --latency 0.05 --flood-every 50 --forbidden 111,222
+    BOT_API_BASE_URL=http://127.0.0.1:8081/bot BOT_API_BASE_FILE_URL=http://127.0.0.1:8081/file/bot python main.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+BOT_USER = {'id': 100000001, 'is_bot': True, 'first_name': 'Fake Birthday Bot', 'username': 'fake_birthday_bot'}
+
+# Параметры, которые PTB передаёт строкой в JSON (клавиатуры, списки)
+_JSON_PREFIXES = ('{', '[')
+
+def _decode(value: str):
+    return json.loads(value) if value.startswith(_JSON_PREFIXES) else value
+
+class RecordedRequest:
+    """Запрос к API: метод, параметры, время получения и код ответа."""
+
+    def __init__(self, method: str, params: dict, received_at: float, status: int = 200):
+        self.method = method
+        self.params = params
+        self.received_at = received_at
+        self.status = status
+
+class FakeBotAPI:
+    """
+    Сервер Bot API в отдельном потоке.
+    latency - задержка ответа в секундах (число или диапазон (от, до));
+    flood_every - каждый N-й sendMessage получает 429 с retry_after секундами;
+    forbidden_chats - чаты, для которых sendMessage возвращает 403.
+    При одинаковом seed задержки и ответы воспроизводимы.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency=0.0, retry_after: int = 1,
+                 flood_every: int = 0, forbidden_chats=(), seed: int = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.retry_after = retry_after
+        self.flood_every = flood_every
+        self.forbidden_chats = set(forbidden_chats)
+        self.requests = []
+        self._lock = threading.Lock()
+        self._updates_changed = threading.Condition(self._lock)
+        self._random = random.Random(seed)
+        self._updates = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._send_count = 0
+        self._flood_chats = Counter()
+        self._files = {}
+        self._webhook = {'url': '', 'has_custom_certificate': False, 'pending_update_count': 0}
+        self._server = None
+        self._thread = None
+        self._stopping = False
+
+    # ----- управление -----
+
+    def start(self) -> 'FakeBotAPI':
+        """Запускает сервер в фоновом потоке."""
+        api = self
+
+        class Handler(_Handler):
+            pass
+        Handler.api = api
+
+        self._stopping = False
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-bot-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает сервер."""
+        if self._server is not None:
+            # Будим ожидающие getUpdates, чтобы они ответили сразу
+            with self._updates_changed:
+                self._stopping = True
+                self._updates_changed.notify_all()
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    @property
+    def base_file_url(self) -> str:
+        return f"http://{self.host}:{self.port}/file/bot"
+
+    # ----- данные для теста -----
+
+    def push_update(self, update: dict) -> int:
+        """Добавляет обновление для getUpdates. Возвращает его update_id."""
+        with self._updates_changed:
+            update = dict(update, update_id=self._next_update_id)
+            self._next_update_id += 1
+            self._updates.append(update)
+            self._updates_changed.notify_all()
+            return update['update_id']
+
+    def add_file(self, file_id: str, data: bytes) -> None:
+        """Регистрирует файл для getFile и скачивания."""
+        with self._lock:
+            self._files[file_id] = data
+
+    def flood_chat(self, chat_id: int, times: int = 1) -> None:
+        """Следующие times отправок в чат chat_id получат 429."""
+        with self._lock:
+            self._flood_chats[chat_id] += times
+
+    def sent_messages(self) -> list:
+        """Параметры успешных sendMessage в порядке получения."""
+        with self._lock:
+            return [r.params for r in self.requests if r.method == 'sendMessage' and r.status == 200]
+
+    def stats(self) -> dict:
+        """Число запросов по (метод, код ответа)."""
+        with self._lock:
+            return dict(Counter((r.method, r.status) for r in self.requests))
+
+    # ----- обработка методов -----
+
+    def _delay(self) -> float:
+        with self._lock:
+            if isinstance(self.latency, (tuple, list)):
+                return self._random.uniform(*self.latency)
+            return self.latency
+
+    def _message(self, chat_id, text: str, message_id: int = None) -> dict:
+        with self._lock:
+            if message_id is None:
+                message_id = self._next_message_id
+                self._next_message_id += 1
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            'text': text,
+        }
+
+    def _send_message(self, params: dict):
+        chat_id = int(params.get('chat_id', 0))
+        with self._lock:
+            self._send_count += 1
+            flood = bool(self.flood_every) and self._send_count % self.flood_every == 0
+            if self._flood_chats[chat_id] > 0:
+                self._flood_chats[chat_id] -= 1
+                flood = True
+        if flood:
+            return 429, {
+                'ok': False, 'error_code': 429,
+                'description': f"Too Many Requests: retry after {self.retry_after}",
+                'parameters': {'retry_after': self.retry_after},
+            }
+        if chat_id in self.forbidden_chats:
+            return 403, {'ok': False, 'error_code': 403, 'description': "Forbidden: bot was blocked by the user"}
+        return 200, {'ok': True, 'result': self._message(chat_id, params.get('text', ''))}
+
+    def _get_updates(self, params: dict):
+        offset = int(params.get('offset') or 0)
+        deadline = time.monotonic() + float(params.get('timeout') or 0)
+        limit = int(params.get('limit') or 100)
+        with self._updates_changed:
+            while True:
+                # Подтверждённые обновления (id < offset) больше не отдаются
+                self._updates = [u for u in self._updates if u['update_id'] >= offset]
+                remaining = deadline - time.monotonic()
+                if self._updates or remaining <= 0 or self._stopping:
+                    return 200, {'ok': True, 'result': self._updates[:limit]}
+                self._updates_changed.wait(remaining)
+
+    def _get_file(self, params: dict):
+        file_id = params.get('file_id', '')
+        with self._lock:
+            data = self._files.get(file_id)
+        if data is None:
+            return 400, {'ok': False, 'error_code': 400, 'description': "Bad Request: invalid file_id"}
+        return 200, {'ok': True, 'result': {
+            'file_id': file_id, 'file_unique_id': file_id, 'file_size': len(data),
+            'file_path': f"documents/{file_id}",
+        }}
+
+    def handle(self, method: str, params: dict):
+        """Ответ на метод API: (код HTTP, JSON-ответ)."""
+        if method == 'getMe':
+            return 200, {'ok': True, 'result': BOT_USER}
+        if method == 'sendMessage':
+            return self._send_message(params)
+        if method == 'editMessageText':
+            return 200, {'ok': True, 'result': self._message(
+                int(params.get('chat_id', 0)), params.get('text', ''), int(params.get('message_id', 0))
+            )}
+        if method == 'getUpdates':
+            return self._get_updates(params)
+        if method == 'getFile':
+            return self._get_file(params)
+        if method == 'setWebhook':
+            with self._lock:
+                self._webhook['url'] = params.get('url', '')
+            return 200, {'ok': True, 'result': True}
+        if method == 'deleteWebhook':
+            with self._lock:
+                self._webhook['url'] = ''
+            return 200, {'ok': True, 'result': True}
+        if method == 'getWebhookInfo':
+            with self._lock:
+                return 200, {'ok': True, 'result': dict(self._webhook)}
+        return 200, {'ok': True, 'result': True}
+
+    def download(self, file_path: str):
+        """Содержимое файла по file_path из getFile или None."""
+        with self._lock:
+            return self._files.get(file_path.rsplit('/', 1)[-1])
+
+class _Handler(BaseHTTPRequestHandler):
+    api = None
+    protocol_version = 'HTTP/1.1'
+
+    def _params(self) -> dict:
+        """Параметры из строки запроса и тела (JSON, form-urlencoded или multipart)."""
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        content_type = self.headers.get('Content-Type', '')
+        if not body:
+            return params
+        if content_type.startswith('application/json'):
+            params.update(json.loads(body))
+        elif content_type.startswith('multipart/form-data'):
+            message = BytesParser(policy=HTTP).parsebytes(
+                b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body
+            )
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                if part.get_filename() is None:
+                    params[name] = _decode(part.get_content())
+        else:
+            params.update((key, _decode(value)) for key, value in parse_qsl(body.decode('utf-8')))
+        return params
+
+    def _reply(self, status: int, body: bytes, content_type: str = 'application/json') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self) -> None:
+        api = self.api
+        path = urlsplit(self.path).path
+        if path.startswith('/file/bot'):
+            data = api.download(path)
+            if data is None:
+                self._reply(404, b'Not Found', 'text/plain')
+            else:
+                self._reply(200, data, 'application/octet-stream')
+            return
+
+        # /bot<токен>/<метод>
+        parts = path.strip('/').split('/')
+        if len(parts) != 2 or not parts[0].startswith('bot'):
+            self._reply(404, b'{"ok":false,"error_code":404,"description":"Not Found"}')
+            return
+        method = parts[1]
+        params = self._params()
+        record = RecordedRequest(method, params, time.time())
+        with api._lock:
+            api.requests.append(record)
+
+        delay = api._delay()
+        if delay:
+            time.sleep(delay)
+        status, response = api.handle(method, params)
+        record.status = status
+        self._reply(status, json.dumps(response, ensure_ascii=False).encode('utf-8'))
+
+    do_GET = _dispatch
+    do_POST = _dispatch
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная замена Telegram Bot API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, nargs='+', default=[0.0],
+                        help="задержка в секундах или диапазон: --latency 0.02 0.2")
+    parser.add_argument('--flood-every', type=int, default=0, help="каждый N-й sendMessage получает 429")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--forbidden', default='', help="chat_id через запятую, для которых sendMessage вернёт 403")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    api = FakeBotAPI(
+        host=args.host,
+        port=args.port,
+        latency=args.latency[0] if len(args.latency) == 1 else tuple(args.latency[:2]),
+        retry_after=args.retry_after,
+        flood_every=args.flood_every,
+        forbidden_chats={int(chat_id) for chat_id in args.forbidden.split(',') if chat_id.strip()},
+        seed=args.seed,
+    ).start()
+    print(f"✅ Bot API: BOT_API_BASE_URL={api.base_url} BOT_API_BASE_FILE_URL={api.base_file_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+        for (method, status), count in sorted(api.stats().items()):
+            print(f"  • {method} {status}: {count}")
+
+if __name__ == '__main__':
+    main()
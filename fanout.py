@@ -0,0 +1,135 @@
+"""
+Асинхронная рассылка сообщений с ограничением скорости.
+Одна сессия Bot на всю рассылку, параллельная отправка с лимитом
+одновременных запросов, token bucket на глобальный лимит и лимит на чат,
+повтор при RetryAfter и сетевых ошибках.
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from telegram.error import Forbidden, BadRequest, NetworkError, RetryAfter, TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Лимиты Telegram: ~30 сообщений в секунду всего и ~1 в секунду в один чат
+DEFAULT_CONCURRENCY = 20
+DEFAULT_GLOBAL_RATE = 25.0
+DEFAULT_PER_CHAT_RATE = 1.0
+DEFAULT_MAX_RETRIES = 3
+
+def _seconds(value) -> float:
+    """RetryAfter.retry_after бывает int или timedelta в зависимости от версии PTB."""
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, не больше capacity подряд.
+    clock и sleep по умолчанию - время event loop и asyncio.sleep
+    (в тестах подменяются, чтобы не зависеть от реального времени).
+    """
+
+    def __init__(self, rate: float, capacity: float = None, clock=None, sleep=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = None
+        self._lock = asyncio.Lock()
+        self._clock = clock
+        self._sleep = sleep or asyncio.sleep
+
+    async def acquire(self) -> None:
+        """Ждёт, пока не появится токен, и забирает его."""
+        clock = self._clock or asyncio.get_running_loop().time
+        async with self._lock:
+            while True:
+                now = clock()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await self._sleep((1 - self._tokens) / self.rate)
+
+class FanOut:
+    """Рассылка одного текста многим получателям через общий Bot."""
+
+    def __init__(self, bot, concurrency: int = DEFAULT_CONCURRENCY,
+                 global_rate: float = DEFAULT_GLOBAL_RATE,
+                 per_chat_rate: float = DEFAULT_PER_CHAT_RATE,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = 1.0):
+        self.bot = bot
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.per_chat_rate = per_chat_rate
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets = {}
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, capacity=1)
+        return bucket
+
+    async def send(self, chat_id, text: str, **kwargs) -> None:
+        """
+        Отправляет сообщение с повторами.
+        Бросает TelegramError, если отправить не удалось.
+        """
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                await self._chat_bucket(chat_id).acquire()
+                await self._global_bucket.acquire()
+                try:
+                    await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                    return
+                except RetryAfter as e:
+                    delay = _seconds(e.retry_after)
+                    error = e
+                except (Forbidden, BadRequest):
+                    # Бот заблокирован или запрос некорректен - повтор не поможет
+                    raise
+                except NetworkError as e:
+                    delay = self.backoff * (2 ** attempt)
+                    error = e
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise error
+            logger.warning(f"⏳ Повтор отправки пользователю {chat_id} через {delay:.1f} с: {error}")
+            # Ждём вне семафора, чтобы не занимать слот
+            await asyncio.sleep(delay)
+
+    async def broadcast(self, chat_ids, text: str, **kwargs) -> dict:
+        """
+        Отправляет текст всем получателям параллельно.
+        Возвращает {'sent': [...], 'failed': {chat_id: ошибка}}.
+        """
+        chat_ids = list(chat_ids)
+
+        async def send_one(chat_id):
+            try:
+                await self.send(chat_id, text, **kwargs)
+                return chat_id, None
+            except TelegramError as e:
+                return chat_id, e
+            except Exception as e:
+                return chat_id, e
+
+        results = await asyncio.gather(*(send_one(chat_id) for chat_id in chat_ids))
+
+        sent = []
+        failed = {}
+        for chat_id, error in results:
+            if error is None:
+                sent.append(chat_id)
+            else:
+                failed[chat_id] = error
+        return {'sent': sent, 'failed': failed}
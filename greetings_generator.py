@@ -3,12 +3,38 @@
 Компонентный подход: собираем поздравления из готовых частей.
 """
 
+import atexit
+import json
+import logging
+import os
 import random
 import re
+import threading
+from collections import OrderedDict, deque
 from typing import List, Optional
 
+from storage import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
 # ===================== ФУНКЦИИ ИЗВЛЕЧЕНИЯ ИМЕНИ =====================
 
+# Распространенные русские имена
+COMMON_FIRST_NAMES = frozenset([
+    'анна', 'мария', 'елена', 'ольга', 'наталья', 'ирина', 'татьяна', 'юлия',
+    'евгения', 'александра', 'екатерина', 'светлана', 'алёна', 'алена', 'дарья',
+    'надежда', 'любовь', 'валентина', 'галина', 'лариса', 'людмила', 'вероника',
+    'кристина', 'ангелина', 'диана', 'виктория', 'марина', 'полина', 'оксана',
+    'иван', 'александр', 'сергей', 'дмитрий', 'алексей', 'андрей', 'михаил',
+    'евгений', 'максим', 'владимир', 'павел', 'константин', 'николай',
+    'артем', 'артём', 'игорь', 'станислав', 'владислав', 'роман', 'тимур', 'никита',
+    'борис', 'виктор', 'григорий', 'леонид', 'валерий', 'валерия', 'георгий',
+    'даниил', 'кирилл', 'олег', 'федор', 'фёдор', 'эдуард', 'юрий', 'ярослав'
+])
+
+# Окончания фамилий
+SURNAME_ENDINGS = ('ов', 'ев', 'ин', 'ын', 'ая', 'яя', 'ский', 'цкий', 'ой', 'а', 'я')
+
 def extract_name(full_name: str) -> str:
     """
     Извлекает имя из полного имени.
@@ -39,35 +65,19 @@ def extract_name(full_name: str) -> str:
     if len(parts) == 1:
         return parts[0]
     
-    # Список распространенных русских имен
-    common_first_names = [
-        'анна', 'мария', 'елена', 'ольга', 'наталья', 'ирина', 'татьяна', 'юлия',
-        'евгения', 'александра', 'екатерина', 'светлана', 'алёна', 'алена', 'дарья',
-        'надежда', 'любовь', 'валентина', 'галина', 'лариса', 'людмила', 'вероника',
-        'кристина', 'ангелина', 'диана', 'виктория', 'марина', 'полина', 'оксана',
-        'иван', 'александр', 'сергей', 'дмитрий', 'алексей', 'андрей', 'михаил',
-        'евгений', 'максим', 'владимир', 'павел', 'константин', 'николай',
-        'артем', 'артём', 'игорь', 'станислав', 'владислав', 'роман', 'тимур', 'никита',
-        'борис', 'виктор', 'григорий', 'леонид', 'валерий', 'валерия', 'георгий',
-        'даниил', 'кирилл', 'олег', 'федор', 'фёдор', 'эдуард', 'юрий', 'ярослав'
-    ]
-    
-    # Окончания фамилий
-    surname_endings = ['ов', 'ев', 'ин', 'ын', 'ая', 'яя', 'ский', 'цкий', 'ой', 'а', 'я']
-    
     # Пробуем найти имя
     for i, part in enumerate(parts):
         part_lower = part.lower()
         
         # Прямое совпадение со списком имен
-        if part_lower in common_first_names:
+        if part_lower in COMMON_FIRST_NAMES:
             return part
         
         # Проверяем окончания (имена часто заканчиваются на а/я для женщин, й/ь для мужчин)
         if len(part) > 2:  # Исключаем короткие слова
             # Женские окончания имен
             if (part_lower.endswith(('а', 'я')) and 
-                not any(part_lower.endswith(ending) for ending in ['ова', 'ева', 'ина', 'ая', 'яя'])):
+                not part_lower.endswith(('ова', 'ева', 'ина', 'ая', 'яя'))):
                 return part
             
             # Мужские окончания имен
@@ -79,7 +89,7 @@ def extract_name(full_name: str) -> str:
     if len(parts) >= 2:
         # Проверяем, похожа ли первая часть на фамилию
         first_part_lower = parts[0].lower()
-        if any(first_part_lower.endswith(ending) for ending in surname_endings):
+        if first_part_lower.endswith(SURNAME_ENDINGS):
             return parts[1]  # Вторая часть - вероятно, имя
     
     # Эвристика: имя часто короче отчества
@@ -115,7 +125,7 @@ class GenderDetector:
     ]
     
     # Женские имена (исключения и сложные случаи)
-    FEMALE_NAMES = [
+    FEMALE_NAMES = frozenset([
         'любовь', 'николь', 'нелли', 'виктория', 'наталья',
         'ольга', 'елена', 'татьяна', 'юлия', 'ирина', 'марина',
         'светлана', 'евгения', 'анастасия', 'кристина', 'дарья',
@@ -124,10 +134,10 @@ class GenderDetector:
         'лариса', 'лидия', 'людмила', 'маргарита', 'надежда',
         'оксана', 'полина', 'регина', 'снежана', 'софья',
         'ульяна', 'эльвира', 'юлиана', 'яна', 'валентина'
-    ]
+    ])
     
     # Мужские имена (исключения и сложные случаи)
-    MALE_NAMES = [
+    MALE_NAMES = frozenset([
         'николай', 'илья', 'игорь', 'владимир', 'александр',
         'дмитрий', 'сергей', 'алексей', 'андрей', 'михаил',
         'евгений', 'максим', 'артем', 'артём', 'владислав', 'павел',
@@ -135,12 +145,12 @@ class GenderDetector:
         'леонид', 'вадим', 'валерий', 'виталий', 'георгий',
         'даниил', 'кирилл', 'олег', 'роман', 'святослав',
         'тимур', 'федор', 'фёдор', 'эдуард', 'юрий', 'ярослав'
-    ]
+    ])
     
     # Неопределенные/унисекс имена
-    UNISEX_NAMES = [
+    UNISEX_NAMES = frozenset([
         'саша', 'женя', 'валя', 'слава'
-    ]
+    ])
     
     @staticmethod
     def extract_first_name(full_name: str) -> str:
@@ -156,37 +166,145 @@ class GenderDetector:
         if not name:
             return 'unknown'
         
-        # Извлекаем имя
-        first_name = GenderDetector.extract_first_name(name)
-        name_lower = first_name.lower()
-        
-        # Проверяем списки известных имен
-        if name_lower in GenderDetector.FEMALE_NAMES:
-            return 'female'
-        
-        if name_lower in GenderDetector.MALE_NAMES:
-            return 'male'
-        
-        if name_lower in GenderDetector.UNISEX_NAMES:
-            return 'unknown'
-        
-        # Проверяем окончания
-        # Сначала женские окончания (они более специфичны)
-        for ending in GenderDetector.FEMALE_ENDINGS:
-            if name_lower.endswith(ending):
-                # Дополнительная проверка: имя должно быть длиннее окончания
-                if len(name_lower) > len(ending):
-                    return 'female'
-        
-        # Затем мужские окончания
-        for ending in GenderDetector.MALE_ENDINGS:
-            if name_lower.endswith(ending):
-                # Проверяем, что это не женское имя с мужским окончанием
-                if name_lower not in GenderDetector.FEMALE_NAMES:
-                    if len(name_lower) > len(ending):
-                        return 'male'
-        
-        return 'unknown'
+        # Извлекаем имя и определяем пол (с кэшем)
+        return analyze_name(name)[1]
+    
+    @staticmethod
+    def classify_first_name(first_name: str) -> str:
+        """Определяет пол по уже извлечённому имени."""
+        return _suffix_classifier.classify(first_name.lower())
+    
+    @staticmethod
+    def classify_first_names(first_names: List[str]) -> List[str]:
+        """Определяет пол для списка уже извлечённых имён."""
+        classify = _suffix_classifier.classify
+        return [classify(name.lower()) for name in first_names]
+
+# ===================== КЛАССИФИКАТОР ПО ОКОНЧАНИЯМ =====================
+
+class SuffixClassifier:
+    """
+    Скомпилированные правила GenderDetector.
+    Исключения (известные имена) - один словарь имя -> пол, окончания -
+    словари по длине окончания, поэтому пол определяется одним проходом
+    по последним буквам имени вместо перебора всех окончаний.
+    Порядок правил тот же: известные имена, затем женские окончания,
+    затем мужские; окончание должно быть короче имени.
+    """
+
+    def __init__(self, female_endings, male_endings, female_names, male_names, unisex_names):
+        # Более приоритетные правила записываются последними
+        self.exceptions = {}
+        for names, gender in ((unisex_names, 'unknown'), (male_names, 'male'), (female_names, 'female')):
+            for name in names:
+                self.exceptions[name] = gender
+
+        self.suffixes = {}
+        for endings, gender in ((male_endings, 'male'), (female_endings, 'female')):
+            for ending in endings:
+                self.suffixes.setdefault(len(ending), {})[ending] = gender
+        self.lengths = tuple(sorted(self.suffixes))
+
+    def classify(self, name_lower: str) -> str:
+        """Возвращает 'female', 'male' или 'unknown' для имени в нижнем регистре."""
+        gender = self.exceptions.get(name_lower)
+        if gender is not None:
+            return gender
+
+        length = len(name_lower)
+        found_male = False
+        for suffix_length in self.lengths:
+            if suffix_length >= length:
+                break
+            gender = self.suffixes[suffix_length].get(name_lower[-suffix_length:])
+            if gender == 'female':
+                return 'female'
+            if gender == 'male':
+                found_male = True
+        return 'male' if found_male else 'unknown'
+
+_suffix_classifier = SuffixClassifier(
+    GenderDetector.FEMALE_ENDINGS, GenderDetector.MALE_ENDINGS,
+    GenderDetector.FEMALE_NAMES, GenderDetector.MALE_NAMES, GenderDetector.UNISEX_NAMES
+)
+
+def detect_genders(names: List[str]) -> List[str]:
+    """Определяет пол для списка полных имён."""
+    return [analyze_name(name)[1] for name in names]
+
+# ===================== КЭШ РАЗБОРА ИМЁН =====================
+
+class NameCache:
+    """
+    Ограниченный LRU-кэш: полное имя -> (имя для обращения, пол).
+    Один и тот же список именинников поздравляется каждый день,
+    поэтому повторный разбор имени стоит O(1).
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: tuple) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def info(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+_name_cache = NameCache()
+
+def analyze_name(full_name: str) -> tuple:
+    """Возвращает (имя для обращения, пол) для полного имени, с кэшем."""
+    if not full_name:
+        return "", 'unknown'
+    key = ' '.join(full_name.split())
+    result = _name_cache.get(key)
+    if result is None:
+        first_name = extract_name(key)
+        result = (first_name, GenderDetector.classify_first_name(first_name))
+        _name_cache.put(key, result)
+    return result
+
+def configure_name_cache(maxsize: int) -> None:
+    """Задаёт размер кэша разбора имён (0 - без кэша)."""
+    _name_cache.resize(maxsize)
+
+def name_cache_info() -> dict:
+    """Статистика кэша разбора имён: hits, misses, size, maxsize, hit_rate."""
+    return _name_cache.info()
 
 # ===================== КОМПОНЕНТЫ ПОЗДРАВЛЕНИЙ =====================
 
@@ -284,14 +402,122 @@ ENDINGS = {
     ]
 }
 
+# Эмодзи по категориям
+EMOJIS = {
+    "general": ["🎉", "🥳", "🎊", "✨", "🌟", "🎈", "💫"],
+    "celebration": ["🎂", "🍰", "🥂", "🍾", "🎁"],
+    "success": ["🏆", "🎯", "⭐", "💪", "🚀"],
+    "love": ["❤️", "💖", "💝", "💕", "😊"],
+}
+
+# ===================== СКОМПИЛИРОВАННЫЕ ШАБЛОНЫ =====================
+
+class CompiledPools:
+    """
+    Готовые наборы компонентов для одного пола.
+    Начала заранее разбиты по {name} на (префикс, суффикс), пожелания
+    уже объединены, поэтому при генерации не создаются списки
+    и не вызывается str.format.
+    """
+
+    __slots__ = ('starts', 'wishes', 'endings')
+
+    def __init__(self, gender: str):
+        self.starts = tuple(_split_template(t) for t in GREETING_STARTS[gender])
+        self.wishes = tuple(COMMON_WISHES) + tuple(GENDER_WISHES[gender])
+        self.endings = tuple(ENDINGS[gender])
+
+def _split_template(template: str) -> tuple:
+    """Разбивает шаблон с одним {name} на (префикс, суффикс)."""
+    if template.count('{name}') != 1 or template.count('{') != 1:
+        raise ValueError(f"Шаблон должен содержать ровно один {{name}}: {template!r}")
+    prefix, suffix = template.split('{name}')
+    return prefix, suffix
+
+COMPILED_POOLS = {gender: CompiledPools(gender) for gender in GREETING_STARTS}
+MAIN_POOL = tuple(MAIN_GREETINGS)
+EMOJI_POOLS = {category: tuple(emojis) for category, emojis in EMOJIS.items()}
+
+# ===================== ИСТОРИЯ ПОЗДРАВЛЕНИЙ =====================
+
+class GreetingHistory:
+    """
+    Последние K поздравлений каждого именинника в виде целых ID комбинаций
+    компонентов. Для каждого именинника - кольцевой буфер (deque с maxlen),
+    число именинников ограничено (давно не поздравлявшиеся вытесняются),
+    поэтому память не растёт. История сохраняется в JSON между перезапусками.
+    """
+
+    def __init__(self, path: Optional[str] = None, size: int = 30, max_recipients: int = 10000):
+        self.path = path
+        self.size = size
+        self.max_recipients = max_recipients
+        self._recent = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def contains(self, recipient: str, combo_id: int) -> bool:
+        """Было ли такое поздравление у именинника среди последних K."""
+        with self._lock:
+            recent = self._recent.get(recipient)
+            return recent is not None and combo_id in recent
+
+    def remember(self, recipient: str, combo_id: int) -> None:
+        """Запоминает поздравление."""
+        if self.size <= 0:
+            return
+        with self._lock:
+            recent = self._recent.get(recipient)
+            if recent is None:
+                recent = self._recent[recipient] = deque(maxlen=self.size)
+            self._recent.move_to_end(recipient)
+            recent.append(combo_id)
+            while len(self._recent) > self.max_recipients:
+                self._recent.popitem(last=False)
+            self._dirty = True
+
+    def load(self) -> None:
+        """Загружает историю из файла."""
+        try:
+            if not self.path or not os.path.exists(self.path):
+                return
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._recent = OrderedDict(
+                    (recipient, deque(ids, maxlen=self.size)) for recipient, ids in data.items()
+                )
+        except Exception as e:
+            logger.error(f"Ошибка загрузки истории поздравлений: {e}")
+
+    def save(self) -> bool:
+        """Сохраняет историю, если она менялась (запись через временный файл)."""
+        if not self.path or not self._dirty:
+            return True
+        try:
+            with self._lock:
+                data = {recipient: list(ids) for recipient, ids in self._recent.items()}
+                self._dirty = False
+            atomic_write_json(self.path, data)
+            return True
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Ошибка сохранения истории поздравлений: {e}")
+            return False
+
+# Сколько раз пересобирать поздравление, если оно уже было у именинника
+MAX_RESAMPLE_ATTEMPTS = 20
+
 # ===================== КЛАСС ГЕНЕРАТОРА =====================
 
 class ImprovedGreetingGenerator:
     """Улучшенный генератор с правильным определением пола и извлечением имени."""
     
-    def __init__(self):
+    def __init__(self, history: Optional[GreetingHistory] = None):
         self.gender_detector = GenderDetector()
-        self.used_combinations = set()
+        self.history = history if history is not None else GreetingHistory()
     
     def _get_season(self) -> str:
         """Определяет текущий сезон."""
@@ -312,34 +538,11 @@ class ImprovedGreetingGenerator:
         Извлекает имя для обращения в поздравлении.
         Возвращает только имя, без фамилии.
         """
-        return self.gender_detector.extract_first_name(full_name)
-    
-    def _select_unique_component(self, components: List[str], used_components: set) -> Optional[str]:
-        """Выбирает уникальный компонент из списка."""
-        available = [c for c in components if c not in used_components]
-        
-        if not available:
-            # Если все использованы, сбрасываем или выбираем любой
-            used_components.clear()
-            available = components
-        
-        if available:
-            component = random.choice(available)
-            used_components.add(component)
-            return component
-        
-        return None
+        return analyze_name(full_name)[0]
     
     def _add_emoji(self, text: str, category: str = "general") -> str:
         """Добавляет эмодзи к тексту."""
-        emojis = {
-            "general": ["🎉", "🥳", "🎊", "✨", "🌟", "🎈", "💫"],
-            "celebration": ["🎂", "🍰", "🥂", "🍾", "🎁"],
-            "success": ["🏆", "🎯", "⭐", "💪", "🚀"],
-            "love": ["❤️", "💖", "💝", "💕", "😊"],
-        }
-        
-        emoji_list = emojis.get(category, emojis["general"])
+        emoji_list = EMOJI_POOLS.get(category, EMOJI_POOLS["general"])
         
         # С шансом 70% добавляем 1-3 эмодзи
         if random.random() < 0.7:
@@ -349,9 +552,12 @@ class ImprovedGreetingGenerator:
         
         return text
     
-    def generate_greeting(self, name: str, min_sentences: int = 3, max_sentences: int = 5) -> str:
+    def generate_greeting(self, name: str, min_sentences: int = 3, max_sentences: int = 5,
+                          remember: bool = True) -> str:
         """
         Генерирует уникальное поздравление с правильной грамматикой.
+        remember=False - пробный текст (/greet, /test): повторы отбрасываются,
+        но в историю именинника он не записывается.
         """
         # Извлекаем имя для поздравления
         greeting_name = self._extract_name_for_greeting(name)
@@ -362,27 +568,64 @@ class ImprovedGreetingGenerator:
         # Определяем пол по извлеченному имени
         gender = self.gender_detector.detect_gender(name)
         
-        # Выбираем компоненты в зависимости от пола
-        start = random.choice(GREETING_STARTS.get(gender, GREETING_STARTS['unknown']))
-        start = start.format(name=greeting_name)
+        return self._render(greeting_name, gender, max_sentences, recipient=name, remember=remember)
+    
+    @staticmethod
+    def _pick_components(pools: CompiledPools, max_sentences: int) -> tuple:
+        """Случайно выбирает номера компонентов: (начало, основное, пожелания, завершение или -1)."""
+        start = random.randrange(len(pools.starts))
+        main = random.randrange(len(MAIN_POOL))
         
-        main_greeting = random.choice(MAIN_GREETINGS)
+        # Выбираем 1-2 уникальных пожелания
+        wishes = tuple(random.sample(range(len(pools.wishes)), min(2, len(pools.wishes))))
         
-        # Собираем все доступные пожелания
-        all_wishes = COMMON_WISHES.copy()
-        all_wishes.extend(GENDER_WISHES.get(gender, GENDER_WISHES['unknown']))
+        # С шансом 50% добавляем завершение (если позволяет длина)
+        ending = -1
+        if random.random() > 0.5 and 2 + len(wishes) < max_sentences:
+            ending = random.randrange(len(pools.endings))
         
-        # Выбираем 1-2 уникальных пожелания
-        selected_wishes = random.sample(all_wishes, min(2, len(all_wishes)))
+        return start, main, wishes, ending
+    
+    @staticmethod
+    def _combo_id(pools: CompiledPools, components: tuple) -> int:
+        """Кодирует набор компонентов одним целым числом (смешанная система счисления)."""
+        start, main, wishes, ending = components
+        combo_id = start * len(MAIN_POOL) + main
+        for wish in wishes:
+            combo_id = combo_id * len(pools.wishes) + wish
+        return combo_id * (len(pools.endings) + 1) + ending + 1
+    
+    def _render(self, greeting_name: str, gender: str, max_sentences: int, recipient: Optional[str] = None,
+                remember: bool = True) -> str:
+        """
+        Собирает поздравление из скомпилированных наборов компонентов.
+        Если указан recipient, повторы среди его последних поздравлений
+        отбрасываются и комбинация выбирается заново; при remember
+        поздравление добавляется в его историю.
+        """
+        pools = COMPILED_POOLS.get(gender, COMPILED_POOLS['unknown'])
         
-        # Собираем предложения
-        sentences = [start, main_greeting]
-        sentences.extend(selected_wishes)
+        # Выбираем компоненты в зависимости от пола
+        components = self._pick_components(pools, max_sentences)
+        if recipient is not None:
+            key = ' '.join(recipient.split()).lower()
+            combo_id = self._combo_id(pools, components)
+            attempts = 1
+            while self.history.contains(key, combo_id) and attempts < MAX_RESAMPLE_ATTEMPTS:
+                components = self._pick_components(pools, max_sentences)
+                combo_id = self._combo_id(pools, components)
+                attempts += 1
+            if remember:
+                self.history.remember(key, combo_id)
+        
+        start, main, wishes, ending = components
+        prefix, suffix = pools.starts[start]
         
-        # С шансом 50% добавляем завершение
-        if random.random() > 0.5 and len(sentences) < max_sentences:
-            ending = random.choice(ENDINGS.get(gender, ENDINGS['unknown']))
-            sentences.append(ending)
+        # Собираем предложения
+        sentences = [prefix + greeting_name + suffix, MAIN_POOL[main]]
+        sentences.extend(pools.wishes[wish] for wish in wishes)
+        if ending >= 0:
+            sentences.append(pools.endings[ending])
         
         # Объединяем в текст
         greeting_text = " ".join(sentences)
@@ -392,6 +635,22 @@ class ImprovedGreetingGenerator:
         
         return greeting_text
     
+    def generate_many(self, names: List[str], min_sentences: int = 3, max_sentences: int = 5,
+                      remember: bool = True) -> List[str]:
+        """
+        Генерирует поздравления для списка имён (например, всех именинников дня).
+        Имя и пол для повторяющихся имён определяются один раз.
+        """
+        analyzed = {}
+        greetings = []
+        for name in names:
+            info = analyzed.get(name)
+            if info is None:
+                greeting_name = self._extract_name_for_greeting(name) or name
+                info = analyzed[name] = (greeting_name, self.gender_detector.detect_gender(name))
+            greetings.append(self._render(info[0], info[1], max_sentences, recipient=name, remember=remember))
+        return greetings
+    
     def generate_collective_greeting(self, names: List[str]) -> str:
         """Генерирует коллективное поздравление."""
         if not names:
@@ -452,10 +711,30 @@ def get_generator() -> ImprovedGreetingGenerator:
         _generator_instance = ImprovedGreetingGenerator()
     return _generator_instance
 
-def generate_greeting(name: str, min_sentences: int = 3, max_sentences: int = 5) -> str:
+def configure_greeting_history(path: Optional[str], size: int = 30) -> None:
+    """
+    Включает сохранение истории поздравлений в файл.
+    size - сколько последних поздравлений помнить для каждого именинника.
+    """
+    generator = get_generator()
+    generator.history.save()
+    generator.history = GreetingHistory(path, size)
+    atexit.register(generator.history.save)
+
+def save_greeting_history() -> bool:
+    """Сохраняет историю поздравлений (если задан файл)."""
+    return get_generator().history.save()
+
+def generate_greeting(name: str, min_sentences: int = 3, max_sentences: int = 5, remember: bool = True) -> str:
     """Генерирует уникальное поздравление."""
     generator = get_generator()
-    return generator.generate_greeting(name, min_sentences, max_sentences)
+    return generator.generate_greeting(name, min_sentences, max_sentences, remember)
+
+def generate_many(names: List[str], min_sentences: int = 3, max_sentences: int = 5,
+                  remember: bool = True) -> List[str]:
+    """Генерирует поздравления для списка имён."""
+    generator = get_generator()
+    return generator.generate_many(names, min_sentences, max_sentences, remember)
 
 def generate_collective_greeting(names: List[str]) -> str:
     """Генерирует коллективное поздравление."""
@@ -1,15 +1,33 @@
-import pandas as pd
 import logging
 import asyncio
-from pathlib import Path
-from telegram import Update
+import secrets
+from datetime import datetime, timedelta
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes, MessageHandler, filters
 
-from config import AUTHORIZED_USER_IDS, DATA_FILE
-from utils import save_birthdays, parse_birthday_date, load_birthdays, get_upcoming_birthdays, extract_first_name
+from config import AUTHORIZED_USER_IDS, STORAGE_URL, IMPORT_MODE, GREETING_CACHE_FILE, IMPORT_PROCESS_THRESHOLD
+from utils import parse_birthday_date, get_upcoming_birthdays, extract_first_name, render_birthday_list_pages, local_now
+from birthday_store import get_store
+from prerender import get_greeting_cache
+from importer import import_birthdays_xlsx, ImportFormatError
+from executors import run_io, run_write, run_cpu, timed
 
 logger = logging.getLogger(__name__)
 
+# Сколько похожих имён предлагать в /remove
+REMOVE_MAX_CANDIDATES = 5
+# Кнопки /remove: remove:<номер запроса>:<номер кандидата или cancel>
+REMOVE_CALLBACK_PATTERN = r'^remove:([0-9a-f]+):(\d+|cancel)$'
+
+@timed
+async def _import_xlsx(data: bytes) -> dict:
+    """Разбирает .xlsx вне event loop: большие файлы - в отдельном процессе."""
+    if len(data) >= IMPORT_PROCESS_THRESHOLD:
+        return await run_cpu(import_birthdays_xlsx, data)
+    return await run_io(import_birthdays_xlsx, data)
+
+@timed
 async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик загрузки Excel-файла."""
 
@@ -33,71 +51,44 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     try:
-        # Скачиваем файл
+        # Скачиваем файл в память
         file = await document.get_file()
-        temp_path = Path(f"temp_{document.file_name}")
-        await file.download_to_drive(temp_path)
-
-        # Читаем Excel файл
-        df = pd.read_excel(temp_path, engine='openpyxl')
-
-        # Проверяем наличие нужных колонок
-        required_columns = ['Имя', 'День рождения']
-
-        # Логируем для отладки
-        logger.info(f"Колонки в файле: {list(df.columns)}")
-
-        # Проверяем названия колонок (нечувствительно к регистру и пробелам)
-        df.columns = df.columns.str.strip()
+        data = await file.download_as_bytearray()
 
-        # Проверяем, есть ли нужные колонки
-        column_mapping = {}
-        for col in df.columns:
-            col_lower = col.lower()
-            if 'имя' in col_lower or 'name' in col_lower:
-                column_mapping['Имя'] = col
-            elif 'день' in col_lower and 'рожд' in col_lower or 'birthday' in col_lower or 'дата' in col_lower:
-                column_mapping['День рождения'] = col
-
-        if not all(key in column_mapping for key in required_columns):
+        # Читаем Excel файл потоково и сразу разбираем строки
+        try:
+            result = await _import_xlsx(bytes(data))
+        except ImportFormatError as e:
             await update.message.reply_text(
                 f'❌ Файл должен содержать столбцы "Имя" и "День рождения"\n'
-                f'Найдены колонки: {list(df.columns)}'
+                f'Найдены колонки: {e.columns}'
             )
-            temp_path.unlink(missing_ok=True)
             return
 
-        # Переименовываем колонки для единообразия
-        df = df.rename(columns=column_mapping)
-
-        # Обрабатываем данные
-        birthdays = []
-        errors = []
-
-        for idx, row in df.iterrows():
-            try:
-                name = str(row['Имя']).strip()
-                if not name or name.lower() == 'nan':
-                    continue
-
-                birth_date = parse_birthday_date(row['День рождения'])
-
-                birthdays.append({
-                    'name': name,
-                    'birthday': birth_date
-                })
-
-            except Exception as e:
-                error_name = str(row.get('Имя', f'Строка {idx}')).strip()
-                errors.append(error_name)
-                logger.warning(f"Ошибка обработки записи: {e}")
+        birthdays = result['birthdays']
+        errors = result['errors']
 
         # Сохраняем данные (общие для всех пользователей)
         if birthdays:
-            save_birthdays(birthdays, DATA_FILE)
+            store = get_store(STORAGE_URL)
+            if IMPORT_MODE == 'replace':
+                if not await run_write(store.replace_all, birthdays):
+                    await update.message.reply_text("❌ Ошибка сохранения")
+                    return
+                success_msg = f"✅ Данные обновлены! Загружено {len(birthdays)} записей."
+            else:
+                # Записываем только изменения
+                diff = await run_write(store.merge, birthdays)
+                success_msg = (
+                    f"✅ Данные обновлены! В файле {len(birthdays)} записей.\n"
+                    f"➕ Добавлено: {len(diff['added'])}, "
+                    f"➖ удалено: {len(diff['removed'])}, "
+                    f"✏️ изменено: {len(diff['changed'])}"
+                )
+                if diff['duplicates']:
+                    success_msg += f"\n🔁 Повторы в файле пропущены: {len(diff['duplicates'])}"
 
             # Формируем ответ
-            success_msg = f"✅ Данные обновлены! Загружено {len(birthdays)} записей."
             if errors:
                 success_msg += f"\n❌ Ошибки в {len(errors)} записях: {', '.join(errors[:5])}"
                 if len(errors) > 5:
@@ -107,17 +98,11 @@ async def handle_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
         else:
             await update.message.reply_text("❌ В файле нет корректных данных")
 
-        # Удаляем временный файл
-        temp_path.unlink(missing_ok=True)
-
     except Exception as e:
         logger.error(f"Ошибка обработки файла: {e}")
         await update.message.reply_text("❌ Произошла ошибка при обработке файла")
 
-        # Очищаем временные файлы
-        temp_path = Path(f"temp_{document.file_name}")
-        temp_path.unlink(missing_ok=True)
-
+@timed
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /start."""
     user_id = update.effective_user.id
@@ -157,6 +142,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🚀 **Начните с отправки Excel-файла или используйте `/help` для подробностей!**"
     )
 
+@timed
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /help."""
     user_id = update.effective_user.id
@@ -182,8 +168,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         "➕ **Управление списком:**\n"
         "• `/add Имя ДД.ММ` – добавить именинника\n"
-        "• `/remove Имя` – удалить всех с таким именем\n"
-        "• `/find Имя` – поиск по части имени\n"
+        "• `/remove Имя` – удалить всех с таким именем (если точного совпадения нет, бот предложит похожие)\n"
+        "• `/find Имя` – поиск по части имени (с учётом опечаток)\n"
+        "• `/settings` – часовой пояс и время уведомлений\n\n"
         
         "🎭 **Генерация поздравлений:**\n"
         "Бот автоматически создаёт уникальные поздравления:\n"
@@ -199,7 +186,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "`/nearest` - покажет ближайшие дни рождения с персонализированными поздравлениями\n\n"
         
         "📅 **Автоматические уведомления:**\n"
-        "Каждый день в **09:00** вы получите уведомления о днях рождения\n"
+        "Каждый день в **09:00** (или в своё время, см. `/settings`) вы получите уведомления о днях рождения\n"
         "на сегодня и завтра с **автоматически сгенерированными поздравлениями**!\n\n"
         
         "🔄 **Система генерации:**\n"
@@ -218,9 +205,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "```\n\n"
         
         "🔄 **Важно:**\n"
-        "• Отправка нового файла полностью заменяет старые данные\n"
+        "• Новый файл становится списком: записи, которых в нём нет, удаляются; тёзки с разными датами сохраняются\n"
         "• Все авторизованные пользователи работают с общим списком\n"
-        "• Планировщик работает по времени сервера (UTC)\n\n"
+        "• Время и часовой пояс рассылки у каждого пользователя свои (`/settings`)\n\n"
         
         "📊 **Пример файла для загрузки:**\n"
         "```\n"
@@ -237,6 +224,12 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Используйте `/nearest` для просмотра ближайших дней рождения"
     )
 
+async def _user_preferences(user_id: int) -> tuple:
+    """(часовой пояс, время рассылки) пользователя; файл настроек читается в пуле ввода-вывода."""
+    from scheduler import get_delivery_preferences
+    return await run_io(lambda: get_delivery_preferences().get(user_id))
+
+@timed
 async def nearest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /nearest - показывает ближайшие дни рождения."""
     user_id = update.effective_user.id
@@ -249,17 +242,21 @@ async def nearest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.info(f"Команда /nearest от пользователя {user_id}")
         
         # Загружаем данные
-        from utils import load_birthdays, get_upcoming_birthdays
-        birthdays = load_birthdays(DATA_FILE)
+        store = get_store(STORAGE_URL)
+        index = await run_io(store.index)
         
-        if not birthdays:
+        if not index:
             await update.message.reply_text("📭 Список дней рождения пуст.\nОтправьте Excel-файл с данными.")
             return
         
-        logger.info(f"Загружено {len(birthdays)} записей")
+        logger.info(f"Загружено {len(index)} записей")
+        
+        # "Сегодня" - в часовом поясе пользователя, как в его рассылке
+        timezone, _ = await _user_preferences(user_id)
+        now = local_now(timezone)
         
         # Получаем ближайшие дни рождения (на 7 дней вперед)
-        upcoming = get_upcoming_birthdays(birthdays, days_ahead=7)
+        upcoming = get_upcoming_birthdays(index, days_ahead=7, now=now)
         
         if not upcoming:
             await update.message.reply_text(
@@ -273,6 +270,8 @@ async def nearest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Формируем сообщение с поздравлениями
         message_lines = ["📅 **Ближайшие дни рождения:**\n"]
         
+        greeting_cache = get_greeting_cache(GREETING_CACHE_FILE)
+        
         # Группируем по дням
         from collections import defaultdict
         birthdays_by_day = defaultdict(list)
@@ -308,18 +307,19 @@ async def nearest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             # Для каждого человека добавляем персональное поздравление
             try:
-                from greetings_generator import generate_greeting
-                
-                for bd in day_birthdays:
-                    greeting = generate_greeting(bd['name'])
+                # Те же поздравления, что уйдут в рассылке (см. prerender.py)
+                day = now + timedelta(days=day_offset)
+                for greeting in await run_io(greeting_cache.get_many, day, full_names):
                     message_lines.append(f"\n  • {greeting}")
                     
             except Exception as e:
-                logger.error(f"Ошибка генерации поздравления для {bd['name']}: {e}")
-                # Если не удалось сгенерировать, покажем просто имя
-                from utils import extract_first_name
-                name = extract_first_name(bd['name'])
-                message_lines.append(f"\n  • {name} - с Днём рождения! 🎉")
+                logger.error(f"Ошибка генерации поздравлений для {full_names_str}: {e}")
+                # Если не удалось сгенерировать, покажем просто имена
+                for full_name in full_names:
+                    name = extract_first_name(full_name)
+                    message_lines.append(f"\n  • {name} - с Днём рождения! 🎉")
+        
+        await run_io(greeting_cache.save)
         
         # Добавляем статистику
         today_count = len([b for b in upcoming if b['day_offset'] == 0])
@@ -394,8 +394,25 @@ async def nearest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"Пожалуйста, попробуйте позже или используйте команду /test для проверки системы."
         )
 
+def _list_pages() -> list:
+    """Страницы /list из кэша хранилища (пересчитываются после изменения данных)."""
+    return get_store(STORAGE_URL).derived('list_pages', render_birthday_list_pages)
+
+def _list_keyboard(page: int, total: int):
+    """Кнопки перехода между страницами /list."""
+    if total <= 1:
+        return None
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("◀️", callback_data=f"list:{page - 1}"))
+    buttons.append(InlineKeyboardButton(f"{page + 1}/{total}", callback_data=f"list:{page}"))
+    if page < total - 1:
+        buttons.append(InlineKeyboardButton("▶️", callback_data=f"list:{page + 1}"))
+    return InlineKeyboardMarkup([buttons])
+
+@timed
 async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Обработчик команды /list - показывает все дни рождения."""
+    """Обработчик команды /list - показывает все дни рождения постранично."""
     user_id = update.effective_user.id
     
     if user_id not in AUTHORIZED_USER_IDS:
@@ -403,74 +420,48 @@ async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        # Загружаем данные
-        birthdays = load_birthdays(DATA_FILE)
+        pages = await run_io(_list_pages)
         
-        if not birthdays:
+        if not pages:
             await update.message.reply_text("📭 Список дней рождения пуст.\nОтправьте Excel-файл с данными.")
             return
         
-        # Сортируем по дате (по месяцу и дню)
-        def sort_key(bd):
-            day, month = map(int, bd['birthday'].split('.'))
-            return (month, day)
-        
-        sorted_birthdays = sorted(birthdays, key=sort_key)
-        
-        # Формируем сообщение - ТОЛЬКО ПОЛНЫЕ ИМЕНА
-        message_lines = [f"📋 **Все дни рождения** ({len(sorted_birthdays)} записей):\n"]
-        
-        # Группируем по месяцам
-        months = {
-            1: "Январь", 2: "Февраль", 3: "Март", 4: "Апрель",
-            5: "Май", 6: "Июнь", 7: "Июль", 8: "Август",
-            9: "Сентябрь", 10: "Октябрь", 11: "Ноябрь", 12: "Декабрь"
-        }
-        
-        current_month = None
-        for bd in sorted_birthdays:
-            month = int(bd['birthday'].split('.')[1])
-            if month != current_month:
-                message_lines.append(f"\n**{months[month]}**:")
-                current_month = month
-            
-            # Показываем только полное имя
-            message_lines.append(f"  {bd['birthday']} - {bd['name']}")
-        
-        # Если сообщение слишком длинное, разбиваем на части
-        message_text = "\n".join(message_lines)
-        if len(message_text) > 4000:  # Ограничение Telegram
-            # Разбиваем по месяцам
-            parts = []
-            current_part = []
-            current_length = 0
-            
-            for line in message_lines:
-                if current_length + len(line) + 1 > 4000:
-                    parts.append("\n".join(current_part))
-                    current_part = [line]
-                    current_length = len(line) + 1
-                else:
-                    current_part.append(line)
-                    current_length += len(line) + 1
-            
-            if current_part:
-                parts.append("\n".join(current_part))
-            
-            # Отправляем первую часть
-            await update.message.reply_text(parts[0])
-            
-            # Отправляем остальные части с задержкой
-            for part in parts[1:]:
-                await asyncio.sleep(0.5)
-                await update.message.reply_text(part)
-        else:
-            await update.message.reply_text(message_text)
+        # Отправляем только первую страницу, остальные - по кнопкам
+        await update.message.reply_text(pages[0], reply_markup=_list_keyboard(0, len(pages)))
         
     except Exception as e:
         logger.error(f"Ошибка в команде /list: {e}")
         await update.message.reply_text("❌ Произошла ошибка при получении данных")
 
+@timed
+async def list_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик кнопок /list: показывает выбранную страницу в том же сообщении."""
+    query = update.callback_query
+    
+    if query.from_user.id not in AUTHORIZED_USER_IDS:
+        await query.answer("🚫 У вас нет доступа.")
+        return
+    
+    try:
+        pages = await run_io(_list_pages)
+        if not pages:
+            await query.answer("📭 Список пуст")
+            await query.edit_message_text("📭 Список дней рождения пуст.\nОтправьте Excel-файл с данными.")
+            return
+        
+        # Данные могли измениться, и страниц стало меньше
+        page = min(int(context.matches[0].group(1)), len(pages) - 1)
+        await query.answer()
+        await query.edit_message_text(pages[page], reply_markup=_list_keyboard(page, len(pages)))
+        
+    except BadRequest as e:
+        # Нажата кнопка текущей страницы - текст не изменился
+        if 'not modified' not in str(e).lower():
+            logger.error(f"Ошибка в переключении страниц /list: {e}")
+    except Exception as e:
+        logger.error(f"Ошибка в переключении страниц /list: {e}")
+
+@timed
 async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Тестовая команда для проверки планировщика."""
     user_id = update.effective_user.id
@@ -480,29 +471,30 @@ async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     try:
-        from utils import load_birthdays, get_today_date, get_tomorrow_date
-        from config import DATA_FILE
+        from utils import get_today_date
+        timezone, send_time = await _user_preferences(user_id)
         
         # Загружаем данные
-        birthdays = load_birthdays(DATA_FILE)
+        store = get_store(STORAGE_URL)
+        index = await run_io(store.index)
         
-        if not birthdays:
+        if not index:
             await update.message.reply_text("📭 Нет данных. Загрузите файл.")
             return
         
-        # Получаем даты
-        today = get_today_date()
-        tomorrow = get_tomorrow_date()
+        # Получаем даты (в часовом поясе пользователя)
+        today = get_today_date(timezone)
         
         # Ищем совпадения
-        today_birthdays = [b['name'] for b in birthdays if b['birthday'] == today]
-        tomorrow_birthdays = [b['name'] for b in birthdays if b['birthday'] == tomorrow]
+        now = local_now(timezone)
+        today_birthdays = index.names_on(now)
+        tomorrow_birthdays = index.names_on(now + timedelta(days=1))
         
         # Формируем сообщение
         message = [
             "🔧 **ТЕСТ ПЛАНИРОВЩИКА**",
-            f"📅 Дата проверки: {today}",
-            f"📊 Всего записей: {len(birthdays)}",
+            f"📅 Дата проверки: {today} ({timezone})",
+            f"📊 Всего записей: {len(index)}",
             "",
             "🎂 **Сегодня:**",
             f"• Совпадений: {len(today_birthdays)}",
@@ -512,7 +504,7 @@ async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"• Совпадений: {len(tomorrow_birthdays)}",
             f"• Имена: {', '.join(tomorrow_birthdays) if tomorrow_birthdays else 'нет'}",
             "",
-            "✅ **Что будет отправлено в 09:00:**",
+            f"✅ **Что будет отправлено в {send_time}:**",
             ""
         ]
         
@@ -522,11 +514,11 @@ async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             from utils import format_birthday_message
             
             if today_birthdays:
-                today_msg = format_birthday_message(today_birthdays, is_today=True)
+                today_msg = format_birthday_message(today_birthdays, is_today=True, remember=False)
                 message.append(f"• Сегодня:\n{today_msg}")
             
             if tomorrow_birthdays:
-                tomorrow_msg = format_birthday_message(tomorrow_birthdays, is_today=False)
+                tomorrow_msg = format_birthday_message(tomorrow_birthdays, is_today=False, remember=False)
                 message.append(f"\n• Завтра:\n{tomorrow_msg}")
             
         except ImportError:
@@ -545,6 +537,7 @@ async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(f"❌ Ошибка: {str(e)}")
 
+@timed
 async def greet_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /greet - тестирует генерацию поздравлений."""
     user_id = update.effective_user.id
@@ -579,7 +572,8 @@ async def greet_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Генерируем 3 разных поздравления
             for i in range(1, 4):
                 try:
-                    greeting = generate_greeting(name, min_sentences=3, max_sentences=5)
+                    # Пробные поздравления не расходуют историю именинника
+                    greeting = generate_greeting(name, min_sentences=3, max_sentences=5, remember=False)
                     message_lines.append(f"\n{i}. {greeting}")
                 except Exception as e:
                     message_lines.append(f"\n{i}. ❌ Ошибка: {str(e)}")
@@ -641,6 +635,7 @@ async def greet_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Ошибка в команде /greet: {e}", exc_info=True)
         await update.message.reply_text(f"❌ Произошла ошибка: {str(e)}")
         
+@timed
 async def about_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /about - информация о системе генерации."""
     user_id = update.effective_user.id
@@ -722,6 +717,56 @@ async def about_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # handlers.py – добавить функции
 
+@timed
+async def settings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Настройки рассылки: /settings, /settings tz Europe/Moscow, /settings time 09:00"""
+    user_id = update.effective_user.id
+    if user_id not in AUTHORIZED_USER_IDS:
+        await update.message.reply_text("🚫 Нет доступа.")
+        return
+
+    from scheduler import get_delivery_preferences, reschedule_notifications
+    # Проверка файла настроек (stat, перечитывание) - не в event loop
+    preferences = await run_io(get_delivery_preferences)
+
+    if not context.args:
+        timezone, send_time = await run_io(preferences.get, user_id)
+        await update.message.reply_text(
+            f"⚙️ Уведомления приходят в {send_time} ({timezone})\n\n"
+            "Изменить:\n"
+            "`/settings tz Europe/Moscow` – часовой пояс\n"
+            "`/settings time 08:30` – время рассылки", parse_mode='Markdown'
+        )
+        return
+
+    option = context.args[0].lower()
+    if option not in ('tz', 'time') or len(context.args) != 2:
+        await update.message.reply_text(
+            "❌ Использование: `/settings tz Зона` или `/settings time ЧЧ:ММ`", parse_mode='Markdown'
+        )
+        return
+
+    try:
+        if option == 'tz':
+            timezone, send_time = await run_write(preferences.set, user_id, timezone=context.args[1])
+        else:
+            timezone, send_time = await run_write(preferences.set, user_id, send_time=context.args[1])
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    except Exception as e:
+        logger.error(f"Ошибка сохранения настроек пользователя {user_id}: {e}")
+        await update.message.reply_text("❌ Не удалось сохранить настройки")
+        return
+
+    # Задачи рассылки есть только у ведущей копии; остальные лишь сохраняют
+    # настройки в файл, ведущая перечитает его (PREFERENCES_CHECK_INTERVAL)
+    leader = context.application.bot_data.get('leader')
+    if leader is None or leader.is_leader:
+        reschedule_notifications(context.application)
+    await update.message.reply_text(f"✅ Уведомления будут приходить в {send_time} ({timezone})")
+
+@timed
 async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Добавление нового именинника: /add Имя ДД.ММ"""
     user_id = update.effective_user.id
@@ -748,10 +793,10 @@ async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Неверный формат даты. Используйте ДД.ММ (например, 15.03)")
         return
 
-    from utils import add_birthday
-    success, msg = add_birthday(name, birthday, DATA_FILE)
+    success, msg = await run_write(get_store(STORAGE_URL).add, name, birthday)
     await update.message.reply_text(msg)
 
+@timed
 async def remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Удаление именинника: /remove Имя (удаляет всех с таким именем)"""
     user_id = update.effective_user.id
@@ -764,10 +809,62 @@ async def remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     name = ' '.join(context.args).strip()
-    from utils import remove_birthday
-    success, msg, count = remove_birthday(name, DATA_FILE)
-    await update.message.reply_text(msg)
+    store = get_store(STORAGE_URL)
+    if await run_io(store.find_exact, name):
+        success, msg, count = await run_write(store.remove, name)
+        await update.message.reply_text(msg)
+        return
+
+    # Точного совпадения нет: предлагаем похожие имена на выбор
+    found = await run_io(store.find, name)
+    similar = await run_io(store.find_fuzzy, name, REMOVE_MAX_CANDIDATES)
+    candidates = list(dict.fromkeys(
+        [bd['name'] for bd in found[:REMOVE_MAX_CANDIDATES]] +
+        [bd['name'] for bd, score in similar]
+    ))[:REMOVE_MAX_CANDIDATES]
+    if not candidates:
+        await update.message.reply_text(f"❌ Именинник '{name}' не найден.")
+        return
 
+    # Номер запроса в кнопках: кнопки прежнего /remove не сработают
+    # после нового, даже если номер кандидата совпадёт
+    nonce = secrets.token_hex(4)
+    context.user_data['remove_request'] = (nonce, candidates)
+    buttons = [[InlineKeyboardButton(f"🗑 {candidate}", callback_data=f"remove:{nonce}:{i}")]
+               for i, candidate in enumerate(candidates)]
+    buttons.append([InlineKeyboardButton("Отмена", callback_data=f"remove:{nonce}:cancel")])
+    await update.message.reply_text(
+        f"❓ Точного совпадения для '{name}' нет. Кого удалить?",
+        reply_markup=InlineKeyboardMarkup(buttons)
+    )
+
+@timed
+async def remove_confirm_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик кнопок /remove: удаляет выбранного именинника."""
+    query = update.callback_query
+
+    if query.from_user.id not in AUTHORIZED_USER_IDS:
+        await query.answer("🚫 Нет доступа.")
+        return
+
+    await query.answer()
+    nonce, choice = context.matches[0].group(1, 2)
+    request_nonce, candidates = context.user_data.get('remove_request', (None, []))
+    if nonce != request_nonce:
+        await query.edit_message_text("⌛ Выбор устарел, повторите /remove.")
+        return
+    del context.user_data['remove_request']
+    if choice == 'cancel':
+        await query.edit_message_text("↩️ Удаление отменено.")
+        return
+    if int(choice) >= len(candidates):
+        await query.edit_message_text("⌛ Выбор устарел, повторите /remove.")
+        return
+
+    success, msg, count = await run_write(get_store(STORAGE_URL).remove, candidates[int(choice)])
+    await query.edit_message_text(msg)
+
+@timed
 async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Поиск по имени: /find Анна"""
     user_id = update.effective_user.id
@@ -780,14 +877,21 @@ async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     name = ' '.join(context.args).strip()
-    from utils import find_birthday
-    results = find_birthday(name, DATA_FILE)
+    store = get_store(STORAGE_URL)
+    results = await run_io(store.find, name)
     if not results:
-        await update.message.reply_text(f"❌ Ничего не найдено для '{name}'.")
+        # Возможно, в имени опечатка: показываем похожие
+        similar = await run_io(store.find_fuzzy, name)
+        if not similar:
+            await update.message.reply_text(f"❌ Ничего не найдено для '{name}'.")
+            return
+        lines = [f"🔍 Точных совпадений для '{name}' нет. Похожие:"]
+        for b, score in similar:
+            lines.append(f"  • {b['name']} – {b['birthday']} ({score:.0%})")
+        await update.message.reply_text("\n".join(lines))
         return
 
-    # Сортируем по дате
-    results.sort(key=lambda x: (int(x['birthday'].split('.')[1]), int(x['birthday'].split('.')[0])))
+    # Результаты уже отсортированы по дате
     lines = [f"🔍 Найдено {len(results)} записей:"]
     for b in results:
         lines.append(f"  • {b['name']} – {b['birthday']}")
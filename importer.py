@@ -0,0 +1,114 @@
+"""
+Импорт дней рождения из Excel-файлов.
+Файл читается потоково (openpyxl read_only), строки разбираются
+и проверяются небольшими пачками по мере чтения, без pandas
+и без полного DataFrame в памяти.
+"""
+
+import io
+import logging
+
+from openpyxl import load_workbook
+
+from utils import parse_birthday_dates
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['Имя', 'День рождения']
+
+# Сколько строк копить перед пакетным разбором дат
+PARSE_CHUNK_SIZE = 1000
+
+class ImportFormatError(ValueError):
+    """В файле нет нужных столбцов."""
+
+    def __init__(self, columns: list):
+        self.columns = columns
+        super().__init__(f"Не найдены столбцы {REQUIRED_COLUMNS}, есть: {columns}")
+
+    def __reduce__(self):
+        # Ошибка передаётся из процесса импорта через pickle
+        return type(self), (self.columns,)
+
+def detect_columns(header: list) -> dict:
+    """
+    Определяет номера столбцов по заголовку (нечувствительно к регистру и пробелам).
+    Возвращает {'Имя': индекс, 'День рождения': индекс}.
+    """
+    column_mapping = {}
+    for idx, col in enumerate(header):
+        col_lower = col.lower()
+        if 'имя' in col_lower or 'name' in col_lower:
+            column_mapping['Имя'] = idx
+        elif 'день' in col_lower and 'рожд' in col_lower or 'birthday' in col_lower or 'дата' in col_lower:
+            column_mapping['День рождения'] = idx
+    return column_mapping
+
+def iter_xlsx_rows(source):
+    """
+    Потоково отдаёт строки первого листа как кортежи значений.
+    source - bytes или бинарный файловый объект.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def import_birthdays_xlsx(source) -> dict:
+    """
+    Читает записи из .xlsx.
+    Возвращает {'birthdays': [...], 'errors': [имена с ошибками], 'columns': [заголовки]}.
+    Бросает ImportFormatError, если нет столбцов "Имя" и "День рождения".
+    """
+    rows = iter_xlsx_rows(source)
+    header = next(rows, None) or ()
+    columns = [str(col).strip() if col is not None else '' for col in header]
+
+    # Логируем для отладки
+    logger.info(f"Колонки в файле: {columns}")
+
+    column_mapping = detect_columns(columns)
+    if not all(key in column_mapping for key in REQUIRED_COLUMNS):
+        rows.close()
+        raise ImportFormatError(columns)
+
+    name_idx = column_mapping['Имя']
+    date_idx = column_mapping['День рождения']
+
+    birthdays = []
+    errors = []
+    names = []
+    date_values = []
+
+    def flush():
+        # Даты разбираются пачкой, см. parse_birthday_dates
+        dates, error_mask = parse_birthday_dates(date_values)
+        for name, birthday, failed in zip(names, dates, error_mask):
+            if failed:
+                errors.append(name)
+            else:
+                birthdays.append({'name': name, 'birthday': birthday})
+        names.clear()
+        date_values.clear()
+
+    for row in rows:
+        name_value = row[name_idx] if name_idx < len(row) else None
+        date_value = row[date_idx] if date_idx < len(row) else None
+
+        name = str(name_value).strip() if name_value is not None else ''
+        if not name:
+            continue
+
+        names.append(name)
+        date_values.append(date_value)
+        if len(names) >= PARSE_CHUNK_SIZE:
+            flush()
+
+    flush()
+    if errors:
+        logger.warning(f"Ошибки разбора дат в {len(errors)} записях")
+
+    return {'birthdays': birthdays, 'errors': errors, 'columns': columns}
@@ -0,0 +1,83 @@
+"""
+Выбор ведущего процесса при запуске нескольких копий бота.
+Ведущий держит эксклюзивную блокировку файла (fcntl.flock) и только он
+выполняет задачи по расписанию. Блокировку снимает ОС, когда процесс
+завершается (в том числе аварийно), поэтому резервная копия, опрашивающая
+блокировку раз в interval секунд, становится ведущей в течение interval.
+Копии должны работать на одной машине (или с общим локальным диском).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки нет, считаем процесс единственным
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class LeaderLock:
+    """Блокировка ведущего процесса на файле path."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._fd = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Пытается стать ведущим, не дожидаясь. Возвращает True, если процесс ведущий."""
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            logger.warning("⚠️ fcntl недоступен: блокировка ведущего не используется")
+            self._fd = -1
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        # PID ведущего - для диагностики
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def holder(self):
+        """PID ведущего процесса (по файлу блокировки) или None."""
+        try:
+            return int(self.path.read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def wait(self, interval: float = 1.0, timeout: float = None) -> bool:
+        """Ждёт, пока процесс не станет ведущим. Возвращает False по истечении timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    async def wait_async(self, interval: float = 1.0) -> None:
+        """Ждёт, пока процесс не станет ведущим, не блокируя event loop."""
+        while not self.try_acquire():
+            await asyncio.sleep(interval)
+
+    def release(self) -> None:
+        """Отдаёт роль ведущего."""
+        if self._fd is None:
+            return
+        if self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
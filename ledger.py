@@ -0,0 +1,185 @@
+"""
+Журнал доставки ежедневных уведомлений (SQLite).
+Для каждого получателя и дня (по его часовому поясу) хранится одна строка:
+текст, его хэш, статус и число попыток. Перед отправкой строки
+"забираются" (статус sending), после - отмечаются sent или возвращаются
+в очередь. Поэтому перезапуск в момент рассылки не приводит ни к пропуску,
+ни к повторной отправке уже доставленных сообщений, а неудачные отправки
+повторяются по журналу.
+
+Единственное окно повтора - падение процесса между отправкой сообщения
+и записью статуса: такие строки остаются в sending и через
+SENDING_TIMEOUT секунд отправляются ещё раз.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Статусы строк журнала
+PENDING = 'pending'
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+
+# Через сколько секунд "забранная" строка без результата считается
+# брошенной (процесс упал посреди рассылки); с запасом больше
+# времени самой длинной рассылки
+SENDING_TIMEOUT = 3600
+
+# Сколько дней хранить историю доставки
+KEEP_DAYS = 30
+
+def message_hash(text: str) -> str:
+    """Короткий хэш текста сообщения."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+class DeliveryLedger:
+    """Журнал доставки: (день, получатель) -> текст, статус, попытки."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS deliveries (
+            day TEXT NOT NULL,
+            chat_id INTEGER NOT NULL,
+            message_hash TEXT NOT NULL,
+            text TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (day, chat_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_deliveries_status ON deliveries(status, day);
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        # Соединение используется и из потоков планировщика
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _day(day) -> str:
+        return day if isinstance(day, str) else day.isoformat()
+
+    def _claim_rows(self, where: str, params: tuple, now: float, chat_ids: set = None) -> list:
+        """
+        Переводит подходящие строки (только получателей chat_ids, если заданы)
+        в sending. Вызывается под блокировкой в транзакции.
+        """
+        rows = self._conn.execute(
+            f"SELECT day, chat_id, text FROM deliveries WHERE ({where}) AND "
+            f"(status = ? OR (status = ? AND updated_at < ?))",
+            params + (PENDING, SENDING, now - SENDING_TIMEOUT)
+        ).fetchall()
+        if chat_ids is not None:
+            rows = [row for row in rows if row[1] in chat_ids]
+        self._conn.executemany(
+            "UPDATE deliveries SET status = ?, updated_at = ? WHERE day = ? AND chat_id = ?",
+            [(SENDING, now, day, chat_id) for day, chat_id, _ in rows]
+        )
+        return rows
+
+    def claim(self, day, chat_ids, text: str) -> list:
+        """
+        Записывает уведомление на день day для получателей chat_ids
+        и забирает ещё не доставленные. Возвращает [(день, chat_id, текст)].
+        Если уведомление уже записано, используется сохранённый текст -
+        повторная отправка совпадает с первой.
+        """
+        day = self._day(day)
+        chat_ids = list(dict.fromkeys(chat_ids))
+        now = time.time()
+        digest = message_hash(text)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO deliveries (day, chat_id, message_hash, text, status, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(day, chat_id, digest, text, PENDING, now) for chat_id in chat_ids]
+            )
+            return self._claim_rows("day = ?", (day,), now, set(chat_ids))
+
+    def claim_retries(self, since, until=None) -> list:
+        """
+        Забирает недоставленные уведомления за дни с since по until (включительно;
+        без until - все следующие). Возвращает [(день, chat_id, текст)].
+        """
+        with self._lock, self._conn:
+            if until is None:
+                return self._claim_rows("day >= ?", (self._day(since),), time.time())
+            return self._claim_rows("day BETWEEN ? AND ?", (self._day(since), self._day(until)), time.time())
+
+    def record(self, day, sent, failed: dict) -> None:
+        """
+        Записывает результат рассылки.
+        failed: {chat_id: (ошибка, повторять ли)}; после max_attempts
+        попыток или неповторяемой ошибки строка помечается failed.
+        """
+        day = self._day(day)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE deliveries SET status = ?, attempts = attempts + 1, last_error = NULL, updated_at = ? "
+                "WHERE day = ? AND chat_id = ?",
+                [(SENT, now, day, chat_id) for chat_id in sent]
+            )
+            self._conn.executemany(
+                "UPDATE deliveries SET attempts = attempts + 1, last_error = ?, updated_at = ?, "
+                "status = CASE WHEN ? AND attempts + 1 < ? THEN ? ELSE ? END "
+                "WHERE day = ? AND chat_id = ?",
+                [(str(error), now, bool(retry), self.max_attempts, PENDING, FAILED, day, chat_id)
+                 for chat_id, (error, retry) in failed.items()]
+            )
+
+    def status(self, day, chat_id: int):
+        """Статус уведомления или None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM deliveries WHERE day = ? AND chat_id = ?", (self._day(day), chat_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def summary(self, day) -> dict:
+        """Число уведомлений дня по статусам: {статус: количество}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM deliveries WHERE day = ? GROUP BY status", (self._day(day),)
+            ).fetchall()
+        return dict(rows)
+
+    def prune(self, today=None, keep_days: int = KEEP_DAYS) -> int:
+        """Удаляет историю старше keep_days дней. Возвращает число удалённых строк."""
+        today = today or date.today()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM deliveries WHERE day < ?", ((today - timedelta(days=keep_days)).isoformat(),)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+# ===================== ОБЩИЙ ЭКЗЕМПЛЯР =====================
+
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+def get_ledger(path: str, max_attempts: int = 5) -> DeliveryLedger:
+    """Возвращает общий для процесса DeliveryLedger для файла path."""
+    with _ledgers_lock:
+        ledger = _ledgers.get(path)
+        if ledger is None:
+            ledger = _ledgers[path] = DeliveryLedger(path, max_attempts)
+        return ledger
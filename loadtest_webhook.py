@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест режима webhook: отправляет на локальный webhook бота
+синтетические обновления с командой и измеряет пропускную способность
+и задержку приёма.
+Бот запускается с BOT_MODE=webhook и тем же WEBHOOK_SECRET_TOKEN.
+Запуск: python loadtest_webhook.py --count 5000 --concurrency 100 --command "/find Анна"
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import time
+from collections import Counter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from config import AUTHORIZED_USER_IDS, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    """Обновление Telegram с текстовым сообщением (команда в начале текста)."""
+    command = text.split()[0] if text.startswith('/') else ''
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Load'},
+            'text': text,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(command)}] if command else [],
+        },
+    }
+
+async def run(url: str, secret: str, count: int, concurrency: int, user_id: int, text: str) -> dict:
+    """Отправляет count обновлений не больше чем concurrency одновременно."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        # Запрос с неверным токеном должен быть отклонён
+        wrong = await client.post(url, json=make_update(0, user_id, text), headers={SECRET_HEADER: 'wrong'})
+
+        async def send(update_id):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(
+                        url, json=make_update(update_id, user_id, text), headers={SECRET_HEADER: secret}
+                    )
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(1, count + 1)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'wrong_secret_status': wrong.status_code,
+        'elapsed': elapsed,
+        'statuses': dict(statuses),
+        'p50': latencies[len(latencies) // 2],
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        'max': latencies[-1],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест webhook бота")
+    parser.add_argument('--url', default=f"http://127.0.0.1:{WEBHOOK_PORT}/{WEBHOOK_PATH}")
+    parser.add_argument('--secret', default=WEBHOOK_SECRET_TOKEN)
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--user-id', type=int, default=AUTHORIZED_USER_IDS[0])
+    parser.add_argument('--command', default='/find Анна')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.secret, args.count, args.concurrency, args.user_id, args.command))
+
+    print(f"Обновлений: {args.count}, одновременно: {args.concurrency}, команда: {args.command}")
+    print(f"Неверный токен: HTTP {result['wrong_secret_status']} (ожидается 403)")
+    print(f"Ответы: {result['statuses']}")
+    print(f"Время: {result['elapsed']:.2f} с ({args.count / result['elapsed']:,.0f} обновлений/с)")
+    print(f"Задержка: p50 {result['p50'] * 1000:.1f} мс, p95 {result['p95'] * 1000:.1f} мс, "
+          f"макс. {result['max'] * 1000:.1f} мс")
+
+if __name__ == '__main__':
+    main()
@@ -2,24 +2,39 @@
 
 import asyncio
 import logging
+import secrets
+from datetime import date
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
 
-from config import BOT_TOKEN, AUTHORIZED_USER_IDS
+from config import (
+    BOT_TOKEN, AUTHORIZED_USER_IDS, STORAGE_URL, SCHEDULER_MODE, NAME_CACHE_SIZE,
+    GREETING_HISTORY_FILE, GREETING_HISTORY_SIZE, LEADER_LOCK_FILE, LEADER_POLL_INTERVAL,
+    BOT_MODE, WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN,
+    UPDATE_CONCURRENCY, DROP_PENDING_UPDATES
+)
+from birthday_store import get_store
+from greetings_generator import configure_name_cache, name_cache_info, configure_greeting_history
 from handlers import (
     start_command, 
     help_command, 
     handle_file, 
     nearest_command, 
     list_command, 
+    list_page_callback,
     test_command, 
     about_command, 
     greet_command,
     add_command,
     remove_command,
-    find_command 
+    remove_confirm_callback,
+    REMOVE_CALLBACK_PATTERN,
+    find_command,
+    settings_command
 )
-from scheduler import setup_scheduler
+from scheduler import setup_scheduler, setup_application_jobs, get_delivery_ledger, bot_api_urls
+from executors import format_metrics, probe_loop_lag, timed, run_io
+from leader import LeaderLock
 
 # Настройка логирования
 logging.basicConfig(
@@ -42,6 +57,7 @@ async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"📝 Я получил: {update.message.text}")
 
 # Команда для проверки статуса
+@timed
 async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Проверка статуса бота."""
     user_id = update.effective_user.id
@@ -50,14 +66,68 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("🚫 У вас нет доступа.")
         return
     
+    # Блокировка хранилища (её держит слияние загруженного файла) и запрос
+    # к SQLite - в пуле ввода-вывода, чтобы не задерживать другие обработчики
+    store_stats = await run_io(get_store(STORAGE_URL).stats)
+    names_stats = name_cache_info()
+    deliveries = await run_io(get_delivery_ledger().summary, date.today())
+    
     await update.message.reply_text(
         f"🤖 **Статус бота**\n\n"
         f"✅ Бот работает\n"
         f"👤 Ваш ID: {user_id}\n"
         f"📊 Авторизованных пользователей: {len(AUTHORIZED_USER_IDS)}\n"
-        f"🔧 Команды: /start, /help, /nearest, /list, /test, /about, /greet, /status"
+        f"💾 Кэш данных: {store_stats['records']} записей, "
+        f"попаданий {store_stats['hits']}, чтений с диска {store_stats['misses']}\n"
+        f"🧠 Кэш имён: {names_stats['size']}/{names_stats['maxsize']}, "
+        f"попаданий {names_stats['hit_rate']:.0%}\n"
+        f"📬 Уведомления сегодня: доставлено {deliveries.get('sent', 0)}, "
+        f"в очереди {deliveries.get('pending', 0) + deliveries.get('sending', 0)}, "
+        f"не доставлено {deliveries.get('failed', 0)}\n"
+        f"🔧 Команды: /start, /help, /nearest, /list, /test, /about, /greet, /settings, /status\n"
+        f"{format_metrics()}"
     )
 
+def start_scheduled_jobs(application: Application) -> None:
+    """Запускает задачи по расписанию в выбранном режиме планировщика."""
+    logger.info(f"⏰ Настройка планировщика (режим: {SCHEDULER_MODE})...")
+    try:
+        if SCHEDULER_MODE == 'background':
+            # Отдельный поток BackgroundScheduler
+            scheduler = setup_scheduler()
+            if scheduler:
+                logger.info("✅ Планировщик запущен")
+                
+                # Показываем задачи планировщика
+                jobs = scheduler.get_jobs()
+                logger.info(f"📋 Задач в планировщике: {len(jobs)}")
+                for job in jobs:
+                    logger.info(f"  • {job.name}: {job.next_run_time}")
+            else:
+                logger.error("❌ Не удалось запустить планировщик")
+        else:
+            # JobQueue приложения: тот же event loop и тот же бот
+            if setup_application_jobs(application):
+                logger.info("✅ Задачи добавлены в JobQueue приложения")
+            else:
+                logger.error("❌ Не удалось настроить JobQueue")
+    except Exception as e:
+        logger.error(f"❌ Ошибка планировщика: {e}")
+
+async def run_scheduled_jobs_when_leader(application: Application) -> None:
+    """Ждёт роли ведущего (если её держит другая копия) и запускает задачи по расписанию."""
+    leader = application.bot_data.get('leader')
+    if leader is not None and not leader.is_leader:
+        logger.info(f"⏸ Резервная копия: задачи по расписанию выполняет процесс {leader.holder()}")
+        await leader.wait_async(LEADER_POLL_INTERVAL)
+        logger.info("👑 Копия стала ведущей")
+    start_scheduled_jobs(application)
+
+async def post_init(application: Application) -> None:
+    """Запускает замер задержки event loop и задачи по расписанию после старта приложения."""
+    application.create_task(probe_loop_lag(), name='loop_lag_probe')
+    application.create_task(run_scheduled_jobs_when_leader(application), name='leader_watch')
+
 def main():
     """Основная функция запуска бота."""
     
@@ -65,10 +135,28 @@ def main():
         logger.error("❌ BOT_TOKEN не установлен. Проверьте .env файл!")
         return
     
+    if BOT_MODE == 'webhook' and not check_webhook_settings():
+        return
+    
     logger.info(f"🚀 Запуск бота для пользователей: {AUTHORIZED_USER_IDS}")
     
+    configure_name_cache(NAME_CACHE_SIZE)
+    configure_greeting_history(GREETING_HISTORY_FILE, GREETING_HISTORY_SIZE)
+    
     # Создаем приложение
-    application = Application.builder().token(BOT_TOKEN).build()
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .concurrent_updates(UPDATE_CONCURRENCY)
+        .post_init(post_init)
+    )
+    # Другой адрес Bot API (например, локальный fake_bot_api.py для замеров)
+    api_urls = bot_api_urls()
+    if 'base_url' in api_urls:
+        builder.base_url(api_urls['base_url'])
+    if 'base_file_url' in api_urls:
+        builder.base_file_url(api_urls['base_file_url'])
+    application = builder.build()
     
     # Регистрируем обработчики команд В ПРАВИЛЬНОМ ПОРЯДКЕ
     # Важно: более специфичные команды должны быть выше
@@ -85,6 +173,9 @@ def main():
     application.add_handler(CommandHandler("add", add_command))
     application.add_handler(CommandHandler("remove", remove_command))
     application.add_handler(CommandHandler("find", find_command))
+    application.add_handler(CommandHandler("settings", settings_command))
+    application.add_handler(CallbackQueryHandler(list_page_callback, pattern=r'^list:(\d+)$'))
+    application.add_handler(CallbackQueryHandler(remove_confirm_callback, pattern=REMOVE_CALLBACK_PATTERN))
     
     # 2. Обработчик файлов
     application.add_handler(MessageHandler(
@@ -98,28 +189,63 @@ def main():
         echo
     ))
     
-    # Запускаем планировщик
-    logger.info("⏰ Настройка планировщика...")
-    try:
-        scheduler = setup_scheduler()
-        if scheduler:
-            logger.info("✅ Планировщик запущен")
-            
-            # Показываем задачи планировщика
-            jobs = scheduler.get_jobs()
-            logger.info(f"📋 Задач в планировщике: {len(jobs)}")
-            for job in jobs:
-                logger.info(f"  • {job.name}: {job.next_run_time}")
-        else:
-            logger.error("❌ Не удалось запустить планировщик")
-    except Exception as e:
-        logger.error(f"❌ Ошибка планировщика: {e}")
+    # Несколько копий: задачи по расписанию запускает только ведущая
+    # (после старта приложения, см. post_init)
+    if LEADER_LOCK_FILE:
+        leader = LeaderLock(LEADER_LOCK_FILE)
+        application.bot_data['leader'] = leader
+        if not leader.try_acquire() and BOT_MODE != 'webhook':
+            # getUpdates принимает только одного получателя: резервная копия
+            # начинает опрос, когда станет ведущей. В режиме webhook
+            # обновления обрабатывают все копии, ждут только задачи
+            logger.info(f"⏸ Резервная копия: ждём, пока освободится {LEADER_LOCK_FILE}")
+            leader.wait(LEADER_POLL_INTERVAL)
+            logger.info("👑 Копия стала ведущей")
     
     # Запускаем бота
-    logger.info("🤖 Бот запущен и готов к работе!")
-    application.run_polling(
+    logger.info(f"🤖 Бот запущен и готов к работе! (режим: {BOT_MODE}, обновлений одновременно: {UPDATE_CONCURRENCY})")
+    if BOT_MODE == 'webhook':
+        run_webhook(application)
+    else:
+        application.run_polling(
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=DROP_PENDING_UPDATES
+        )
+
+def check_webhook_settings() -> bool:
+    """Проверяет настройки режима webhook; при ошибке пишет её в лог и возвращает False."""
+    if not WEBHOOK_URL:
+        # Без адреса PTB зарегистрировал бы http://WEBHOOK_LISTEN:WEBHOOK_PORT/...,
+        # куда Telegram не достучится
+        logger.error("❌ WEBHOOK_URL не задан: Telegram не сможет доставлять обновления")
+        return False
+    if LEADER_LOCK_FILE and not WEBHOOK_SECRET_TOKEN:
+        # Каждая копия регистрирует webhook при старте: со случайными токенами
+        # последняя запущенная копия отклоняла бы обновления всех остальных
+        logger.error("❌ Для нескольких копий (LEADER_LOCK_FILE) задайте общий WEBHOOK_SECRET_TOKEN")
+        return False
+    return True
+
+def run_webhook(application: Application) -> None:
+    """
+    Принимает обновления через webhook (встроенный HTTP-сервер PTB).
+    Запросы без верного заголовка X-Telegram-Bot-Api-Secret-Token отклоняются.
+    """
+    secret_token = WEBHOOK_SECRET_TOKEN
+    if not secret_token:
+        # Одна копия: случайный токен действует до перезапуска
+        secret_token = secrets.token_urlsafe(32)
+        logger.warning("⚠️ WEBHOOK_SECRET_TOKEN не задан, используется случайный токен")
+    
+    logger.info(f"🌐 Webhook: слушаем {WEBHOOK_LISTEN}:{WEBHOOK_PORT}/{WEBHOOK_PATH}")
+    application.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH,
+        webhook_url=WEBHOOK_URL,
+        secret_token=secret_token,
         allowed_updates=Update.ALL_TYPES,
-        drop_pending_updates=True  # Очищаем старые обновления
+        drop_pending_updates=DROP_PENDING_UPDATES
     )
 
 if __name__ == '__main__':
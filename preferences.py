@@ -0,0 +1,150 @@
+"""
+Настройки доставки для каждого пользователя: часовой пояс и время рассылки.
+Пользователи с одинаковыми (часовой пояс, время) объединяются в группу,
+и на каждую группу ставится одна задача планировщика.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from storage import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+_TIME_RE = re.compile(r'^([01]?\d|2[0-3])[:.]([0-5]\d)$', re.ASCII)
+
+def parse_send_time(value: str) -> str:
+    """Проверяет время ЧЧ:ММ и приводит его к виду 09:00. Бросает ValueError."""
+    match = _TIME_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Некорректное время: {value!r}, нужно ЧЧ:ММ")
+    return f"{int(match.group(1)):02d}:{match.group(2)}"
+
+def parse_timezone(value: str) -> str:
+    """Проверяет название часового пояса (например, Europe/Moscow). Бросает ValueError."""
+    try:
+        ZoneInfo(value.strip())
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Неизвестный часовой пояс: {value!r}") from None
+    return value.strip()
+
+class DeliveryPreferences:
+    """Настройки пользователей в JSON-файле: {user_id: {'timezone': ..., 'time': 'ЧЧ:ММ'}}."""
+
+    def __init__(self, path: str, default_timezone: str, default_time: str):
+        self.path = path
+        self.default_timezone = default_timezone
+        self.default_time = default_time
+        self._lock = threading.Lock()
+        self._prefs = {}
+        # (время изменения, размер) файла на момент последнего чтения или записи
+        self._file_state = None
+        # Растёт при каждом изменении настроек: по нему планировщик
+        # узнаёт, что задачи рассылки нужно пересоздать
+        self.version = 0
+        self.load()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except (OSError, TypeError, ValueError):
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> None:
+        """Загружает настройки из файла."""
+        try:
+            if not self.path or not os.path.exists(self.path):
+                return
+            file_state = self._stat()
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._prefs = {int(user_id): prefs for user_id, prefs in data.items()}
+                self._file_state = file_state
+                self.version += 1
+        except Exception as e:
+            logger.error(f"Ошибка загрузки настроек доставки: {e}")
+
+    def reload_if_changed(self) -> bool:
+        """
+        Перечитывает файл, если его изменил кто-то другой (например, другая
+        копия бота). Возвращает True, если настройки перечитаны.
+        """
+        if not self.path or self._stat() == self._file_state:
+            return False
+        self.load()
+        return True
+
+    def save(self) -> bool:
+        """Сохраняет настройки (запись через временный файл)."""
+        with self._lock:
+            return self._write(self._prefs)
+
+    def _write(self, prefs: dict) -> bool:
+        try:
+            atomic_write_json(self.path, {str(user_id): p for user_id, p in prefs.items()}, indent=2)
+            # Собственную запись перечитывать не нужно
+            self._file_state = self._stat()
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка сохранения настроек доставки: {e}")
+            return False
+
+    def get(self, user_id: int) -> tuple:
+        """Возвращает (часовой пояс, время ЧЧ:ММ) пользователя."""
+        with self._lock:
+            prefs = self._prefs.get(user_id, {})
+        return prefs.get('timezone', self.default_timezone), prefs.get('time', self.default_time)
+
+    def set(self, user_id: int, timezone: str = None, send_time: str = None) -> tuple:
+        """
+        Меняет настройки пользователя (значения проверяются).
+        Возвращает новые (часовой пояс, время). Бросает ValueError
+        для некорректных значений и OSError, если не удалось сохранить.
+        """
+        updates = {}
+        if timezone is not None:
+            updates['timezone'] = parse_timezone(timezone)
+        if send_time is not None:
+            updates['time'] = parse_send_time(send_time)
+        with self._lock:
+            # В памяти настройки меняются только после записи в файл:
+            # при ошибке планировщик продолжает работать со старыми
+            prefs = dict(self._prefs)
+            prefs[user_id] = {**prefs.get(user_id, {}), **updates}
+            if not self._write(prefs):
+                raise OSError("Не удалось сохранить настройки")
+            self._prefs = prefs
+            self.version += 1
+        return self.get(user_id)
+
+    def buckets(self, user_ids) -> dict:
+        """Группирует пользователей: {(часовой пояс, 'ЧЧ:ММ'): [user_id, ...]}."""
+        groups = defaultdict(list)
+        for user_id in user_ids:
+            groups[self.get(user_id)].append(user_id)
+        return dict(groups)
+
+# ===================== ОБЩИЙ ЭКЗЕМПЛЯР =====================
+
+_preferences = {}
+_preferences_lock = threading.Lock()
+
+def get_preferences(path: str, default_timezone: str, default_time: str) -> DeliveryPreferences:
+    """
+    Возвращает общий для процесса DeliveryPreferences для файла path.
+    Если файл изменила другая копия бота, настройки перечитываются.
+    """
+    with _preferences_lock:
+        prefs = _preferences.get(path)
+        if prefs is None:
+            prefs = _preferences[path] = DeliveryPreferences(path, default_timezone, default_time)
+            return prefs
+    prefs.reload_if_changed()
+    return prefs
@@ -0,0 +1,144 @@
+"""
+Заранее подготовленные поздравления.
+Ночью (в 00:05) для именинников сегодня и завтра генерируются
+и сохраняются поздравления с ключом (дата, имя); даты считаются
+в часовых поясах групп рассылки. Утренняя рассылка
+и /nearest берут готовые тексты, поэтому /nearest показывает то же
+поздравление, которое уйдёт в рассылке.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from storage import atomic_write_json
+from utils import local_now
+
+logger = logging.getLogger(__name__)
+
+# Сколько дней вперёд готовить поздравления (0 - сегодня, 1 - завтра)
+PRERENDER_DAYS = 2
+
+class GreetingCache:
+    """Поздравления по датам: {'ГГГГ-ММ-ДД': {имя: текст}} в JSON-файле."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._days = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    @staticmethod
+    def _key(day) -> str:
+        if isinstance(day, datetime):
+            day = day.date()
+        return day.isoformat()
+
+    def get(self, day, name: str):
+        """Готовое поздравление или None."""
+        with self._lock:
+            return self._days.get(self._key(day), {}).get(name)
+
+    def get_many(self, day, names: list) -> list:
+        """
+        Поздравления для именинников одного дня.
+        Недостающие генерируются одним пакетом и запоминаются.
+        """
+        from greetings_generator import generate_many
+
+        key = self._key(day)
+        with self._lock:
+            greetings = self._days.setdefault(key, {})
+            missing = [name for name in dict.fromkeys(names) if name not in greetings]
+            if missing:
+                for name, greeting in zip(missing, generate_many(missing, min_sentences=3, max_sentences=4)):
+                    greetings[name] = greeting
+                self._dirty = True
+            return [greetings[name] for name in names]
+
+    def prune(self, today) -> int:
+        """Удаляет поздравления на прошедшие даты. Возвращает число удалённых дней."""
+        today_key = self._key(today)
+        with self._lock:
+            old = [key for key in self._days if key < today_key]
+            for key in old:
+                del self._days[key]
+            if old:
+                self._dirty = True
+            return len(old)
+
+    def load(self) -> None:
+        """Загружает поздравления из файла."""
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._days = data
+        except Exception as e:
+            logger.error(f"Ошибка загрузки подготовленных поздравлений: {e}")
+
+    def save(self) -> bool:
+        """Сохраняет поздравления, если они менялись (запись через временный файл)."""
+        if not self.path or not self._dirty:
+            return True
+        try:
+            with self._lock:
+                data = {key: dict(greetings) for key, greetings in self._days.items()}
+                self._dirty = False
+            atomic_write_json(self.path, data, indent=2)
+            return True
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Ошибка сохранения подготовленных поздравлений: {e}")
+            return False
+
+def prerender_greetings(cache: GreetingCache, index, now: datetime = None, days: int = PRERENDER_DAYS,
+                        timezones=()) -> int:
+    """
+    Готовит поздравления для именинников на days дней начиная с now.
+    С timezones дни считаются от местного времени каждого пояса, и
+    готовится на день больше: до следующего запуска группа рассылки
+    может перейти на следующие местные сутки.
+    Старые даты удаляются; вчерашние (для самого западного пояса) остаются.
+    Возвращает число подготовленных поздравлений.
+    """
+    if timezones:
+        starts = [now.astimezone(ZoneInfo(tz)) if now else local_now(tz) for tz in timezones]
+        days += 1
+    else:
+        starts = [now or datetime.now()]
+    targets = {}
+    for start in starts:
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            targets.setdefault(day.date(), day)
+    cache.prune(min(targets) - timedelta(days=1))
+    count = 0
+    for _, day in sorted(targets.items()):
+        names = index.names_on(day)
+        if names:
+            cache.get_many(day, names)
+            count += len(names)
+    cache.save()
+    logger.info(f"📝 Подготовлено поздравлений: {count}")
+    return count
+
+# ===================== ОБЩИЙ ЭКЗЕМПЛЯР =====================
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_greeting_cache(path: str) -> GreetingCache:
+    """Возвращает общий для процесса GreetingCache для файла path."""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = GreetingCache(path)
+        return cache
@@ -1,10 +1,13 @@
 # scheduler.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
 
-from datetime import datetime  # <-- ВАЖНО: ДОБАВЬТЕ ЭТОТ ИМПОРТ
+from datetime import datetime, timedelta, time as dt_time  # <-- ВАЖНО: ДОБАВЬТЕ ЭТОТ ИМПОРТ
+from zoneinfo import ZoneInfo
 import asyncio
 import logging
+import time
 from telegram import Bot
 from telegram.error import TelegramError
+from telegram.request import HTTPXRequest
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 import atexit
@@ -14,29 +17,150 @@ import os
 # Добавляем путь для импортов
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config import BOT_TOKEN, AUTHORIZED_USER_IDS, DATA_FILE
-from utils import load_birthdays, get_today_date, get_tomorrow_date
+from config import (
+    BOT_TOKEN, AUTHORIZED_USER_IDS, STORAGE_URL, GREETING_CACHE_FILE,
+    SEND_CONCURRENCY, SEND_GLOBAL_RATE, SEND_PER_CHAT_RATE, SEND_MAX_RETRIES,
+    NOTIFY_TIMEZONE, NOTIFY_TIME, PREFERENCES_FILE, PREFERENCES_CHECK_INTERVAL,
+    DELIVERY_LEDGER_FILE, DELIVERY_CATCHUP_HOURS, DELIVERY_RETRY_INTERVAL, DELIVERY_MAX_ATTEMPTS,
+    BOT_API_BASE_URL, BOT_API_BASE_FILE_URL
+)
+from collections import defaultdict
+from telegram.error import Forbidden, BadRequest
+from fanout import FanOut
+from ledger import get_ledger
+from executors import run_io
+from utils import local_now
+from birthday_store import get_store
+from greetings_generator import save_greeting_history
+from prerender import get_greeting_cache, prerender_greetings
+from preferences import get_preferences
 
 logger = logging.getLogger(__name__)
 
-def send_message_sync(bot, chat_id, text, parse_mode='HTML'):
-    """Синхронная обертка для отправки сообщений."""
+# Задачи рассылки: одна на группу пользователей с одинаковыми
+# часовым поясом и временем, id - birthday_notifications:<пояс>:<ЧЧ:ММ>
+NOTIFY_JOB_PREFIX = 'birthday_notifications:'
+
+# Запуск, опоздавший (например, из-за занятого event loop) не больше
+# чем на окно досылки, выполняется один раз, а не пропускается
+MISFIRE_OPTIONS = {'misfire_grace_time': int(DELIVERY_CATCHUP_HOURS * 3600), 'coalesce': True}
+
+# Время подготовки поздравлений (вне часа пик)
+PRERENDER_HOUR = 0
+PRERENDER_MINUTE = 5
+
+def build_notification_text(now: datetime = None):
+    """
+    Формирует текст ежедневного уведомления.
+    now - текущее время получателей (по умолчанию время сервера):
+    от него считаются "сегодня" и "завтра".
+    Возвращает None, если отправлять нечего.
+    """
+    # Загружаем данные
+    try:
+        store = get_store(STORAGE_URL)
+        index = store.index()
+        if not index:
+            logger.info("📭 Нет данных о днях рождения")
+            return None
+        logger.info(f"📊 Загружено {len(index)} записей")
+    except Exception as e:
+        logger.error(f"❌ Ошибка загрузки данных: {e}")
+        return None
+    
+    # Получаем даты
+    try:
+        now = now or datetime.now()
+        today = now.strftime("%d.%m")
+        tomorrow = (now + timedelta(days=1)).strftime("%d.%m")
+        logger.info(f"📅 Даты: сегодня {today}, завтра {tomorrow}")
+    except Exception as e:
+        logger.error(f"❌ Ошибка получения дат: {e}")
+        return None
+    
+    # Ищем совпадения
     try:
-        # Используем asyncio.run() для Python 3.7+
-        async def send_async():
-            return await bot.send_message(
-                chat_id=chat_id, 
-                text=text, 
-                parse_mode=parse_mode
-            )
-        
-        return asyncio.run(send_async())
+        today_birthdays = index.names_on(now)
+        tomorrow_birthdays = index.names_on(now + timedelta(days=1))
+                
+        logger.info(f"🎂 Найдено на сегодня: {len(today_birthdays)}")
+        logger.info(f"📅 Найдено на завтра: {len(tomorrow_birthdays)}")
+        
     except Exception as e:
-        logger.error(f"Ошибка отправки сообщения: {e}")
-        raise
+        logger.error(f"❌ Ошибка поиска совпадений: {e}")
+        return None
+    
+    # Формируем сообщения
+    from utils import format_birthday_message
+    
+    messages = []
+    greeting_cache = get_greeting_cache(GREETING_CACHE_FILE)
+    
+    if today_birthdays:
+        try:
+            greetings = greeting_cache.get_many(now, today_birthdays)
+            today_message = format_birthday_message(today_birthdays, is_today=True, greetings=greetings)
+            messages.append(today_message)
+            logger.info(f"📝 Сообщение на сегодня: {len(today_message)} символов")
+        except Exception as e:
+            logger.error(f"❌ Ошибка форматирования сообщения на сегодня: {e}")
+    
+    if tomorrow_birthdays:
+        try:
+            greetings = greeting_cache.get_many(now + timedelta(days=1), tomorrow_birthdays)
+            tomorrow_message = format_birthday_message(tomorrow_birthdays, is_today=False, greetings=greetings)
+            messages.append(tomorrow_message)
+            logger.info(f"📝 Сообщение на завтра: {len(tomorrow_message)} символов")
+        except Exception as e:
+            logger.error(f"❌ Ошибка форматирования сообщения на завтра: {e}")
+    
+    if not messages:
+        logger.info("ℹ️ Нет уведомлений для отправки (нет дней рождения)")
+        return None
+    
+    message_text = "\n\n".join(messages)
+    
+    # Добавляем коллективное поздравление если есть именинники
+    try:
+        from greetings_generator import generate_collective_greeting
+        # Получаем все имена именинников
+        all_names = today_birthdays + tomorrow_birthdays
+        if all_names:
+            collective_greeting = generate_collective_greeting(all_names)
+            message_text += f"\n\n{collective_greeting}"
+    except ImportError:
+        if today_birthdays or tomorrow_birthdays:
+            message_text += f"\n\n🎉 Поздравляем всех именинников!"
+    
+    logger.info(f"📨 Итоговое сообщение: {len(message_text)} символов")
+    return message_text
 
-def send_birthday_notifications():
-    """Отправляет уведомления о днях рождения (синхронная версия)."""
+def bot_api_urls() -> dict:
+    """Адреса Bot API из настроек (пусто - адреса Telegram по умолчанию)."""
+    urls = {}
+    if BOT_API_BASE_URL:
+        urls['base_url'] = BOT_API_BASE_URL
+    if BOT_API_BASE_FILE_URL:
+        urls['base_file_url'] = BOT_API_BASE_FILE_URL
+    return urls
+
+def create_bot() -> Bot:
+    """Создаёт Bot с пулом соединений под параллельную рассылку."""
+    return Bot(
+        token=BOT_TOKEN,
+        request=HTTPXRequest(connection_pool_size=SEND_CONCURRENCY),
+        **bot_api_urls()
+    )
+
+async def send_birthday_notifications_async(bot=None, user_ids=None, now: datetime = None):
+    """
+    Отправляет уведомления о днях рождения пользователям user_ids
+    (по умолчанию всем авторизованным); now - их текущее время.
+    Рассылка идёт параллельно через одну HTTP-сессию бота.
+    Если bot не передан, создаётся временный на время рассылки.
+    Чтение данных, генерация текста, запись файлов и журнала выполняются
+    в пуле ввода-вывода: в режиме application event loop бота не блокируется.
+    """
     try:
         logger.info("=" * 60)
         logger.info("🎂 ЗАПУСК ОТПРАВКИ УВЕДОМЛЕНИЙ")
@@ -44,119 +168,38 @@ def send_birthday_notifications():
         logger.info("=" * 60)
         
         # Проверяем токен
-        if not BOT_TOKEN or BOT_TOKEN == 'ваш_токен_бота_от_BotFather':
+        if bot is None and (not BOT_TOKEN or BOT_TOKEN == 'ваш_токен_бота_от_BotFather'):
             logger.error("❌ BOT_TOKEN не установлен или имеет значение по умолчанию")
-            return
-        
-        # Создаем бота
-        bot = Bot(token=BOT_TOKEN)
+            return None
         
         # Проверяем пользователей
-        if not AUTHORIZED_USER_IDS:
-            logger.error("❌ Нет авторизованных пользователей")
-            return
+        if user_ids is None:
+            user_ids = AUTHORIZED_USER_IDS
+        if not user_ids:
+            logger.error("❌ Нет получателей")
+            return None
         
-        # Загружаем данные
-        try:
-            birthdays = load_birthdays(DATA_FILE)
-            if not birthdays:
-                logger.info("📭 Нет данных о днях рождения")
-                return
-            logger.info(f"📊 Загружено {len(birthdays)} записей")
-        except Exception as e:
-            logger.error(f"❌ Ошибка загрузки данных: {e}")
-            return
+        message_text = await run_io(build_notification_text, now)
+        if not message_text:
+            return None
         
-        # Получаем даты
-        try:
-            today = get_today_date()
-            tomorrow = get_tomorrow_date()
-            logger.info(f"📅 Даты: сегодня {today}, завтра {tomorrow}")
-        except Exception as e:
-            logger.error(f"❌ Ошибка получения дат: {e}")
-            return
+        # Запоминаем выданные поздравления до отправки
+        await run_io(_save_greetings)
         
-        # Ищем совпадения
-        today_birthdays = []
-        tomorrow_birthdays = []
+        # Записываем рассылку в журнал; получатели, которым она
+        # уже доставлена сегодня, пропускаются
+        day = (now or datetime.now()).date()
+        deliveries = await run_io(get_delivery_ledger().claim, day, user_ids, message_text)
+        if len(deliveries) < len(user_ids):
+            logger.info(f"📒 Уже доставлено или отправляется: {len(user_ids) - len(deliveries)} получателей")
+        if not deliveries:
+            return {'sent': [], 'failed': {}}
         
-        try:
-            for b in birthdays:
-                if 'birthday' not in b or 'name' not in b:
-                    continue
-                    
-                if b['birthday'] == today:
-                    today_birthdays.append(b['name'])
-                elif b['birthday'] == tomorrow:
-                    tomorrow_birthdays.append(b['name'])
-                    
-            logger.info(f"🎂 Найдено на сегодня: {len(today_birthdays)}")
-            logger.info(f"📅 Найдено на завтра: {len(tomorrow_birthdays)}")
-            
-        except Exception as e:
-            logger.error(f"❌ Ошибка поиска совпадений: {e}")
-            return
-        
-        # Формируем сообщения
-        from utils import format_birthday_message
-        
-        messages = []
-        
-        if today_birthdays:
-            try:
-                today_message = format_birthday_message(today_birthdays, is_today=True)
-                messages.append(today_message)
-                logger.info(f"📝 Сообщение на сегодня: {len(today_message)} символов")
-            except Exception as e:
-                logger.error(f"❌ Ошибка форматирования сообщения на сегодня: {e}")
-        
-        if tomorrow_birthdays:
-            try:
-                tomorrow_message = format_birthday_message(tomorrow_birthdays, is_today=False)
-                messages.append(tomorrow_message)
-                logger.info(f"📝 Сообщение на завтра: {len(tomorrow_message)} символов")
-            except Exception as e:
-                logger.error(f"❌ Ошибка форматирования сообщения на завтра: {e}")
-        
-        # Отправляем всем пользователям если есть что отправлять
-        if messages:
-            message_text = "\n\n".join(messages)
-            
-            # Добавляем коллективное поздравление если есть именинники
-            try:
-                from greetings_generator import generate_collective_greeting
-                # Получаем все имена именинников
-                all_names = today_birthdays + tomorrow_birthdays
-                if all_names:
-                    collective_greeting = generate_collective_greeting(all_names)
-                    message_text += f"\n\n{collective_greeting}"
-            except ImportError:
-                if today_birthdays or tomorrow_birthdays:
-                    message_text += f"\n\n🎉 Поздравляем всех именинников!"
-            
-            logger.info(f"📨 Итоговое сообщение: {len(message_text)} символов")
-            
-            successful_sends = 0
-            failed_sends = 0
-            
-            for user_id in AUTHORIZED_USER_IDS:
-                try:
-                    # Используем синхронную обертку
-                    send_message_sync(bot, user_id, message_text, 'HTML')
-                    logger.info(f"✅ Отправлено пользователю {user_id}")
-                    successful_sends += 1
-                    
-                except TelegramError as e:
-                    logger.error(f"❌ Ошибка Telegram пользователю {user_id}: {e}")
-                    failed_sends += 1
-                except Exception as e:
-                    logger.error(f"❌ Общая ошибка отправки пользователю {user_id}: {e}")
-                    failed_sends += 1
-            
-            logger.info(f"📊 Итог: успешно {successful_sends}, ошибок {failed_sends}")
-            
-        else:
-            logger.info("ℹ️ Нет уведомлений для отправки (нет дней рождения)")
+        if bot is None:
+            # Создаем бота на время рассылки
+            async with create_bot() as own_bot:
+                return await _deliver(own_bot, deliveries)
+        return await _deliver(bot, deliveries)
             
     except TelegramError as e:
         logger.error(f"❌ Ошибка Telegram API: {e}")
@@ -164,20 +207,305 @@ def send_birthday_notifications():
         logger.error(f"❌ Критическая ошибка в send_birthday_notifications: {e}")
         import traceback
         logger.error(traceback.format_exc())
+    return None
+
+def _save_greetings() -> None:
+    """Сохраняет историю выданных поздравлений и подготовленные поздравления."""
+    save_greeting_history()
+    get_greeting_cache(GREETING_CACHE_FILE).save()
+
+def get_delivery_ledger():
+    """Журнал доставки уведомлений."""
+    return get_ledger(DELIVERY_LEDGER_FILE, DELIVERY_MAX_ATTEMPTS)
+
+async def _deliver(bot, deliveries: list) -> dict:
+    """
+    Отправляет уведомления из журнала [(день, chat_id, текст)] и записывает
+    результат: доставленные отмечаются, остальные остаются в очереди на повтор
+    (кроме заблокировавших бота и некорректных запросов).
+    """
+    groups = defaultdict(list)
+    for day, chat_id, text in deliveries:
+        groups[day, text].append(chat_id)
+    
+    ledger = get_delivery_ledger()
+    total = {'sent': [], 'failed': {}}
+    for (day, text), chat_ids in groups.items():
+        try:
+            result = await _broadcast(bot, text, chat_ids)
+        except Exception as e:
+            result = {'sent': [], 'failed': {chat_id: e for chat_id in chat_ids}}
+        await run_io(ledger.record, day, result['sent'], {
+            chat_id: (error, not isinstance(error, (Forbidden, BadRequest)))
+            for chat_id, error in result['failed'].items()
+        })
+        total['sent'] += result['sent']
+        total['failed'].update(result['failed'])
+    return total
+
+async def _broadcast(bot, message_text: str, user_ids: list) -> dict:
+    """Рассылает готовый текст пользователям user_ids."""
+    fanout = FanOut(
+        bot,
+        concurrency=SEND_CONCURRENCY,
+        global_rate=SEND_GLOBAL_RATE,
+        per_chat_rate=SEND_PER_CHAT_RATE,
+        max_retries=SEND_MAX_RETRIES,
+    )
+    started = time.monotonic()
+    result = await fanout.broadcast(user_ids, message_text, parse_mode='HTML')
+    
+    for user_id, error in result['failed'].items():
+        logger.error(f"❌ Ошибка отправки пользователю {user_id}: {error}")
+    
+    logger.info(
+        f"📊 Итог: успешно {len(result['sent'])}, ошибок {len(result['failed'])}, "
+        f"за {time.monotonic() - started:.1f} с"
+    )
+    return result
+
+def prerender_job_sync():
+    """Готовит поздравления на сегодня и завтра в часовом поясе каждой группы рассылки."""
+    try:
+        store = get_store(STORAGE_URL)
+        timezones = {NOTIFY_TIMEZONE} | {timezone for timezone, _ in notification_buckets()}
+        prerender_greetings(get_greeting_cache(GREETING_CACHE_FILE), store.index(), timezones=sorted(timezones))
+        save_greeting_history()
+    except Exception as e:
+        logger.error(f"❌ Ошибка подготовки поздравлений: {e}")
+
+def send_birthday_notifications():
+    """Отправляет уведомления о днях рождения (синхронная версия для фонового планировщика)."""
+    return asyncio.run(send_birthday_notifications_async())
+
+# ===================== ГРУППЫ ПОЛУЧАТЕЛЕЙ =====================
+
+def get_delivery_preferences():
+    """Настройки доставки пользователей (часовой пояс и время)."""
+    return get_preferences(PREFERENCES_FILE, NOTIFY_TIMEZONE, NOTIFY_TIME)
+
+def notification_buckets() -> dict:
+    """Группы получателей: {(часовой пояс, 'ЧЧ:ММ'): [user_id, ...]}."""
+    return get_delivery_preferences().buckets(AUTHORIZED_USER_IDS)
+
+# Версия настроек, по которой расставлены задачи рассылки
+_scheduled_version = None
+
+def _mark_scheduled() -> None:
+    global _scheduled_version
+    _scheduled_version = get_delivery_preferences().version
+
+def preferences_changed() -> bool:
+    """
+    Изменились ли настройки с последней расстановки задач рассылки
+    (в том числе в файле - командой /settings на другой копии бота).
+    """
+    return get_delivery_preferences().version != _scheduled_version
+
+def bucket_job_id(timezone: str, send_time: str) -> str:
+    return f"{NOTIFY_JOB_PREFIX}{timezone}:{send_time}"
+
+def bucket_time(timezone: str, send_time: str) -> dt_time:
+    """Время срабатывания группы с часовым поясом."""
+    hour, minute = map(int, send_time.split(':'))
+    return dt_time(hour=hour, minute=minute, tzinfo=ZoneInfo(timezone))
+
+async def send_bucket_notifications_async(timezone: str, send_time: str, bot=None, now: datetime = None):
+    """
+    Рассылка одной группы. Получатели берутся по настройкам на момент
+    запуска, "сегодня" считается в часовом поясе группы.
+    """
+    user_ids = (await run_io(notification_buckets)).get((timezone, send_time), [])
+    if not user_ids:
+        logger.info(f"ℹ️ В группе {timezone} {send_time} нет получателей")
+        return None
+    logger.info(f"🕘 Рассылка группы {timezone} {send_time}: {len(user_ids)} получателей")
+    return await send_birthday_notifications_async(bot, user_ids=user_ids, now=now or local_now(timezone))
+
+def send_bucket_notifications(timezone: str, send_time: str):
+    """Рассылка одной группы (синхронная версия для фонового планировщика)."""
+    return asyncio.run(send_bucket_notifications_async(timezone, send_time))
+
+async def catch_up_notifications_async(bot=None, now: datetime = None) -> int:
+    """
+    Досылает рассылки, пропущенные из-за перезапуска: группы, чьё время
+    сегодня (по их часовому поясу) прошло не больше DELIVERY_CATCHUP_HOURS
+    часов назад. Уже доставленное журнал пропустит.
+    Возвращает число запущенных групп.
+    """
+    now = now or datetime.now(ZoneInfo('UTC'))
+    window = timedelta(hours=DELIVERY_CATCHUP_HOURS)
+    count = 0
+    for timezone, send_time in await run_io(notification_buckets):
+        local = now.astimezone(ZoneInfo(timezone))
+        at = bucket_time(timezone, send_time)
+        scheduled = datetime.combine(local.date(), at.replace(tzinfo=None), tzinfo=at.tzinfo)
+        if scheduled <= local <= scheduled + window:
+            logger.info(f"⏪ Досылка пропущенной рассылки группы {timezone} {send_time}")
+            await send_bucket_notifications_async(timezone, send_time, bot, now=local)
+            count += 1
+    return count
+
+def catch_up_notifications():
+    """Досылка пропущенных рассылок (синхронная версия для фонового планировщика)."""
+    return asyncio.run(catch_up_notifications_async())
+
+def local_days(now: datetime = None) -> tuple:
+    """Самое раннее и самое позднее "сегодня" среди часовых поясов групп рассылки."""
+    now = now or datetime.now(ZoneInfo('UTC'))
+    timezones = {NOTIFY_TIMEZONE} | {timezone for timezone, _ in notification_buckets()}
+    days = [now.astimezone(ZoneInfo(timezone)).date() for timezone in timezones]
+    return min(days), max(days)
+
+async def retry_deliveries_async(bot=None, now: datetime = None) -> dict:
+    """
+    Повторяет недоставленные уведомления по журналу. Строки журнала
+    записаны по местной дате получателей, поэтому окно - от вчера
+    самого западного часового пояса групп до сегодня самого восточного.
+    """
+    ledger = get_delivery_ledger()
+    first, last = await run_io(local_days, now)
+    await run_io(ledger.prune, first)
+    deliveries = await run_io(ledger.claim_retries, first - timedelta(days=1), last)
+    if not deliveries:
+        return {'sent': [], 'failed': {}}
+    logger.info(f"🔁 Повтор недоставленных уведомлений: {len(deliveries)}")
+    if bot is None:
+        async with create_bot() as own_bot:
+            return await _deliver(own_bot, deliveries)
+    return await _deliver(bot, deliveries)
+
+def retry_deliveries():
+    """Повтор недоставленных уведомлений (синхронная версия для фонового планировщика)."""
+    return asyncio.run(retry_deliveries_async())
+
+def _schedule_background_buckets(scheduler) -> int:
+    """
+    Ставит задачи новых групп в BackgroundScheduler, задачи опустевших
+    групп удаляет. Возвращает число групп.
+    """
+    _mark_scheduled()
+    buckets = notification_buckets()
+    wanted = {bucket_job_id(*key) for key in buckets}
+    existing = set()
+    for job in scheduler.get_jobs():
+        if job.id.startswith(NOTIFY_JOB_PREFIX):
+            if job.id in wanted:
+                existing.add(job.id)
+            else:
+                job.remove()
+    for timezone, send_time in buckets:
+        if bucket_job_id(timezone, send_time) in existing:
+            continue
+        at = bucket_time(timezone, send_time)
+        scheduler.add_job(
+            send_bucket_notifications,
+            CronTrigger(hour=at.hour, minute=at.minute, timezone=timezone),
+            args=[timezone, send_time],
+            id=bucket_job_id(timezone, send_time),
+            name=f'Уведомления о днях рождения ({timezone} {send_time})',
+            replace_existing=True,
+            **MISFIRE_OPTIONS
+        )
+    return len(buckets)
+
+def _schedule_application_buckets(job_queue) -> int:
+    """Ставит задачи новых групп в JobQueue, задачи опустевших групп удаляет. Возвращает число групп."""
+    _mark_scheduled()
+    buckets = notification_buckets()
+    wanted = {bucket_job_id(*key) for key in buckets}
+    existing = set()
+    for job in job_queue.jobs():
+        if job.job.id.startswith(NOTIFY_JOB_PREFIX):
+            if job.job.id in wanted:
+                existing.add(job.job.id)
+            else:
+                job.schedule_removal()
+    for timezone, send_time in buckets:
+        if bucket_job_id(timezone, send_time) in existing:
+            continue
+        job_queue.run_daily(
+            birthday_notifications_job,
+            time=bucket_time(timezone, send_time),
+            data=(timezone, send_time),
+            name=f'Уведомления о днях рождения ({timezone} {send_time})',
+            job_kwargs={'id': bucket_job_id(timezone, send_time), 'replace_existing': True, **MISFIRE_OPTIONS}
+        )
+    return len(buckets)
+
+_background_scheduler = None
+
+def reschedule_notifications(application=None) -> int:
+    """
+    Пересоздаёт задачи рассылки после изменения настроек пользователя
+    (в том планировщике, который запущен). Возвращает число групп.
+    """
+    try:
+        if _background_scheduler is not None:
+            count = _schedule_background_buckets(_background_scheduler)
+        elif application is not None and application.job_queue is not None:
+            count = _schedule_application_buckets(application.job_queue)
+        else:
+            return 0
+        logger.info(f"🔁 Задачи рассылки обновлены: групп {count}")
+        return count
+    except Exception as e:
+        logger.error(f"❌ Ошибка обновления задач рассылки: {e}")
+        return 0
+
+def refresh_notifications(application=None) -> bool:
+    """
+    Пересоздаёт задачи рассылки, если настройки изменились (например,
+    /settings обработала другая копия бота). Возвращает True, если задачи обновлены.
+    """
+    try:
+        changed = preferences_changed()
+    except Exception as e:
+        logger.error(f"❌ Ошибка проверки настроек доставки: {e}")
+        return False
+    if changed:
+        reschedule_notifications(application)
+    return changed
 
 def setup_scheduler():
     """Настраивает и запускает планировщик."""
+    global _background_scheduler
     try:
         logger.info("⏰ Настройка планировщика...")
         
         scheduler = BackgroundScheduler()
         
-        # Задача на 09:00 каждый день (по Москве)
+        # Рассылка: по задаче на каждую группу (часовой пояс, время)
+        _schedule_background_buckets(scheduler)
+        
+        # Подготовка поздравлений ночью и сразу при старте
         scheduler.add_job(
-            send_birthday_notifications,
-            CronTrigger(hour=9, minute=00, timezone='Europe/Moscow'),
-            id='birthday_notifications',
-            name='Ежедневные уведомления о днях рождения',
+            prerender_job_sync,
+            CronTrigger(hour=PRERENDER_HOUR, minute=PRERENDER_MINUTE, timezone=NOTIFY_TIMEZONE),
+            id='prerender_greetings',
+            name='Подготовка поздравлений',
+            replace_existing=True
+        )
+        scheduler.add_job(prerender_job_sync, 'date', run_date=None, id='prerender_on_start', name='Подготовка поздравлений при старте')
+        
+        # Досылка пропущенного при перезапуске и повтор недоставленного по журналу
+        scheduler.add_job(catch_up_notifications, 'date', run_date=None, id='catch_up_on_start', name='Досылка пропущенных уведомлений')
+        scheduler.add_job(
+            retry_deliveries,
+            'interval',
+            seconds=DELIVERY_RETRY_INTERVAL,
+            id='retry_deliveries',
+            name='Повтор недоставленных уведомлений',
+            replace_existing=True
+        )
+        
+        # Настройки, изменённые другими копиями бота
+        scheduler.add_job(
+            refresh_notifications,
+            'interval',
+            seconds=PREFERENCES_CHECK_INTERVAL,
+            id='refresh_notifications',
+            name='Проверка настроек доставки',
             replace_existing=True
         )
         
@@ -194,6 +522,7 @@ def setup_scheduler():
         atexit.register(lambda: scheduler.shutdown(wait=False))
         
         scheduler.start()
+        _background_scheduler = scheduler
         
         # Выводим информацию о задачах
         jobs = scheduler.get_jobs()
@@ -213,3 +542,84 @@ def setup_scheduler():
         import traceback
         logger.error(traceback.format_exc())
         return None
+
+# ===================== ПЛАНИРОВЩИК ПРИЛОЖЕНИЯ =====================
+
+async def birthday_notifications_job(context):
+    """Задача JobQueue: рассылка группы через бота и пул соединений приложения."""
+    timezone, send_time = context.job.data
+    await send_bucket_notifications_async(timezone, send_time, context.bot)
+
+async def catch_up_job(context):
+    """Задача JobQueue: досылка рассылок, пропущенных из-за перезапуска."""
+    await catch_up_notifications_async(context.bot)
+
+async def retry_deliveries_job(context):
+    """Задача JobQueue: повтор недоставленных уведомлений по журналу."""
+    try:
+        await retry_deliveries_async(context.bot)
+    except Exception as e:
+        logger.error(f"❌ Ошибка повтора уведомлений: {e}")
+
+async def refresh_notifications_job(context):
+    """Задача JobQueue: пересоздание задач рассылки после изменения настроек на другой копии."""
+    refresh_notifications(context.application)
+
+async def prerender_job(context):
+    """Задача JobQueue: подготовка поздравлений (в отдельном потоке, чтобы не блокировать бота)."""
+    await asyncio.to_thread(prerender_job_sync)
+
+def setup_application_jobs(application):
+    """
+    Ставит ежедневную рассылку в JobQueue приложения.
+    Задачи выполняются в event loop бота: без отдельного потока,
+    отдельных event loop и нового Bot на каждый запуск.
+    """
+    try:
+        logger.info("⏰ Настройка задач приложения...")
+        
+        job_queue = application.job_queue
+        if job_queue is None:
+            logger.error("❌ JobQueue недоступна: установите python-telegram-bot[job-queue]")
+            return None
+        
+        # Рассылка: по задаче на каждую группу (часовой пояс, время)
+        buckets = _schedule_application_buckets(job_queue)
+        logger.info(f"📬 Групп рассылки: {buckets}")
+        
+        # Подготовка поздравлений ночью и сразу при старте
+        job_queue.run_daily(
+            prerender_job,
+            time=dt_time(hour=PRERENDER_HOUR, minute=PRERENDER_MINUTE, tzinfo=ZoneInfo(NOTIFY_TIMEZONE)),
+            name='Подготовка поздравлений',
+            job_kwargs={'id': 'prerender_greetings', 'replace_existing': True}
+        )
+        job_queue.run_once(prerender_job, when=0, name='Подготовка поздравлений при старте')
+        
+        # Досылка пропущенного при перезапуске и повтор недоставленного по журналу
+        job_queue.run_once(catch_up_job, when=0, name='Досылка пропущенных уведомлений')
+        job_queue.run_repeating(
+            retry_deliveries_job,
+            interval=DELIVERY_RETRY_INTERVAL,
+            first=DELIVERY_RETRY_INTERVAL,
+            name='Повтор недоставленных уведомлений',
+            job_kwargs={'id': 'retry_deliveries', 'replace_existing': True}
+        )
+        
+        # Настройки, изменённые другими копиями бота
+        job_queue.run_repeating(
+            refresh_notifications_job,
+            interval=PREFERENCES_CHECK_INTERVAL,
+            first=PREFERENCES_CHECK_INTERVAL,
+            name='Проверка настроек доставки',
+            job_kwargs={'id': 'refresh_notifications', 'replace_existing': True}
+        )
+        
+        logger.info(f"✅ Задачи приложения настроены. Задач: {len(job_queue.jobs())}")
+        return job_queue
+        
+    except Exception as e:
+        logger.error(f"❌ Ошибка настройки задач приложения: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return None
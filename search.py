@@ -0,0 +1,177 @@
+"""
+Поиск записей по части имени.
+Индекс строится один раз при загрузке данных: нормализованные имена
+(регистр, ё -> е) и инвертированный индекс триграмм. Запрос проверяется
+только по записям с самой редкой триграммой запроса, а записи заранее
+упорядочены по (месяц, день), поэтому сортировать результат не нужно.
+Нечёткий поиск (опечатки) ранжирует имена по доле общих триграмм.
+Добавление и удаление записи меняют только списки её триграмм,
+индекс при этом не перестраивается; добавленные записи стоят после
+исходных, и результат с ними досортировывается по дате.
+"""
+
+from bisect import bisect_left
+from itertools import islice
+
+from storage import normalize_name
+
+# Нечёткий поиск: минимальная доля триграмм запроса, найденных в имени,
+# и предел числа проверяемых кандидатов (ограничивает время ответа)
+FUZZY_MIN_SCORE = 0.5
+FUZZY_MAX_CANDIDATES = 2000
+
+def trigrams(text: str) -> set:
+    """Все подстроки длины 3."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def padded_trigrams(text: str) -> set:
+    """Триграммы с пробелами по краям: учитывают начало и конец слов."""
+    return trigrams(f" {text} ")
+
+def similarity(query_grams: set, name_grams: set) -> float:
+    """Доля триграмм запроса, найденных в имени (1.0 - запрос целиком есть в имени)."""
+    if not query_grams:
+        return 0.0
+    return len(query_grams & name_grams) / len(query_grams)
+
+class NameSearchIndex:
+    """
+    Триграммный индекс по нормализованным именам.
+    Записи нумеруются в порядке (месяц, день) при построении, добавленные
+    позже получают следующие номера, поэтому списки триграмм всегда
+    отсортированы по номеру.
+    """
+
+    def __init__(self, birthdays):
+        """birthdays: список записей или BirthdayTable."""
+        from utils import BirthdayTable
+        if not isinstance(birthdays, BirthdayTable):
+            birthdays = BirthdayTable.from_records(birthdays)
+        self._table = birthdays
+        # Позиции в таблице по (месяц, день), записи без даты - в конце
+        self._positions = birthdays.order
+        self._names = [normalize_name(birthdays.names[i] or '') for i in self._positions]
+        # Добавленные записи: {номер: (запись, день года)}; у удалённых имя None
+        self._added = {}
+        self._removed = 0
+        # Триграммы с пробелами по краям подходят и для поиска подстроки:
+        # они включают все триграммы самого имени
+        self._postings = {}
+        for position, name in enumerate(self._names):
+            for gram in padded_trigrams(name):
+                self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self._names) - self._removed
+
+    def _record(self, i: int) -> dict:
+        added = self._added.get(i)
+        if added is not None:
+            return added[0]
+        return self._table.record(self._positions[i])
+
+    def _sort_key(self, i: int) -> tuple:
+        added = self._added.get(i)
+        day = added[1] if added is not None else self._table.day_of_year[self._positions[i]]
+        # Записи без даты (день 0) - в конце
+        return day or 0x10000, i
+
+    # ----- изменение -----
+
+    def add(self, record: dict) -> None:
+        """Добавляет запись в индекс."""
+        from utils import BirthdayTable
+        i = len(self._names)
+        name = normalize_name(record.get('name') or '')
+        self._names.append(name)
+        self._added[i] = (record, BirthdayTable.parse_record(record)[0])
+        for gram in padded_trigrams(name):
+            self._postings.setdefault(gram, []).append(i)
+
+    def remove(self, record: dict) -> bool:
+        """Удаляет одну запись, равную record. Возвращает False, если её нет."""
+        name = normalize_name(record.get('name') or '')
+        for i in self._candidates(name):
+            if self._names[i] == name and self._record(i) == record:
+                break
+        else:
+            return False
+        for gram in padded_trigrams(name):
+            posting = self._postings[gram]
+            del posting[bisect_left(posting, i)]
+            if not posting:
+                del self._postings[gram]
+        self._names[i] = None
+        self._added.pop(i, None)
+        self._removed += 1
+        return True
+
+    def apply_diff(self, diff: dict) -> None:
+        """Применяет разницу из utils.diff_birthdays."""
+        for old, new in diff['changed']:
+            self.remove(old)
+            self.add(new)
+        for bd in diff['removed']:
+            self.remove(bd)
+        for bd in diff['added']:
+            self.add(bd)
+
+    # ----- поиск -----
+
+    def _candidates(self, query_norm: str):
+        """Номера записей, среди которых нужно искать query_norm."""
+        if len(query_norm) < 3:
+            # Для коротких запросов триграмм нет - проверяем все имена
+            return [i for i, name in enumerate(self._names) if name is not None]
+        postings = []
+        for gram in trigrams(query_norm):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        return min(postings, key=len)
+
+    def search(self, query: str) -> list:
+        """Записи, в имени которых есть query, по возрастанию (месяц, день)."""
+        query_norm = normalize_name(query)
+        names = self._names
+        found = [i for i in self._candidates(query_norm) if query_norm in names[i]]
+        if self._added:
+            # Добавленные записи стоят после исходных - возвращаем порядок по дате
+            found.sort(key=self._sort_key)
+        return [self._record(i) for i in found]
+
+    def fuzzy(self, query: str, limit: int = 5, min_score: float = FUZZY_MIN_SCORE) -> list:
+        """
+        Нечёткий поиск: до limit записей, похожих на query, с оценкой от 0 до 1.
+        Возвращает [(запись, оценка)] по убыванию оценки, при равенстве - по дате.
+        """
+        query_norm = normalize_name(query)
+        query_grams = padded_trigrams(query_norm)
+        postings = sorted((self._postings.get(gram, ()) for gram in query_grams), key=len)
+        if not postings:
+            return []
+
+        # Имя с оценкой не ниже min_score содержит хотя бы одну из самых
+        # редких триграмм запроса: кандидатов ищем только по ним
+        needed = max(1, int(min_score * len(query_grams) + 0.999999))
+        candidates = set()
+        for posting in postings[:len(query_grams) - needed + 1]:
+            candidates.update(islice(posting, FUZZY_MAX_CANDIDATES - len(candidates)))
+            if len(candidates) >= FUZZY_MAX_CANDIDATES:
+                break
+
+        scored = []
+        for position in candidates:
+            name = self._names[position]
+            score = similarity(query_grams, padded_trigrams(name))
+            if score >= min_score:
+                # При равной оценке выше имя, близкое к запросу по длине
+                scored.append((-score, abs(len(name) - len(query_norm)), self._sort_key(position)))
+        scored.sort()
+        return [(self._record(key[1]), -score) for score, _, key in scored[:limit]]
+
+    def exact(self, name: str) -> list:
+        """Записи с точно таким именем (без учёта регистра и ё)."""
+        name_norm = normalize_name(name)
+        return [bd for bd in self.search(name) if normalize_name(bd.get('name') or '') == name_norm]
@@ -0,0 +1,215 @@
+"""
+Компактный двоичный снимок дней рождения.
+Имена хранятся один раз в таблице строк, записи - это два столбца:
+номер имени (uint32) и день года (uint16, по високосному году).
+Файл отображается в память (mmap): при открытии ничего не разбирается,
+столбцы читаются прямо из файла.
+
+Формат (порядок байт - как в заголовке):
+    заголовок  BDAY, версия, порядок байт, число записей, число имён, длина таблицы строк
+    offsets    uint32[число имён + 1] - границы имён в таблице строк
+    strings    имена в UTF-8 подряд (дополнено до кратного 4)
+    name_ids   uint32[число записей]
+    days       uint16[число записей]
+
+Конвертация: python snapshot.py data/birthdays.json data/birthdays.bin (и обратно).
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from datetime import date
+from pathlib import Path
+
+MAGIC = b'BDAY'
+VERSION = 1
+HEADER = struct.Struct('<4sHcxIII')
+NATIVE_ORDER = b'L' if sys.byteorder == 'little' else b'B'
+
+# День года по високосному 2000 году: 29.02 - свой день (60)
+_DAY_TO_STR = [None] + [
+    date.fromordinal(date(2000, 1, 1).toordinal() + i).strftime('%d.%m') for i in range(366)
+]
+_STR_TO_DAY = {s: i for i, s in enumerate(_DAY_TO_STR) if s}
+
+def birthday_to_day(birthday: str) -> int:
+    """ДД.ММ -> день года (1..366). Бросает ValueError для некорректной даты."""
+    try:
+        return _STR_TO_DAY[birthday]
+    except KeyError:
+        raise ValueError(f"Некорректная дата: {birthday!r}") from None
+
+def day_to_birthday(day: int) -> str:
+    """День года (1..366) -> ДД.ММ."""
+    return _DAY_TO_STR[day]
+
+def _pad4(size: int) -> int:
+    return (4 - size % 4) % 4
+
+# ===================== ЗАПИСЬ =====================
+
+def encode_snapshot(birthdays: list) -> bytes:
+    """Кодирует записи в двоичный снимок."""
+    interned = {}
+    name_ids = array('I')
+    days = array('H')
+    for bd in birthdays:
+        name_ids.append(interned.setdefault(bd['name'], len(interned)))
+        days.append(birthday_to_day(bd['birthday']))
+
+    encoded = [name.encode('utf-8') for name in interned]
+    offsets = array('I', [0])
+    for raw in encoded:
+        offsets.append(offsets[-1] + len(raw))
+    strings = b''.join(encoded)
+
+    return b''.join([
+        HEADER.pack(MAGIC, VERSION, NATIVE_ORDER, len(days), len(encoded), len(strings)),
+        offsets.tobytes(),
+        strings, b'\0' * _pad4(len(strings)),
+        name_ids.tobytes(),
+        days.tobytes(),
+    ])
+
+def write_snapshot(path, birthdays: list) -> None:
+    """Записывает снимок атомарно (через временный файл и переименование)."""
+    path = Path(path)
+    data = encode_snapshot(birthdays)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+# ===================== ЧТЕНИЕ =====================
+
+class BinarySnapshot:
+    """
+    Открытый снимок. Столбцы name_ids и days - представления памяти
+    поверх файла (без копирования), имена декодируются по требованию.
+    """
+
+    def __init__(self, buffer, mm=None):
+        self._mm = mm
+        view = memoryview(buffer)
+        magic, version, order, count, name_count, strings_size = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Файл не является снимком дней рождения")
+
+        position = HEADER.size
+        sections = []
+        for typecode, length in (('I', name_count + 1), (None, strings_size), ('I', count), ('H', count)):
+            size = length * (array(typecode).itemsize if typecode else 1)
+            sections.append(view[position:position + size])
+            position += size + (_pad4(size) if typecode is None else 0)
+        offsets, self._strings, name_ids, days = sections
+        # Все представления нужно освободить до закрытия mmap
+        self._views = [view] + sections
+
+        if order == NATIVE_ORDER:
+            self._offsets = offsets.cast('I')
+            self.name_ids = name_ids.cast('I')
+            self.days = days.cast('H')
+            self._views += [self._offsets, self.name_ids, self.days]
+        else:
+            # Снимок с другой машины: переставляем байты в копии
+            self._offsets, self.name_ids, self.days = (array(code, bytes(part)) for code, part in
+                                                       (('I', offsets), ('I', name_ids), ('H', days)))
+            for column in (self._offsets, self.name_ids, self.days):
+                column.byteswap()
+        self.name_count = name_count
+        self._names = {}
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def name(self, name_id: int) -> str:
+        """Имя из таблицы строк."""
+        name = self._names.get(name_id)
+        if name is None:
+            start, end = self._offsets[name_id], self._offsets[name_id + 1]
+            name = self._names[name_id] = str(self._strings[start:end], 'utf-8')
+        return name
+
+    def names(self) -> list:
+        """Все имена таблицы строк по номерам."""
+        return [self.name(i) for i in range(self.name_count)]
+
+    def __getitem__(self, i: int) -> dict:
+        return {'name': self.name(self.name_ids[i]), 'birthday': _DAY_TO_STR[self.days[i]]}
+
+    def to_list(self) -> list:
+        """Все записи в виде [{'name': ..., 'birthday': 'ДД.ММ'}]."""
+        names = self.names()
+        return [
+            {'name': names[name_id], 'birthday': _DAY_TO_STR[day]}
+            for name_id, day in zip(self.name_ids, self.days)
+        ]
+
+    def close(self) -> None:
+        """Освобождает отображение файла."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_snapshot(path) -> BinarySnapshot:
+    """Открывает снимок через mmap. Файл не читается целиком."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Пустой файл снимка: {path}")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return BinarySnapshot(mm, mm)
+    except BaseException:
+        mm.close()
+        raise
+
+# ===================== КОНВЕРТАЦИЯ =====================
+
+def json_to_snapshot(json_path, snapshot_path) -> int:
+    """Переводит JSON-файл в снимок. Возвращает число записей."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        birthdays = json.load(f)
+    write_snapshot(snapshot_path, birthdays)
+    return len(birthdays)
+
+def snapshot_to_json(snapshot_path, json_path) -> int:
+    """Переводит снимок обратно в JSON-файл. Возвращает число записей."""
+    from storage import atomic_write_json
+    with open_snapshot(snapshot_path) as snapshot:
+        birthdays = snapshot.to_list()
+    atomic_write_json(json_path, birthdays, indent=2)
+    return len(birthdays)
+
+if __name__ == '__main__':
+    # python snapshot.py data/birthdays.json data/birthdays.bin - и наоборот
+    if len(sys.argv) != 3:
+        print("Использование: python snapshot.py <откуда> <куда>")
+        sys.exit(1)
+    if sys.argv[1].endswith('.json'):
+        count = json_to_snapshot(sys.argv[1], sys.argv[2])
+    else:
+        count = snapshot_to_json(sys.argv[1], sys.argv[2])
+    print(f"✅ Сконвертировано {count} записей: {sys.argv[1]} -> {sys.argv[2]}")
@@ -0,0 +1,639 @@
+"""
+Хранилища данных о днях рождения.
+Бэкенд выбирается по STORAGE_URL:
+- путь к файлу (или json://путь) - JSON-файл, как раньше
+- journal://путь - снимок в JSON и журнал изменений рядом с ним
+- snapshot://путь - компактный двоичный снимок (см. snapshot.py)
+- sqlite:///путь/к/базе.db (или путь с расширением .db/.sqlite) - SQLite
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+def normalize_name(name: str) -> str:
+    """Нормализует имя для сравнения: регистр, пробелы, ё -> е."""
+    return ' '.join(str(name).split()).lower().replace('ё', 'е')
+
+def split_birthday(birthday: str) -> tuple:
+    """Разбирает строку ДД.ММ на (месяц, день)."""
+    day, month = map(int, birthday.split('.'))
+    return month, day
+
+def atomic_write_json(path, data, indent: int = None) -> None:
+    """
+    Записывает JSON через временный файл и переименование:
+    при сбое посреди записи старый файл остаётся целым.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+# ===================== БАЗОВЫЙ ИНТЕРФЕЙС =====================
+
+class BirthdayStorage:
+    """
+    Интерфейс хранилища записей {'name': ..., 'birthday': 'ДД.ММ'}.
+    Методы изменения бросают исключения при ошибках ввода-вывода,
+    обработка ошибок - на стороне вызывающего кода.
+    """
+
+    def load_all(self) -> list:
+        """Возвращает все записи."""
+        raise NotImplementedError
+
+    def load_table(self):
+        """Возвращает все записи в виде utils.BirthdayTable."""
+        from utils import BirthdayTable
+        return BirthdayTable.from_records(self.load_all())
+
+    def fingerprint(self):
+        """
+        Отпечаток текущего состояния данных: меняется при любом изменении.
+        None - состояние неизвестно, данные нужно перечитать.
+        """
+        return None
+
+    def save_all(self, birthdays: list) -> bool:
+        """Полностью заменяет данные."""
+        raise NotImplementedError
+
+    def contains(self, name: str, birthday: str) -> bool:
+        """Проверяет, есть ли запись с таким именем и датой."""
+        name_norm = normalize_name(name)
+        return any(normalize_name(b['name']) == name_norm and b['birthday'] == birthday
+                   for b in self.load_all())
+
+    def add(self, name: str, birthday: str) -> None:
+        """Добавляет одну запись."""
+        raise NotImplementedError
+
+    def remove_by_name(self, name: str) -> int:
+        """Удаляет все записи с таким именем. Возвращает число удалённых."""
+        raise NotImplementedError
+
+    def find(self, query: str) -> list:
+        """Поиск записей по части имени."""
+        query_norm = normalize_name(query)
+        return [b for b in self.load_all() if query_norm in normalize_name(b['name'])]
+
+    def apply_diff(self, diff: dict) -> None:
+        """
+        Применяет разницу из utils.diff_birthdays.
+        Базовая версия переписывает данные целиком; бэкенды переопределяют
+        её, чтобы менять только затронутые записи.
+        """
+        birthdays = apply_diff_to_list(self.load_all(), diff)
+        if not self.save_all(birthdays):
+            raise OSError("Не удалось сохранить данные")
+
+def apply_diff_to_list(birthdays: list, diff: dict) -> list:
+    """Возвращает новый список с применённой разницей (сравнение по значению)."""
+    positions = {}
+    for i, bd in enumerate(birthdays):
+        positions.setdefault((bd['name'], bd['birthday']), []).append(i)
+
+    result = list(birthdays)
+    for old, new in diff['changed']:
+        # Изменяется первое вхождение, как в diff_birthdays
+        result[positions[(old['name'], old['birthday'])].pop(0)] = new
+    dropped = set()
+    for bd in diff['removed']:
+        dropped.add(positions[(bd['name'], bd['birthday'])].pop())
+
+    if dropped:
+        result = [bd for i, bd in enumerate(result) if i not in dropped]
+    result.extend(diff['added'])
+    return result
+
+# ===================== JSON =====================
+
+class JsonStorage(BirthdayStorage):
+    """Хранилище в JSON-файле (весь список читается и пишется целиком)."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        # Чтение-изменение-запись в add/remove_by_name не должны пересекаться
+        self._lock = threading.RLock()
+
+    def fingerprint(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return 'missing'
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load_all(self) -> list:
+        try:
+            if not self.path.exists():
+                return []
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки данных: {e}")
+            return []
+
+    def save_all(self, birthdays: list) -> bool:
+        try:
+            with self._lock:
+                atomic_write_json(self.path, birthdays, indent=2)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка сохранения данных: {e}")
+            return False
+
+    def add(self, name: str, birthday: str) -> None:
+        with self._lock:
+            birthdays = self.load_all()
+            birthdays.append({'name': name.strip(), 'birthday': birthday})
+            if not self.save_all(birthdays):
+                raise OSError(f"Не удалось сохранить {self.path}")
+
+    def remove_by_name(self, name: str) -> int:
+        name_norm = normalize_name(name)
+        with self._lock:
+            birthdays = self.load_all()
+            kept = [b for b in birthdays if normalize_name(b['name']) != name_norm]
+            removed = len(birthdays) - len(kept)
+            if removed and not self.save_all(kept):
+                raise OSError(f"Не удалось сохранить {self.path}")
+            return removed
+
+    def apply_diff(self, diff: dict) -> None:
+        with self._lock:
+            super().apply_diff(diff)
+
+# ===================== ЖУРНАЛ =====================
+
+class JournalStorage(BirthdayStorage):
+    """
+    Снимок всех записей плюс журнал изменений (по строке JSON на изменение).
+    Добавление, удаление и импорт дописывают одну строку в журнал;
+    когда журнал вырастает до compact_every записей, он сворачивается
+    в новый снимок. Снимок пишется атомарно, при запуске журнал
+    проигрывается поверх снимка. Каждая запись журнала несёт номер,
+    а снимок - номер последней учтённой записи, поэтому сбой между
+    записью снимка и очисткой журнала не применяет изменения дважды.
+    """
+
+    COMPACT_EVERY = 1000
+
+    def __init__(self, path: str, compact_every: int = COMPACT_EVERY):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + '.journal')
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._birthdays = []
+        self._seq = 0
+        self._journal_entries = 0
+        self._loaded_fingerprint = None
+
+    def fingerprint(self):
+        try:
+            snapshot = self.path.stat()
+            snapshot_state = snapshot.st_mtime_ns, snapshot.st_size
+        except FileNotFoundError:
+            snapshot_state = 'missing'
+        except OSError:
+            return None
+        try:
+            journal_size = self.journal_path.stat().st_size
+        except FileNotFoundError:
+            journal_size = 0
+        except OSError:
+            return None
+        return snapshot_state, journal_size
+
+    # ----- восстановление -----
+
+    @staticmethod
+    def _apply(birthdays: list, entry: dict) -> list:
+        """Применяет одну запись журнала к списку."""
+        op = entry['op']
+        if op == 'add':
+            birthdays.append({'name': entry['name'], 'birthday': entry['birthday']})
+        elif op == 'remove':
+            name_norm = normalize_name(entry['name'])
+            birthdays = [b for b in birthdays if normalize_name(b['name']) != name_norm]
+        elif op == 'diff':
+            diff = {
+                'added': entry['added'],
+                'removed': entry['removed'],
+                'changed': [tuple(pair) for pair in entry['changed']],
+            }
+            birthdays = apply_diff_to_list(birthdays, diff)
+        else:
+            raise ValueError(f"Неизвестная операция в журнале: {op}")
+        return birthdays
+
+    def _recover(self) -> None:
+        """Читает снимок и проигрывает журнал поверх него."""
+        fingerprint = self.fingerprint()
+        birthdays, seq = [], 0
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            birthdays, seq = snapshot['birthdays'], snapshot['seq']
+
+        entries = 0
+        if self.journal_path.exists():
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+            lines = data.split(b'\n')
+            offset = 0
+            for number, line in enumerate(lines):
+                if line.strip():
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        if number != len(lines) - 1:
+                            raise
+                        # Недописанная последняя строка: сбой во время записи.
+                        # Обрезаем её, чтобы следующая запись начиналась с новой строки
+                        logger.warning(f"⚠️ Пропущена недописанная запись журнала {self.journal_path}")
+                        with open(self.journal_path, 'r+b') as f:
+                            f.truncate(offset)
+                        fingerprint = self.fingerprint()
+                        break
+                    if entry['seq'] > seq:
+                        birthdays = self._apply(birthdays, entry)
+                        seq = entry['seq']
+                        entries += 1
+                offset += len(line) + 1
+
+        self._birthdays, self._seq, self._journal_entries = birthdays, seq, entries
+        self._loaded_fingerprint = fingerprint
+
+    def _ensure_current(self) -> None:
+        fingerprint = self.fingerprint()
+        if fingerprint is None or fingerprint != self._loaded_fingerprint:
+            self._recover()
+
+    # ----- запись -----
+
+    def _append(self, entry: dict) -> None:
+        """Дописывает запись в журнал (с fsync) и применяет её в памяти."""
+        self._ensure_current()
+        entry = dict(entry, seq=self._seq + 1)
+        birthdays = self._apply(list(self._birthdays), entry)
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with open(self.journal_path, 'ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._birthdays, self._seq = birthdays, entry['seq']
+        self._journal_entries += 1
+        self._loaded_fingerprint = self.fingerprint()
+        if self._journal_entries >= self.compact_every:
+            try:
+                self.compact()
+            except Exception as e:
+                # Изменение уже в журнале, свернуть можно и в следующий раз
+                logger.error(f"Ошибка сворачивания журнала: {e}")
+
+    def compact(self) -> None:
+        """Сворачивает журнал в новый снимок."""
+        with self._lock:
+            self._ensure_current()
+            atomic_write_json(self.path, {'seq': self._seq, 'birthdays': self._birthdays})
+            # Снимок уже учитывает все записи журнала - его можно очистить
+            with open(self.journal_path, 'wb') as f:
+                os.fsync(f.fileno())
+            self._journal_entries = 0
+            self._loaded_fingerprint = self.fingerprint()
+            logger.info(f"🗜 Журнал свёрнут в снимок: {len(self._birthdays)} записей")
+
+    # ----- интерфейс хранилища -----
+
+    def load_all(self) -> list:
+        try:
+            with self._lock:
+                self._ensure_current()
+                return list(self._birthdays)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки данных: {e}")
+            return []
+
+    def save_all(self, birthdays: list) -> bool:
+        try:
+            with self._lock:
+                self._ensure_current()
+                self._birthdays = [{'name': b['name'], 'birthday': b['birthday']} for b in birthdays]
+                self._seq += 1
+                self.compact()
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка сохранения данных: {e}")
+            self._loaded_fingerprint = None
+            return False
+
+    def add(self, name: str, birthday: str) -> None:
+        with self._lock:
+            self._append({'op': 'add', 'name': name.strip(), 'birthday': birthday})
+
+    def remove_by_name(self, name: str) -> int:
+        name_norm = normalize_name(name)
+        with self._lock:
+            self._ensure_current()
+            removed = sum(1 for b in self._birthdays if normalize_name(b['name']) == name_norm)
+            if removed:
+                self._append({'op': 'remove', 'name': name})
+            return removed
+
+    def apply_diff(self, diff: dict) -> None:
+        with self._lock:
+            self._append({
+                'op': 'diff',
+                'added': diff['added'],
+                'removed': diff['removed'],
+                'changed': [list(pair) for pair in diff['changed']],
+            })
+
+# ===================== ДВОИЧНЫЙ СНИМОК =====================
+
+class SnapshotStorage(BirthdayStorage):
+    """
+    Хранилище в двоичном снимке snapshot.py: в несколько раз меньше
+    JSON и открывается без разбора. Пишется целиком и атомарно.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+
+    def fingerprint(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return 'missing'
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def load_all(self) -> list:
+        from snapshot import open_snapshot
+        try:
+            if not self.path.exists():
+                return []
+            with open_snapshot(self.path) as snapshot:
+                return snapshot.to_list()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки данных: {e}")
+            return []
+
+    def load_table(self):
+        # Таблица строится прямо из столбцов снимка, без списка словарей
+        # (но за O(n): см. BirthdayTable.from_snapshot)
+        from snapshot import open_snapshot
+        from utils import BirthdayTable
+        try:
+            if not self.path.exists():
+                return BirthdayTable.from_records([])
+            with open_snapshot(self.path) as snapshot:
+                return BirthdayTable.from_snapshot(snapshot)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки данных: {e}")
+            return BirthdayTable.from_records([])
+
+    def save_all(self, birthdays: list) -> bool:
+        from snapshot import write_snapshot
+        try:
+            with self._lock:
+                write_snapshot(self.path, birthdays)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка сохранения данных: {e}")
+            return False
+
+    def add(self, name: str, birthday: str) -> None:
+        with self._lock:
+            birthdays = self.load_all()
+            birthdays.append({'name': name.strip(), 'birthday': birthday})
+            if not self.save_all(birthdays):
+                raise OSError(f"Не удалось сохранить {self.path}")
+
+    def remove_by_name(self, name: str) -> int:
+        name_norm = normalize_name(name)
+        with self._lock:
+            birthdays = self.load_all()
+            kept = [b for b in birthdays if normalize_name(b['name']) != name_norm]
+            removed = len(birthdays) - len(kept)
+            if removed and not self.save_all(kept):
+                raise OSError(f"Не удалось сохранить {self.path}")
+            return removed
+
+    def apply_diff(self, diff: dict) -> None:
+        with self._lock:
+            super().apply_diff(diff)
+
+# ===================== SQLITE =====================
+
+class SqliteStorage(BirthdayStorage):
+    """
+    Хранилище в SQLite. Нормализованное имя и (месяц, день) лежат
+    в индексированных колонках, поэтому изменение или поиск одной записи
+    не требуют перечитывать и перезаписывать весь набор данных.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS birthdays (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            name_norm TEXT NOT NULL,
+            birthday TEXT NOT NULL,
+            month INTEGER NOT NULL,
+            day INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_birthdays_name_norm ON birthdays(name_norm);
+        CREATE INDEX IF NOT EXISTS idx_birthdays_month_day ON birthdays(month, day);
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Соединение используется и из потоков планировщика
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        # Счётчик изменений через это соединение: data_version их не видит
+        self._writes = 0
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+    def fingerprint(self):
+        try:
+            with self._lock:
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                return data_version, self._writes
+        except sqlite3.Error:
+            return None
+
+    @staticmethod
+    def _row(name: str, birthday: str) -> tuple:
+        name = name.strip()
+        month, day = split_birthday(birthday)
+        return name, normalize_name(name), birthday, month, day
+
+    def load_all(self) -> list:
+        try:
+            with self._lock:
+                rows = self._conn.execute("SELECT name, birthday FROM birthdays ORDER BY id").fetchall()
+            return [{'name': name, 'birthday': birthday} for name, birthday in rows]
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка загрузки данных: {e}")
+            return []
+
+    def save_all(self, birthdays: list) -> bool:
+        try:
+            rows = [self._row(b['name'], b['birthday']) for b in birthdays]
+            with self._lock, self._conn:
+                self._writes += 1
+                self._conn.execute("DELETE FROM birthdays")
+                self._conn.executemany(
+                    "INSERT INTO birthdays (name, name_norm, birthday, month, day) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+            return True
+        except Exception as e:
+            # Как и в JsonStorage: некорректная запись - False, а не исключение;
+            # строки собираются до транзакции, поэтому таблица не меняется
+            logger.error(f"Ошибка сохранения данных: {e}")
+            return False
+
+    def contains(self, name: str, birthday: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM birthdays WHERE name_norm = ? AND birthday = ? LIMIT 1",
+                (normalize_name(name), birthday)
+            ).fetchone()
+        return row is not None
+
+    def add(self, name: str, birthday: str) -> None:
+        with self._lock, self._conn:
+            self._writes += 1
+            self._conn.execute(
+                "INSERT INTO birthdays (name, name_norm, birthday, month, day) VALUES (?, ?, ?, ?, ?)",
+                self._row(name, birthday)
+            )
+
+    def remove_by_name(self, name: str) -> int:
+        with self._lock, self._conn:
+            self._writes += 1
+            cursor = self._conn.execute("DELETE FROM birthdays WHERE name_norm = ?", (normalize_name(name),))
+        return cursor.rowcount
+
+    @staticmethod
+    def _key(bd: dict) -> tuple:
+        # Строка ищется по индексу name_norm, точное имя различает
+        # записи, отличающиеся только регистром или ё
+        return normalize_name(bd['name']), bd['birthday'], bd['name']
+
+    def apply_diff(self, diff: dict) -> None:
+        # Одна транзакция, меняются только затронутые строки
+        with self._lock, self._conn:
+            self._writes += 1
+            for old, new in diff['changed']:
+                self._conn.execute(
+                    "UPDATE birthdays SET name = ?, name_norm = ?, birthday = ?, month = ?, day = ? "
+                    "WHERE id = (SELECT id FROM birthdays WHERE name_norm = ? AND birthday = ? AND name = ? "
+                    "ORDER BY id LIMIT 1)",
+                    self._row(new['name'], new['birthday']) + self._key(old)
+                )
+            for bd in diff['removed']:
+                self._conn.execute(
+                    "DELETE FROM birthdays WHERE id = "
+                    "(SELECT id FROM birthdays WHERE name_norm = ? AND birthday = ? AND name = ? "
+                    "ORDER BY id DESC LIMIT 1)",
+                    self._key(bd)
+                )
+            self._conn.executemany(
+                "INSERT INTO birthdays (name, name_norm, birthday, month, day) VALUES (?, ?, ?, ?, ?)",
+                [self._row(bd['name'], bd['birthday']) for bd in diff['added']]
+            )
+
+    def find(self, query: str) -> list:
+        pattern = normalize_name(query).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, birthday FROM birthdays WHERE name_norm LIKE ? ESCAPE '\\' ORDER BY month, day",
+                (f"%{pattern}%",)
+            ).fetchall()
+        return [{'name': name, 'birthday': birthday} for name, birthday in rows]
+
+    def find_by_date(self, month: int, day: int) -> list:
+        """Возвращает записи на указанный день (по индексу month/day)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, birthday FROM birthdays WHERE month = ? AND day = ? ORDER BY id",
+                (month, day)
+            ).fetchall()
+        return [{'name': name, 'birthday': birthday} for name, birthday in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+# ===================== ВЫБОР БЭКЕНДА =====================
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+def open_storage(url: str) -> BirthdayStorage:
+    """Создаёт хранилище по STORAGE_URL."""
+    if url.startswith('sqlite:///'):
+        return SqliteStorage(url[len('sqlite:///'):])
+    if url.startswith('json://'):
+        return JsonStorage(url[len('json://'):])
+    if url.startswith('snapshot://'):
+        return SnapshotStorage(url[len('snapshot://'):])
+    if url.startswith('journal://'):
+        return JournalStorage(url[len('journal://'):])
+    if url.endswith(SQLITE_SUFFIXES):
+        return SqliteStorage(url)
+    return JsonStorage(url)
+
+def get_storage(url: str) -> BirthdayStorage:
+    """Возвращает общий экземпляр хранилища для STORAGE_URL."""
+    with _storages_lock:
+        storage = _storages.get(url)
+        if storage is None:
+            storage = _storages[url] = open_storage(url)
+        return storage
+
+def copy_storage(source_url: str, target_url: str) -> int:
+    """Копирует все записи из одного хранилища в другое. Возвращает их число."""
+    birthdays = get_storage(source_url).load_all()
+    if not get_storage(target_url).save_all(birthdays):
+        raise OSError(f"Не удалось сохранить данные в {target_url}")
+    return len(birthdays)
+
+if __name__ == '__main__':
+    # Миграция: python storage.py data/birthdays.json sqlite:///data/birthdays.db
+    if len(sys.argv) != 3:
+        print("Использование: python storage.py <откуда> <куда>")
+        sys.exit(1)
+    count = copy_storage(sys.argv[1], sys.argv[2])
+    print(f"✅ Скопировано {count} записей: {sys.argv[1]} -> {sys.argv[2]}")
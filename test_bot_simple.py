@@ -13,7 +13,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config import BOT_TOKEN, AUTHORIZED_USER_IDS
+from config import BOT_TOKEN, AUTHORIZED_USER_IDS, BOT_API_BASE_URL, BOT_API_BASE_FILE_URL
 
 async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Простая тестовая команда."""
@@ -40,7 +40,12 @@ def main():
     print(f"👤 Авторизованные пользователи: {AUTHORIZED_USER_IDS}")
     
     # Создаем приложение
-    app = Application.builder().token(BOT_TOKEN).build()
+    builder = Application.builder().token(BOT_TOKEN)
+    if BOT_API_BASE_URL:
+        builder.base_url(BOT_API_BASE_URL)
+    if BOT_API_BASE_FILE_URL:
+        builder.base_file_url(BOT_API_BASE_FILE_URL)
+    app = builder.build()
     
     # Регистрируем команды
     app.add_handler(CommandHandler("start", start))
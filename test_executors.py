@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Тест выполнения блокирующей работы вне event loop."""
+
+import sys
+import os
+import asyncio
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from executors import run_io, run_cpu, timed, handler_latency, loop_lag, probe_loop_lag, format_metrics
+from importer import import_birthdays_xlsx, ImportFormatError
+from test_importer import make_xlsx
+
+def test_loop_stays_responsive_during_blocking_io():
+    release = threading.Event()
+
+    @timed
+    async def slow_handler():
+        await run_io(release.wait, 10)
+
+    @timed
+    async def fast_handler():
+        return 'ok'
+
+    def probes():
+        return loop_lag.summary().get('loop', {}).get('count', 0)
+
+    async def scenario():
+        probe = asyncio.create_task(probe_loop_lag(0.01))
+        slow = asyncio.create_task(slow_handler())
+        await asyncio.sleep(0)
+        # Пока медленная запись занимает поток, быстрый обработчик отвечает
+        assert await fast_handler() == 'ok'
+        assert not slow.done()
+        # ... и event loop продолжает просыпаться
+        before = probes()
+        for _ in range(500):
+            if probes() >= before + 2:
+                break
+            await asyncio.sleep(0.01)
+        assert probes() >= before + 2
+        assert not slow.done()
+        release.set()
+        await slow
+        probe.cancel()
+
+    asyncio.run(scenario())
+    stats = handler_latency.summary()
+    assert stats['slow_handler']['count'] >= 1
+    assert stats['fast_handler']['count'] >= 1
+    assert 'fast_handler' in format_metrics()
+
+def test_import_in_process_pool():
+    data = make_xlsx([['Имя', 'День рождения'], ['Анна', '15.03'], ['Иван', 'abc']])
+
+    async def scenario():
+        result = await run_cpu(import_birthdays_xlsx, data)
+        assert result['birthdays'] == [{'name': 'Анна', 'birthday': '15.03'}]
+        assert result['errors'] == ['Иван']
+        try:
+            await run_cpu(import_birthdays_xlsx, make_xlsx([['Фамилия', 'Город']]))
+        except ImportFormatError as e:
+            assert e.columns == ['Фамилия', 'Город']
+        else:
+            assert False, "ожидалась ImportFormatError"
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
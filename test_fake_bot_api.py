@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Тест локальной замены Bot API: бот, рассылка и обработчики без Telegram."""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from telegram import Bot
+from telegram.error import Forbidden, RetryAfter
+from telegram.ext import Application, CommandHandler
+
+from config import AUTHORIZED_USER_IDS
+from fake_bot_api import FakeBotAPI
+from fanout import FanOut
+from loadtest_webhook import make_update
+
+TOKEN = '123456:TEST'
+
+def test_bot_methods_and_errors():
+    async def scenario(api):
+        async with Bot(TOKEN, base_url=api.base_url, base_file_url=api.base_file_url) as bot:
+            assert (await bot.get_me()).username == 'fake_birthday_bot'
+            message = await bot.send_message(chat_id=1, text='привет')
+            assert message.text == 'привет' and message.chat.id == 1
+
+            with pytest.raises(Forbidden):
+                await bot.send_message(chat_id=2, text='привет')
+            api.flood_chat(1)
+            with pytest.raises(RetryAfter):
+                await bot.send_message(chat_id=1, text='привет')
+
+            api.add_file('doc1', b'xlsx-bytes')
+            file = await bot.get_file('doc1')
+            assert bytes(await file.download_as_bytearray()) == b'xlsx-bytes'
+
+            api.push_update(make_update(0, 1, '/start'))
+            updates = await bot.get_updates(timeout=1)
+            assert [u.message.text for u in updates] == ['/start']
+            assert await bot.get_updates(offset=updates[-1].update_id + 1, timeout=0) == ()
+
+    with FakeBotAPI(forbidden_chats={2}) as api:
+        asyncio.run(scenario(api))
+        assert api.stats()[('sendMessage', 200)] == 1
+        assert api.stats()[('sendMessage', 403)] == 1
+        assert api.stats()[('sendMessage', 429)] == 1
+        assert api.sent_messages() == [{'chat_id': '1', 'text': 'привет'}]
+
+def test_fanout_against_fake_api():
+    async def scenario(api):
+        async with Bot(TOKEN, base_url=api.base_url) as bot:
+            fanout = FanOut(bot, concurrency=10, global_rate=1000, per_chat_rate=1000, max_retries=2)
+            return await fanout.broadcast(range(1, 51), 'С днём рождения!')
+
+    with FakeBotAPI(latency=(0.001, 0.01), retry_after=0, flood_every=10, forbidden_chats={7}, seed=1) as api:
+        result = asyncio.run(scenario(api))
+        assert sorted(result['sent']) == [i for i in range(1, 51) if i != 7]
+        assert isinstance(result['failed'][7], Forbidden)
+        # Каждый десятый запрос получил 429 и был повторён
+        assert api.stats()[('sendMessage', 429)] > 0
+        assert len(api.sent_messages()) == 49
+
+def test_handler_replies_via_polling():
+    from handlers import start_command
+
+    async def scenario(api):
+        application = (
+            Application.builder().token(TOKEN)
+            .base_url(api.base_url).base_file_url(api.base_file_url).build()
+        )
+        application.add_handler(CommandHandler('start', start_command))
+        async with application:
+            await application.start()
+            await application.updater.start_polling(poll_interval=0, timeout=1)
+            api.push_update(make_update(0, AUTHORIZED_USER_IDS[0], '/start'))
+            for _ in range(100):
+                if api.sent_messages():
+                    break
+                await asyncio.sleep(0.05)
+            await application.updater.stop()
+            await application.stop()
+
+    with FakeBotAPI() as api:
+        asyncio.run(scenario(api))
+        replies = api.sent_messages()
+        assert len(replies) == 1
+        assert replies[0]['chat_id'] == str(AUTHORIZED_USER_IDS[0])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Тест параллельной рассылки уведомлений."""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from telegram.error import Forbidden, RetryAfter, TimedOut
+
+from fanout import FanOut, TokenBucket
+
+class FakeBot:
+    """Бот-заглушка: запоминает отправки и имитирует ошибки Telegram."""
+
+    def __init__(self, delay=0.0, errors=None):
+        self.delay = delay
+        self.errors = errors or {}
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            queue = self.errors.get(chat_id)
+            if queue:
+                raise queue.pop(0)
+            self.sent.append(chat_id)
+        finally:
+            self.in_flight -= 1
+
+def test_broadcast_concurrency():
+    bot = FakeBot(delay=0.05)
+    fanout = FanOut(bot, concurrency=10, global_rate=1000, per_chat_rate=1000)
+    result = asyncio.run(fanout.broadcast(range(100), "текст"))
+    assert sorted(result['sent']) == list(range(100))
+    assert not result['failed']
+    # Отправки идут параллельно, но не больше concurrency одновременно
+    assert bot.max_in_flight == 10
+
+def test_retry_after_and_forbidden():
+    bot = FakeBot(errors={
+        1: [RetryAfter(0), TimedOut()],
+        2: [Forbidden("bot was blocked by the user")],
+        3: [TimedOut()] * 5,
+    })
+    fanout = FanOut(bot, global_rate=1000, per_chat_rate=1000, max_retries=3, backoff=0)
+    result = asyncio.run(fanout.broadcast([1, 2, 3, 4], "текст"))
+    assert sorted(result['sent']) == [1, 4]
+    assert set(result['failed']) == {2, 3}
+    assert isinstance(result['failed'][2], Forbidden)
+
+class FakeClock:
+    """Часы, которые двигает только sleep: время ожидания считается точно."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def test_token_bucket_rate():
+    clock = FakeClock()
+    # 1/64 с точно представима в float, поэтому часы не копят ошибку округления
+    bucket = TokenBucket(rate=64, capacity=1, clock=clock.time, sleep=clock.sleep)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(take(11))
+    # Первый токен сразу, остальные 10 - каждый после ожидания 1/64 с
+    assert clock.sleeps == [1 / 64] * 10
+    assert clock.now == 10 / 64
+
+    # За паузу накапливается не больше capacity токенов
+    clock.now += 10
+    clock.sleeps.clear()
+    asyncio.run(take(2))
+    assert clock.sleeps == [1 / 64]
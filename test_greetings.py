@@ -5,7 +5,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from greetings_generator import generate_greeting, generate_collective_greeting
+from greetings_generator import generate_greeting, generate_collective_greeting, generate_many
 
 def test_generator():
     print("=" * 60)
@@ -39,5 +39,114 @@ def test_generator():
     print("✅ ТЕСТ ЗАВЕРШЕН")
     print("=" * 60)
 
+def test_generate_many():
+    names = ["Петрова Анна", "Иванов Иван", "Петрова Анна", "Саша"]
+    greetings = generate_many(names, min_sentences=3, max_sentences=4)
+    assert len(greetings) == len(names)
+    assert greetings[0].startswith(("Дорогая Анна", "Уважаемая Анна", "Любимая Анна",
+                                    "Милая Анна", "Прекрасная Анна", "Наша дорогая Анна"))
+    assert "Иван" in greetings[1]
+    assert "Саша" in greetings[3]
+    for greeting in greetings:
+        assert "{name}" not in greeting
+
+def test_name_cache():
+    from greetings_generator import analyze_name, name_cache_info, GenderDetector, NameCache
+    assert analyze_name("Петрова  Анна") == ("Анна", "female")
+    before = name_cache_info()['hits']
+    assert analyze_name(" Петрова Анна ") == ("Анна", "female")
+    assert name_cache_info()['hits'] == before + 1
+    assert GenderDetector.detect_gender("Иванов Иван") == "male"
+
+    cache = NameCache(maxsize=2)
+    cache.put("a", (1,))
+    cache.put("b", (2,))
+    cache.get("a")
+    cache.put("c", (3,))
+    assert cache.get("b") is None
+    assert cache.info()['size'] == 2
+
+def test_suffix_classifier_matches_legacy():
+    from bench_gender import legacy_classify, make_names
+    from greetings_generator import GenderDetector, detect_genders
+    names = make_names(5000) + ["", "А", "Я", "Ь", "Ия", "Любовь", "Саша"]
+    assert GenderDetector.classify_first_names(names) == [legacy_classify(n) for n in names]
+    assert detect_genders(["Петрова Анна", "Иванов Иван"]) == ["female", "male"]
+
+def test_greeting_history(tmp_path):
+    from greetings_generator import ImprovedGreetingGenerator, GreetingHistory
+    path = str(tmp_path / "history.json")
+    generator = ImprovedGreetingGenerator(GreetingHistory(path, size=30))
+    greetings = [generator.generate_greeting("Петрова Анна") for _ in range(30)]
+    assert len(set(greetings)) == 30
+    # Буфер кольцевой: хранится не больше size комбинаций на именинника
+    for _ in range(10):
+        generator.generate_greeting("Петрова  Анна")
+    assert len(generator.history._recent["петрова анна"]) == 30
+
+    assert generator.history.save()
+    restored = GreetingHistory(path, size=30)
+    assert list(restored._recent["петрова анна"]) == list(generator.history._recent["петрова анна"])
+    assert [p.name for p in tmp_path.iterdir()] == ["history.json"]
+
+    # Пробные поздравления (/greet, /test) историю не расходуют
+    before = list(generator.history._recent["петрова анна"])
+    generator.generate_greeting("Петрова Анна", remember=False)
+    generator.generate_many(["Петрова Анна", "Иванов Иван"], remember=False)
+    assert list(generator.history._recent["петрова анна"]) == before
+    assert "иванов иван" not in generator.history._recent
+
+    history = GreetingHistory(size=2, max_recipients=2)
+    for recipient in ("a", "b", "c"):
+        history.remember(recipient, 1)
+    assert not history.contains("a", 1)
+    assert history.contains("c", 1)
+
+def test_prerendered_greetings(tmp_path):
+    from datetime import datetime, timedelta
+    from prerender import GreetingCache, prerender_greetings
+    from utils import BirthdayIndex
+    now = datetime(2025, 3, 14, 0, 5)
+    index = BirthdayIndex([
+        {'name': 'Петрова Анна', 'birthday': '14.03'},
+        {'name': 'Иванов Иван', 'birthday': '15.03'},
+        {'name': 'Сидоров Пётр', 'birthday': '20.03'},
+    ])
+    path = str(tmp_path / "cache.json")
+    cache = GreetingCache(path)
+    cache.get_many(now - timedelta(days=2), ['Старый'])
+    cache.get_many(now - timedelta(days=1), ['Вчерашний'])
+    assert prerender_greetings(cache, index, now) == 2
+    assert cache.get(now - timedelta(days=2), 'Старый') is None
+    # Вчерашние остаются для часовых поясов западнее сервера
+    assert cache.get(now - timedelta(days=1), 'Вчерашний') is not None
+    greeting = cache.get(now + timedelta(days=1), 'Иванов Иван')
+    assert "Иван" in greeting
+
+    # После перезапуска берутся те же тексты
+    restored = GreetingCache(path)
+    assert restored.get_many(now + timedelta(days=1), ['Иванов Иван']) == [greeting]
+    assert cache.get(now, 'Сидоров Пётр') is None
+
+def test_prerender_in_bucket_timezones(tmp_path):
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+    from prerender import GreetingCache, prerender_greetings
+    from utils import BirthdayIndex
+    # 00:05 в Москве - в Нью-Йорке ещё 13 марта
+    now = datetime(2025, 3, 14, 0, 5, tzinfo=ZoneInfo('Europe/Moscow'))
+    index = BirthdayIndex([
+        {'name': 'Западный Иван', 'birthday': '13.03'},
+        {'name': 'Восточный Пётр', 'birthday': '16.03'},
+        {'name': 'Далёкий Олег', 'birthday': '18.03'},
+    ])
+    cache = GreetingCache(str(tmp_path / "cache.json"))
+    assert prerender_greetings(cache, index, now, timezones=['America/New_York', 'Europe/Moscow']) == 2
+    assert cache.get(datetime(2025, 3, 13), 'Западный Иван') is not None
+    assert cache.get(datetime(2025, 3, 16), 'Восточный Пётр') is not None
+
 if __name__ == "__main__":
     test_generator()
+    test_generate_many()
+    test_name_cache()
+    test_suffix_classifier_matches_legacy()
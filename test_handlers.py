@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Тест обработчиков: подтверждение /remove кнопками и /settings на резервной копии."""
+
+import sys
+import os
+import re
+import asyncio
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import handlers
+from birthday_store import BirthdayStore
+from config import AUTHORIZED_USER_IDS
+
+USER = SimpleNamespace(id=AUTHORIZED_USER_IDS[0])
+
+class FakeMessage:
+    """Сообщение-заглушка: запоминает ответы бота."""
+
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, reply_markup=None, **kwargs):
+        self.replies.append((text, reply_markup))
+
+class FakeQuery:
+    """Нажатие кнопки: запоминает новый текст сообщения."""
+
+    def __init__(self, data):
+        self.data = data
+        self.from_user = USER
+        self.edited = None
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+    async def edit_message_text(self, text, **kwargs):
+        self.edited = text
+
+def _remove(user_data, name):
+    """/remove name: возвращает callback_data кнопок."""
+    message = FakeMessage()
+    update = SimpleNamespace(effective_user=USER, message=message)
+    context = SimpleNamespace(args=name.split(), user_data=user_data)
+    asyncio.run(handlers.remove_command(update, context))
+    text, markup = message.replies[-1]
+    return [row[0].callback_data for row in markup.inline_keyboard]
+
+def _press(user_data, data):
+    query = FakeQuery(data)
+    update = SimpleNamespace(callback_query=query)
+    context = SimpleNamespace(user_data=user_data, matches=[re.match(handlers.REMOVE_CALLBACK_PATTERN, data)])
+    asyncio.run(handlers.remove_confirm_callback(update, context))
+    return query.edited
+
+def test_stale_remove_keyboard(tmp_path, monkeypatch):
+    store = BirthdayStore(str(tmp_path / 'birthdays.json'))
+    assert store.replace_all([
+        {'name': 'Петрова Анна', 'birthday': '15.03'},
+        {'name': 'Сидоров Иван', 'birthday': '01.02'},
+    ])
+    monkeypatch.setattr(handlers, 'get_store', lambda url: store)
+    user_data = {}
+
+    first = _remove(user_data, 'Петрва')
+    second = _remove(user_data, 'Сидорв')
+    assert first[0] != second[0]
+    # Кнопка первой клавиатуры после второго /remove никого не удаляет
+    assert _press(user_data, first[0]).startswith("⌛")
+    assert len(store.birthdays()) == 2
+
+    assert _press(user_data, second[0]).startswith("✅")
+    assert [bd['name'] for bd in store.birthdays()] == ['Петрова Анна']
+    # Клавиатура срабатывает один раз
+    assert _press(user_data, second[0]).startswith("⌛")
+
+    cancel = _remove(user_data, 'Петрва')[-1]
+    assert cancel.endswith(':cancel')
+    assert _press(user_data, cancel).startswith("↩️")
+    assert len(store.birthdays()) == 1
+
+def test_settings_on_standby_does_not_schedule(tmp_path, monkeypatch):
+    import scheduler
+    from preferences import DeliveryPreferences
+
+    prefs = DeliveryPreferences(str(tmp_path / 'preferences.json'), 'Europe/Moscow', '09:00')
+    rescheduled = []
+    monkeypatch.setattr(scheduler, 'get_delivery_preferences', lambda: prefs)
+    monkeypatch.setattr(scheduler, 'reschedule_notifications', rescheduled.append)
+
+    for is_leader in (False, True):
+        application = SimpleNamespace(bot_data={'leader': SimpleNamespace(is_leader=is_leader)})
+        message = FakeMessage()
+        update = SimpleNamespace(effective_user=USER, message=message)
+        context = SimpleNamespace(args=['time', '07:30'], application=application)
+        asyncio.run(handlers.settings_command(update, context))
+        assert message.replies[-1][0].startswith("✅")
+
+    # Задачи пересоздала только ведущая копия; резервная лишь сохранила файл
+    assert rescheduled == [application]
+    assert prefs.get(USER.id) == ('Europe/Moscow', '07:30')
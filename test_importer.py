@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Тест импорта дней рождения из Excel."""
+
+import sys
+import os
+import io
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import Workbook
+
+from importer import import_birthdays_xlsx, ImportFormatError
+
+def make_xlsx(rows) -> bytes:
+    workbook = Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def test_import_rows():
+    data = make_xlsx([
+        [' Имя ', 'Дата рождения'],
+        ['Иванов Иван', '03.01'],
+        ['Петрова Анна', datetime(1990, 3, 15)],
+        [None, '01.01'],
+        ['Сидоров Пётр', 'не дата'],
+        ['Кузнецова Мария', 45000],
+    ])
+    result = import_birthdays_xlsx(data)
+    assert result['columns'] == ['Имя', 'Дата рождения']
+    assert result['birthdays'] == [
+        {'name': 'Иванов Иван', 'birthday': '03.01'},
+        {'name': 'Петрова Анна', 'birthday': '15.03'},
+        {'name': 'Кузнецова Мария', 'birthday': '15.03'},
+    ]
+    assert result['errors'] == ['Сидоров Пётр']
+
+def test_missing_columns():
+    data = make_xlsx([['Фамилия', 'Город'], ['Иванов', 'Москва']])
+    try:
+        import_birthdays_xlsx(data)
+    except ImportFormatError as e:
+        assert e.columns == ['Фамилия', 'Город']
+    else:
+        assert False, "ожидалась ImportFormatError"
+
+if __name__ == "__main__":
+    test_import_rows()
+    test_missing_columns()
+    print("✅ ТЕСТ ИМПОРТА ЗАВЕРШЕН")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Тест выбора ведущего процесса двумя локальными процессами."""
+
+import sys
+import os
+import subprocess
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from leader import LeaderLock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Процесс-копия: ждёт роли ведущего, сообщает об этом и держит блокировку
+REPLICA = """
+import sys, time
+sys.path.insert(0, sys.argv[2])
+from leader import LeaderLock
+lock = LeaderLock(sys.argv[1])
+lock.wait(interval=0.05)
+print('leader', flush=True)
+time.sleep(60)
+"""
+
+def start_replica(path):
+    return subprocess.Popen(
+        [sys.executable, '-c', REPLICA, str(path), HERE],
+        stdout=subprocess.PIPE, text=True
+    )
+
+def test_only_one_leader_and_failover(tmp_path):
+    path = tmp_path / "leader.lock"
+    first = start_replica(path)
+    second = None
+    try:
+        assert first.stdout.readline().strip() == 'leader'
+        second = start_replica(path)
+        # Вторая копия ждёт, и эта блокировка тоже занята
+        assert not LeaderLock(path).try_acquire()
+        assert LeaderLock(path).holder() == first.pid
+
+        # Ведущий упал - резервная копия становится ведущей за секунды
+        first.kill()
+        first.wait()
+        started = time.monotonic()
+        assert second.stdout.readline().strip() == 'leader'
+        assert time.monotonic() - started < 5
+        assert LeaderLock(path).holder() == second.pid
+    finally:
+        for process in filter(None, (first, second)):
+            process.kill()
+            process.wait()
+            process.stdout.close()
+
+    lock = LeaderLock(path)
+    assert lock.wait(interval=0.05, timeout=5)
+    assert lock.is_leader
+    lock.release()
+    assert not lock.is_leader
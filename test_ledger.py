@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Тест журнала доставки уведомлений."""
+
+import sys
+import os
+import asyncio
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from telegram.error import Forbidden, NetworkError
+
+import ledger as ledger_module
+from ledger import DeliveryLedger, SENT, PENDING, FAILED, SENDING
+
+DAY = date(2025, 3, 14)
+
+def test_claim_skips_delivered(tmp_path):
+    path = str(tmp_path / "deliveries.db")
+    ledger = DeliveryLedger(path, max_attempts=2)
+    assert [chat_id for _, chat_id, _ in ledger.claim(DAY, [1, 2, 3], "текст")] == [1, 2, 3]
+    # Уже забранные строки второй раз не выдаются
+    assert ledger.claim(DAY, [1, 2, 3], "текст") == []
+
+    ledger.record(DAY, [1], {2: ("сеть", True), 3: ("заблокирован", False)})
+    assert ledger.status(DAY, 1) == SENT
+    assert ledger.status(DAY, 2) == PENDING
+    assert ledger.status(DAY, 3) == FAILED
+
+    # После перезапуска: доставленное пропускается, повтор - с прежним текстом
+    ledger.close()
+    ledger = DeliveryLedger(path, max_attempts=2)
+    assert ledger.claim(DAY, [1, 2, 3], "другой текст") == [(DAY.isoformat(), 2, "текст")]
+    ledger.record(DAY, [], {2: ("сеть", True)})
+    # Попытки кончились
+    assert ledger.status(DAY, 2) == FAILED
+    assert ledger.claim_retries(DAY) == []
+    assert ledger.summary(DAY) == {SENT: 1, FAILED: 2}
+
+def test_abandoned_sending_is_retried(tmp_path, monkeypatch):
+    ledger = DeliveryLedger(str(tmp_path / "deliveries.db"))
+    ledger.claim(DAY, [1], "текст")
+    assert ledger.claim_retries(DAY) == []
+    monkeypatch.setattr(ledger_module, 'SENDING_TIMEOUT', -1)
+    assert ledger.claim_retries(DAY) == [(DAY.isoformat(), 1, "текст")]
+    assert ledger.status(DAY, 1) == SENDING
+    assert ledger.prune(date(2025, 6, 1)) == 1
+
+class FakeBot:
+    def __init__(self, errors=None):
+        self.sent = []
+        self.errors = errors or {}
+
+    async def send_message(self, chat_id, text, **kwargs):
+        error = self.errors.get(chat_id)
+        if error:
+            raise error
+        self.sent.append((chat_id, text))
+
+def test_notifications_sent_once_and_retried(tmp_path, monkeypatch):
+    import scheduler as sched
+
+    ledger = DeliveryLedger(str(tmp_path / "deliveries.db"))
+    monkeypatch.setattr(sched, 'get_delivery_ledger', lambda: ledger)
+    monkeypatch.setattr(sched, 'build_notification_text', lambda now=None: "🎂 Сегодня день рождения")
+    monkeypatch.setattr(sched, 'save_greeting_history', lambda: None)
+    monkeypatch.setattr(sched, 'get_greeting_cache', lambda path: type('Cache', (), {'save': lambda self: True})())
+    monkeypatch.setattr(sched, 'SEND_MAX_RETRIES', 0)
+    now = datetime(2025, 3, 14, 9, 0)
+
+    bot = FakeBot({2: NetworkError("timeout"), 3: Forbidden("bot was blocked")})
+    result = asyncio.run(sched.send_birthday_notifications_async(bot, user_ids=[1, 2, 3], now=now))
+    assert result['sent'] == [1] and set(result['failed']) == {2, 3}
+
+    # Повтор по журналу доставляет только временно не доставленное
+    bot.errors = {}
+    monkeypatch.setattr(sched, 'notification_buckets', lambda: {('Europe/Moscow', '09:00'): [1, 2, 3]})
+    result = asyncio.run(sched.retry_deliveries_async(bot, now=datetime(2025, 3, 14, 9, 0, tzinfo=ZoneInfo('UTC'))))
+    assert result['sent'] == [2]
+    assert ledger.summary(DAY) == {SENT: 2, FAILED: 1}
+
+    # Повторный запуск (перезапуск бота в 09:00:30) ничего не отправляет
+    result = asyncio.run(sched.send_birthday_notifications_async(bot, user_ids=[1, 2, 3], now=now))
+    assert result == {'sent': [], 'failed': {}}
+    assert [chat_id for chat_id, _ in bot.sent] == [1, 2]
+
+def test_retry_window_follows_bucket_timezones(tmp_path, monkeypatch):
+    import scheduler as sched
+
+    ledger = DeliveryLedger(str(tmp_path / "deliveries.db"))
+    monkeypatch.setattr(sched, 'get_delivery_ledger', lambda: ledger)
+    monkeypatch.setattr(sched, 'NOTIFY_TIMEZONE', 'Europe/Moscow')
+    monkeypatch.setattr(sched, 'notification_buckets', lambda: {
+        ('America/New_York', '09:00'): [1], ('Pacific/Auckland', '09:00'): [2],
+    })
+    # 20:00 UTC 13 марта: в Нью-Йорке 13-е, в Окленде уже 14-е
+    now = datetime(2025, 3, 13, 20, 0, tzinfo=ZoneInfo('UTC'))
+    assert sched.local_days(now) == (date(2025, 3, 13), DAY)
+    for day, chat_id in ((date(2025, 3, 11), 1), (date(2025, 3, 12), 1), (DAY, 2), (date(2025, 3, 15), 2)):
+        ledger.claim(day, [chat_id], "🎂")
+        ledger.record(day, [], {chat_id: (NetworkError("timeout"), True)})
+
+    bot = FakeBot({})
+    result = asyncio.run(sched.retry_deliveries_async(bot, now=now))
+    # Вчера Нью-Йорка и сегодня Окленда - в окне; раньше и позже - нет
+    assert sorted(result['sent']) == [1, 2]
+    assert ledger.status(date(2025, 3, 12), 1) == SENT and ledger.status(DAY, 2) == SENT
+    assert ledger.status(date(2025, 3, 11), 1) == PENDING
+    assert ledger.status(date(2025, 3, 15), 2) == PENDING
+
+def test_notifications_do_not_block_event_loop(tmp_path, monkeypatch):
+    import threading
+    import scheduler as sched
+
+    threads = {}
+
+    class RecordingLedger(DeliveryLedger):
+        def claim(self, *args):
+            threads['claim'] = threading.get_ident()
+            return super().claim(*args)
+
+        def record(self, *args):
+            threads['record'] = threading.get_ident()
+            return super().record(*args)
+
+    loop_free = threading.Event()
+
+    def slow_text(now=None):
+        # Вызов прямо в event loop не дал бы сработать loop_free
+        threads['text'] = threading.get_ident()
+        assert loop_free.wait(5)
+        return "🎂 Сегодня день рождения"
+
+    monkeypatch.setattr(sched, 'get_delivery_ledger', lambda: RecordingLedger(str(tmp_path / "deliveries.db")))
+    monkeypatch.setattr(sched, 'build_notification_text', slow_text)
+    monkeypatch.setattr(sched, 'save_greeting_history', lambda: threads.setdefault('save', threading.get_ident()))
+    monkeypatch.setattr(sched, 'get_greeting_cache', lambda path: type('Cache', (), {'save': lambda self: True})())
+
+    async def scenario():
+        task = asyncio.ensure_future(sched.send_birthday_notifications_async(FakeBot({}), user_ids=[1], now=datetime(2025, 3, 14, 9, 0)))
+        await asyncio.sleep(0.05)
+        loop_free.set()
+        return await task, threading.get_ident()
+
+    result, loop_thread = asyncio.run(scenario())
+    assert result['sent'] == [1]
+    assert set(threads) == {'text', 'save', 'claim', 'record'}
+    assert loop_thread not in threads.values()
+
+def test_catch_up_window(tmp_path, monkeypatch):
+    import scheduler as sched
+
+    started = []
+
+    async def fake_bucket(timezone, send_time, bot=None, now=None):
+        started.append((timezone, send_time, now.hour, now.minute))
+
+    monkeypatch.setattr(sched, 'notification_buckets', lambda: {
+        ('Europe/Moscow', '09:00'): [1], ('Asia/Tokyo', '09:00'): [2], ('Europe/Moscow', '12:00'): [3],
+    })
+    monkeypatch.setattr(sched, 'send_bucket_notifications_async', fake_bucket)
+    monkeypatch.setattr(sched, 'DELIVERY_CATCHUP_HOURS', 3)
+    # 09:30 в Москве = 15:30 в Токио: пропущена только московская рассылка в 09:00
+    now = datetime(2025, 3, 14, 6, 30, tzinfo=ZoneInfo('UTC'))
+    assert asyncio.run(sched.catch_up_notifications_async(now=now)) == 1
+    assert started == [('Europe/Moscow', '09:00', 9, 30)]
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_claim_skips_delivered(Path(tmp))
+    print("✅ Тесты журнала доставки пройдены")
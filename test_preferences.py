@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Тест настроек доставки и групп рассылки."""
+
+import sys
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from preferences import DeliveryPreferences, parse_send_time
+
+def test_preferences_set_and_persist(tmp_path):
+    path = str(tmp_path / "preferences.json")
+    prefs = DeliveryPreferences(path, 'Europe/Moscow', '09:00')
+    assert prefs.get(1) == ('Europe/Moscow', '09:00')
+
+    assert prefs.set(1, timezone='Asia/Yekaterinburg') == ('Asia/Yekaterinburg', '09:00')
+    assert prefs.set(1, send_time='8.30') == ('Asia/Yekaterinburg', '08:30')
+    with pytest.raises(ValueError):
+        prefs.set(1, timezone='Mars/Olympus')
+    with pytest.raises(ValueError):
+        prefs.set(1, send_time='25:00')
+    assert prefs.get(1) == ('Asia/Yekaterinburg', '08:30')
+
+    restored = DeliveryPreferences(path, 'Europe/Moscow', '09:00')
+    assert restored.get(1) == ('Asia/Yekaterinburg', '08:30')
+    assert parse_send_time('7:05') == '07:05'
+
+def test_failed_save_keeps_old_preferences(tmp_path, monkeypatch):
+    import preferences
+    prefs = DeliveryPreferences(str(tmp_path / "preferences.json"), 'Europe/Moscow', '09:00')
+    prefs.set(1, send_time='08:00')
+
+    def broken_write(path, data, indent=None):
+        raise OSError("диск заполнен")
+
+    monkeypatch.setattr(preferences, 'atomic_write_json', broken_write)
+    with pytest.raises(OSError):
+        prefs.set(1, send_time='10:00')
+    with pytest.raises(OSError):
+        prefs.set(2, timezone='Asia/Tokyo')
+    # Ни файл, ни настройки в памяти не изменились
+    assert prefs.get(1) == ('Europe/Moscow', '08:00')
+    assert prefs.buckets([1, 2]) == {('Europe/Moscow', '08:00'): [1], ('Europe/Moscow', '09:00'): [2]}
+    assert [p.name for p in tmp_path.iterdir()] == ["preferences.json"]
+
+def test_reload_preferences_changed_by_other_replica(tmp_path):
+    path = str(tmp_path / "preferences.json")
+    leader = DeliveryPreferences(path, 'Europe/Moscow', '09:00')
+    standby = DeliveryPreferences(path, 'Europe/Moscow', '09:00')
+    version = leader.version
+
+    standby.set(1, timezone='Asia/Tokyo')
+    # Собственная запись не считается изменением
+    assert not standby.reload_if_changed()
+    assert leader.get(1) == ('Europe/Moscow', '09:00')
+    assert leader.reload_if_changed()
+    assert leader.get(1) == ('Asia/Tokyo', '09:00')
+    assert leader.version != version
+    assert not leader.reload_if_changed()
+
+def test_buckets_group_equal_preferences(tmp_path):
+    prefs = DeliveryPreferences(str(tmp_path / "preferences.json"), 'Europe/Moscow', '09:00')
+    for user_id in range(1000):
+        if user_id % 3 == 1:
+            prefs._prefs[user_id] = {'timezone': 'America/New_York'}
+        elif user_id % 3 == 2:
+            prefs._prefs[user_id] = {'timezone': 'Asia/Tokyo', 'time': '07:30'}
+    buckets = prefs.buckets(range(1000))
+    assert sorted(buckets) == [
+        ('America/New_York', '09:00'), ('Asia/Tokyo', '07:30'), ('Europe/Moscow', '09:00')
+    ]
+    assert sum(len(ids) for ids in buckets.values()) == 1000
+
+def test_bucket_jobs_and_local_today(tmp_path, monkeypatch):
+    from apscheduler.schedulers.background import BackgroundScheduler
+    import scheduler as sched
+
+    prefs = DeliveryPreferences(str(tmp_path / "preferences.json"), 'Europe/Moscow', '09:00')
+    monkeypatch.setattr(sched, 'get_delivery_preferences', lambda: prefs)
+    monkeypatch.setattr(sched, 'AUTHORIZED_USER_IDS', [1, 2, 3])
+    prefs.set(2, timezone='America/New_York')
+    prefs.set(3, timezone='America/New_York')
+
+    background = BackgroundScheduler()
+    background.start(paused=True)
+    try:
+        assert sched._schedule_background_buckets(background) == 2
+        ids = sorted(job.id for job in background.get_jobs())
+        assert ids == ['birthday_notifications:America/New_York:09:00', 'birthday_notifications:Europe/Moscow:09:00']
+
+        # Группа без пользователей снимается
+        prefs.set(1, timezone='America/New_York')
+        assert sched._schedule_background_buckets(background) == 1
+        assert [job.id for job in background.get_jobs()] == ['birthday_notifications:America/New_York:09:00']
+    finally:
+        background.shutdown(wait=False)
+
+    # "Сегодня" считается в часовом поясе получателей
+    sent = {}
+
+    async def fake_send(bot, user_ids=None, now=None):
+        sent['users'], sent['now'] = user_ids, now
+
+    monkeypatch.setattr(sched, 'send_birthday_notifications_async', fake_send)
+    sched.send_bucket_notifications('America/New_York', '09:00')
+    assert sent['users'] == [1, 2, 3]
+    assert sent['now'].tzinfo == ZoneInfo('America/New_York')
+    assert abs((sent['now'] - datetime.now(ZoneInfo('UTC'))).total_seconds()) < 60
+
+def test_leader_picks_up_settings_from_other_replica(tmp_path, monkeypatch):
+    from apscheduler.schedulers.background import BackgroundScheduler
+    import scheduler as sched
+
+    # Общий для процесса экземпляр, как у ведущей копии
+    path = str(tmp_path / "preferences.json")
+    monkeypatch.setattr(sched, 'PREFERENCES_FILE', path)
+    monkeypatch.setattr(sched, 'AUTHORIZED_USER_IDS', [1, 2])
+
+    background = BackgroundScheduler()
+    background.start(paused=True)
+    monkeypatch.setattr(sched, '_background_scheduler', background)
+    try:
+        assert sched._schedule_background_buckets(background) == 1
+        assert not sched.refresh_notifications()
+
+        # /settings на резервной копии меняет только файл
+        DeliveryPreferences(path, 'Europe/Moscow', '09:00').set(2, send_time='07:15')
+        assert sched.refresh_notifications()
+        assert sorted(job.id for job in background.get_jobs()) == [
+            'birthday_notifications:Europe/Moscow:07:15', 'birthday_notifications:Europe/Moscow:09:00'
+        ]
+        assert not sched.refresh_notifications()
+    finally:
+        background.shutdown(wait=False)
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_preferences_set_and_persist(Path(tmp))
+        test_buckets_group_equal_preferences(Path(tmp))
+    print("✅ Тесты настроек доставки пройдены")
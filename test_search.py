@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Тест поиска по имени."""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from search import NameSearchIndex
+from storage import normalize_name
+
+def _records(count: int) -> list:
+    rnd = random.Random(7)
+    surnames = ['Иванов', 'Петрова', 'Сидоров', 'Алёшина', 'Ёлкин', 'Смирнова', 'Кузнецов']
+    names = ['Анна', 'Иван', 'Пётр', 'Алёна', 'Мария', 'Семён', 'Ольга']
+    return [
+        {'name': f"{rnd.choice(surnames)} {rnd.choice(names)} {i}",
+         'birthday': f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}"}
+        for i in range(count)
+    ]
+
+def _linear(birthdays: list, query: str) -> list:
+    query_norm = normalize_name(query)
+    found = [b for b in birthdays if query_norm in normalize_name(b['name'])]
+    # Записи без даты - в конце
+    return sorted(found, key=lambda b: tuple(reversed(list(map(int, b['birthday'].split('.')))))
+                  if 'birthday' in b else (13, 0))
+
+def test_search_matches_linear_scan():
+    birthdays = _records(3000)
+    index = NameSearchIndex(birthdays)
+    for query in ['анна', 'АЛЕНА', 'алёна', 'ёлкин', 'ин', 'а', 'ов ив', 'нет такого', '12', '  ', 'петрова  анна 1']:
+        assert index.search(query) == _linear(birthdays, query), query
+
+def test_search_records_without_date():
+    index = NameSearchIndex([{'name': 'Без даты'}, {'name': 'Анна Датова', 'birthday': '01.01'}])
+    assert [b['name'] for b in index.search('дат')] == ['Анна Датова', 'Без даты']
+
+def test_fuzzy_search():
+    birthdays = _records(5000) + [
+        {'name': 'Петрова Анастасиа', 'birthday': '01.01'},
+        {'name': 'Анастасия', 'birthday': '02.01'},
+    ]
+    index = NameSearchIndex(birthdays)
+    found = index.fuzzy('Анастасия', limit=2)
+    assert [b['name'] for b, score in found] == ['Анастасия', 'Петрова Анастасиа']
+    assert found[0][1] == 1.0 and 0.5 <= found[1][1] < 1.0
+    assert index.fuzzy('Смирнва Ольга 1209', limit=1)[0][0]['name'] == 'Смирнова Ольга 1209'
+    assert index.fuzzy('Щщщщ') == []
+    assert index.exact('петрова  анастасиа') == [birthdays[-2]]
+    assert index.exact('Петрова') == []
+
+def test_search_checks_only_rarest_trigram():
+    birthdays = _records(100000)
+    index = NameSearchIndex(birthdays)
+    query = normalize_name("иван 5123")
+    # Проверяются только записи с самой редкой триграммой запроса, а не все
+    assert len(index._candidates(query)) < len(index) / 100
+    assert index.search(query) == _linear(birthdays, query)
+
+def test_index_add_and_remove():
+    birthdays = _records(3000)
+    index = NameSearchIndex(birthdays)
+    added = [{'name': 'Ёлкин Семён 1', 'birthday': '01.01'}, {'name': 'Без даты'}]
+    for bd in added:
+        index.add(bd)
+    for bd in birthdays[:100]:
+        assert index.remove(bd)
+    assert not index.remove({'name': 'Нет такого', 'birthday': '01.01'})
+
+    current = birthdays[100:] + added
+    assert len(index) == len(current)
+    for query in ['анна', 'елкин семен', 'ин', 'дат']:
+        assert index.search(query) == _linear(current, query), query
+    assert index.exact('ёлкин семён 1') == [added[0]]
+    index.apply_diff({'added': [], 'removed': [added[0]], 'changed': [(added[1], {'name': 'С датой', 'birthday': '02.02'})]})
+    assert index.search('дат') == [{'name': 'С датой', 'birthday': '02.02'}]
+    assert index.exact('ёлкин семён 1') == []
+
+def test_store_keeps_index_on_add_and_remove(tmp_path):
+    from birthday_store import BirthdayStore
+    store = BirthdayStore(str(tmp_path / 'store.json'))
+    assert store.replace_all(_records(500))
+    index = store.derived('search', NameSearchIndex)
+
+    assert store.add('Новикова Анна', '05.05')[0]
+    assert store.find('новикова') == [{'name': 'Новикова Анна', 'birthday': '05.05'}]
+    assert store.remove('Новикова Анна')[2] == 1
+    assert store.find('новикова') == []
+    # Индекс обновлён на месте, а не построен заново
+    assert store.derived('search', NameSearchIndex) is index
+    assert len(index) == 500
+
+    # Изменение файла в обход хранилища - данные перечитываются
+    store.storage.save_all([{'name': 'Извне', 'birthday': '01.01'}])
+    assert [b['name'] for b in store.find('извне')] == ['Извне']
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Тест двоичного снимка."""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from snapshot import (
+    BinarySnapshot, encode_snapshot, write_snapshot, open_snapshot,
+    json_to_snapshot, snapshot_to_json, birthday_to_day, day_to_birthday
+)
+
+SAMPLE = [
+    {'name': 'Иванов Иван', 'birthday': '03.01'},
+    {'name': 'Петрова Алёна', 'birthday': '29.02'},
+    {'name': 'Иванов Иван', 'birthday': '31.12'},
+    {'name': 'Ёлкин Семён 🎂', 'birthday': '01.03'},
+]
+
+def test_day_of_year():
+    assert birthday_to_day('01.01') == 1
+    assert birthday_to_day('29.02') == 60
+    assert birthday_to_day('31.12') == 366
+    assert all(birthday_to_day(day_to_birthday(day)) == day for day in range(1, 367))
+    for bad in ('30.02', '1.1', '', '32.01'):
+        try:
+            birthday_to_day(bad)
+        except ValueError:
+            continue
+        assert False, bad
+
+def test_roundtrip(tmp_path):
+    path = tmp_path / 'birthdays.bin'
+    write_snapshot(path, SAMPLE)
+    with open_snapshot(path) as snapshot:
+        assert len(snapshot) == 4
+        # Одинаковые имена хранятся один раз
+        assert snapshot.name_count == 3
+        assert list(snapshot.days) == [3, 60, 366, 61]
+        assert snapshot[3] == SAMPLE[3]
+        assert snapshot.to_list() == SAMPLE
+
+    write_snapshot(path, [])
+    with open_snapshot(path) as snapshot:
+        assert snapshot.to_list() == []
+
+def test_foreign_byte_order():
+    # Перекодируем снимок в обратный порядок байт
+    data = encode_snapshot(SAMPLE)
+    swapped = BinarySnapshot(_swap(data, BinarySnapshot(data)))
+    assert swapped.to_list() == SAMPLE
+
+def _swap(data: bytes, snapshot) -> bytes:
+    from array import array
+    from snapshot import HEADER, NATIVE_ORDER, _pad4
+    header = bytearray(data[:HEADER.size])
+    header[6:7] = b'B' if NATIVE_ORDER == b'L' else b'L'
+    offsets = array('I', snapshot._offsets)
+    name_ids = array('I', snapshot.name_ids)
+    days = array('H', snapshot.days)
+    for column in (offsets, name_ids, days):
+        column.byteswap()
+    strings = bytes(snapshot._strings)
+    return bytes(header) + offsets.tobytes() + strings + b'\0' * _pad4(len(strings)) + name_ids.tobytes() + days.tobytes()
+
+def test_json_conversion(tmp_path):
+    json_path = tmp_path / 'birthdays.json'
+    json_path.write_text(json.dumps(SAMPLE, ensure_ascii=False), encoding='utf-8')
+    assert json_to_snapshot(json_path, tmp_path / 'b.bin') == 4
+    assert snapshot_to_json(tmp_path / 'b.bin', tmp_path / 'back.json') == 4
+    assert json.loads((tmp_path / 'back.json').read_text(encoding='utf-8')) == SAMPLE
+
+def test_json_export_failure_keeps_old_file(tmp_path, monkeypatch):
+    json_path = tmp_path / 'birthdays.json'
+    json_path.write_text(json.dumps(SAMPLE, ensure_ascii=False), encoding='utf-8')
+    json_to_snapshot(json_path, tmp_path / 'b.bin')
+
+    def broken_dump(data, f, **kwargs):
+        f.write('[{"name": ')
+        raise OSError("диск заполнен")
+
+    monkeypatch.setattr(json, 'dump', broken_dump)
+    with pytest.raises(OSError):
+        snapshot_to_json(tmp_path / 'b.bin', json_path)
+    monkeypatch.undo()
+    # Старый файл цел, временный удалён
+    assert json.loads(json_path.read_text(encoding='utf-8')) == SAMPLE
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['b.bin', 'birthdays.json']
+
+def test_snapshot_storage(tmp_path):
+    from storage import open_storage, SnapshotStorage
+    storage = open_storage(f"snapshot://{tmp_path / 'b.bin'}")
+    assert isinstance(storage, SnapshotStorage)
+    assert storage.load_all() == []
+    assert storage.save_all(SAMPLE)
+    storage.add('Анна', '15.03')
+    assert storage.remove_by_name('иванов иван') == 2
+    assert storage.load_all() == [SAMPLE[1], SAMPLE[3], {'name': 'Анна', 'birthday': '15.03'}]
+
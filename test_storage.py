@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Тест хранилищ данных о днях рождения."""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from storage import JsonStorage, JournalStorage, SqliteStorage, open_storage, normalize_name
+from utils import add_birthday, remove_birthday, find_birthday, load_birthdays
+
+SAMPLE = [
+    {'name': 'Иванов Иван', 'birthday': '03.01'},
+    {'name': 'Петрова Алёна', 'birthday': '15.03'},
+    {'name': 'Сидоров Пётр', 'birthday': '01.02'},
+]
+
+def _check_backend(storage):
+    assert storage.save_all(SAMPLE)
+    assert storage.load_all() == SAMPLE
+    assert storage.contains('иванов  иван', '03.01')
+    assert not storage.contains('Иванов Иван', '04.01')
+
+    storage.add('Новая Ольга', '10.10')
+    assert len(storage.load_all()) == 4
+
+    found = sorted(b['name'] for b in storage.find('алена'))
+    assert found == ['Петрова Алёна']
+
+    assert storage.remove_by_name('НОВАЯ ОЛЬГА') == 1
+    assert storage.remove_by_name('Нет Такого') == 0
+    assert storage.load_all() == SAMPLE
+
+def test_json_storage(tmp_path):
+    _check_backend(JsonStorage(tmp_path / 'birthdays.json'))
+
+def test_sqlite_storage(tmp_path):
+    storage = SqliteStorage(tmp_path / 'birthdays.db')
+    _check_backend(storage)
+    assert storage.find_by_date(3, 15) == [SAMPLE[1]]
+    # Спецсимволы LIKE не работают как шаблоны
+    assert storage.find('%') == []
+    # Некорректные записи не сохраняются и не бросают исключение
+    for broken in ({'name': 'Дата Числом', 'birthday': 1503}, {'name': None, 'birthday': '01.01'}, 'не запись'):
+        assert not storage.save_all(SAMPLE + [broken])
+    assert storage.load_all() == SAMPLE
+    storage.close()
+
+def test_journal_storage(tmp_path):
+    _check_backend(JournalStorage(tmp_path / 'birthdays.json'))
+
+def test_journal_recovery(tmp_path):
+    path = tmp_path / 'birthdays.json'
+    storage = JournalStorage(path, compact_every=3)
+    assert storage.save_all(SAMPLE)
+    storage.add('Анна', '01.01')
+    storage.remove_by_name('Иванов Иван')
+    # Две записи в журнале, снимок не переписывался
+    assert len(storage.journal_path.read_text(encoding='utf-8').splitlines()) == 2
+    expected = SAMPLE[1:] + [{'name': 'Анна', 'birthday': '01.01'}]
+    assert JournalStorage(path).load_all() == expected
+
+    # Недописанная последняя строка (сбой при записи) пропускается
+    with open(storage.journal_path, 'ab') as f:
+        f.write(b'{"op": "add", "na')
+    assert JournalStorage(path).load_all() == expected
+    assert storage.journal_path.read_bytes().endswith(b'}\n')
+
+    # Сбой между записью снимка и очисткой журнала: изменения не применяются дважды
+    journal = storage.journal_path.read_bytes()
+    storage = JournalStorage(path, compact_every=3)
+    storage.apply_diff({'added': [{'name': 'Олег', 'birthday': '02.02'}], 'removed': [], 'changed': []})
+    assert storage.journal_path.read_bytes() == b''
+    storage.journal_path.write_bytes(journal)
+    assert JournalStorage(path).load_all() == expected + [{'name': 'Олег', 'birthday': '02.02'}]
+
+def test_json_storage_concurrent_adds(tmp_path):
+    import threading
+    storage = JsonStorage(tmp_path / 'birthdays.json')
+    threads = [threading.Thread(target=storage.add, args=(f'Человек {i}', '01.01')) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(storage.load_all()) == 20
+    assert [p.name for p in tmp_path.iterdir()] == ['birthdays.json']
+
+def test_open_storage(tmp_path):
+    assert isinstance(open_storage(str(tmp_path / 'a.json')), JsonStorage)
+    assert isinstance(open_storage(f"journal://{tmp_path / 'j.json'}"), JournalStorage)
+    assert isinstance(open_storage(f"sqlite:///{tmp_path / 'a.db'}"), SqliteStorage)
+    assert isinstance(open_storage(str(tmp_path / 'b.sqlite3')), SqliteStorage)
+
+def test_utils_over_storage(tmp_path):
+    url = f"sqlite:///{tmp_path / 'utils.db'}"
+    assert add_birthday('Анна', '15.03', url)[0]
+    assert not add_birthday('анна', '15.03', url)[0]
+    assert find_birthday('АНН', url) == [{'name': 'Анна', 'birthday': '15.03'}]
+    success, msg, count = remove_birthday('Анна', url)
+    assert success and count == 1
+    assert load_birthdays(url) == []
+
+    # Изменения идут через общий BirthdayStore: он видит их без перечитывания
+    from birthday_store import get_store
+    store = get_store(url)
+    misses = store.misses
+    assert add_birthday('Борис', '01.02', url)[0]
+    assert [bd['name'] for bd in store.birthdays()] == ['Борис']
+    assert store.find('бор') == find_birthday('бор', url)
+    assert remove_birthday('борис', url)[2] == 1
+    assert store.birthdays() == []
+    assert not remove_birthday('Борис', url)[0]
+    assert store.misses == misses
+
+def test_normalize_name():
+    assert normalize_name('  Фёдоров   Артём ') == 'федоров артем'
+
+def test_store_caches_until_file_changes(tmp_path):
+    from birthday_store import BirthdayStore
+    path = tmp_path / 'store.json'
+    JsonStorage(path).save_all(SAMPLE)
+    store = BirthdayStore(str(path))
+
+    assert store.birthdays() == SAMPLE
+    store.birthdays()
+    store.index()
+    assert (store.hits, store.misses) == (2, 1)
+
+    # Запись в обход хранилища: меняется размер файла
+    JsonStorage(path).save_all(SAMPLE[:1])
+    assert store.birthdays() == SAMPLE[:1]
+    assert store.misses == 2
+
+    # Запись через хранилище сбрасывает кэш
+    assert store.add('Анна', '15.03')[0]
+    assert len(store.index()) == 2
+    assert store.find('анна') == [{'name': 'Анна', 'birthday': '15.03'}]
+    assert store.stats()['records'] == 2
+
+def test_store_over_sqlite(tmp_path):
+    from birthday_store import BirthdayStore
+    store = BirthdayStore(f"sqlite:///{tmp_path / 'store.db'}")
+    assert store.replace_all(SAMPLE)
+    assert store.birthdays() == SAMPLE
+    store.birthdays()
+    assert store.hits == 1
+    success, msg, count = store.remove('Иванов Иван')
+    assert count == 1
+    assert len(store.birthdays()) == 2
+
+def test_store_merge_writes_only_diff(tmp_path):
+    from birthday_store import BirthdayStore
+    from datetime import datetime
+    for url in (str(tmp_path / 'merge.json'), f"sqlite:///{tmp_path / 'merge.db'}"):
+        store = BirthdayStore(url)
+        assert store.replace_all(SAMPLE + [{'name': 'Иванов Иван', 'birthday': '03.01'}])
+        misses = (store.birthdays(), store.misses)[1]
+
+        uploaded = [
+            {'name': 'Иванов Иван', 'birthday': '03.01'},
+            {'name': 'Петрова Алёна', 'birthday': '16.03'},
+            {'name': 'Новая Ольга', 'birthday': '10.10'},
+        ]
+        diff = store.merge(uploaded)
+        # Смена даты - это удаление старой записи и добавление новой
+        assert [bd['name'] for bd in diff['added']] == ['Петрова Алёна', 'Новая Ольга']
+        assert len(diff['removed']) == 3
+        assert diff['changed'] == []
+
+        # Кэш обновлён без перечитывания и совпадает с хранилищем
+        assert store.misses == misses
+        assert sorted(map(str, store.birthdays())) == sorted(map(str, uploaded))
+        assert sorted(map(str, store.storage.load_all())) == sorted(map(str, uploaded))
+        assert store.index().names_on(datetime(2025, 3, 16)) == ['Петрова Алёна']
+        assert store.index().names_on(datetime(2025, 3, 15)) == []
+
+        assert store.merge(uploaded) == {'added': [], 'removed': [], 'changed': [], 'duplicates': []}
+
+def test_sqlite_diff_uses_name_index(tmp_path):
+    storage = SqliteStorage(tmp_path / 'birthdays.db')
+    assert storage.save_all(SAMPLE + [{'name': 'ИВАНОВ ИВАН', 'birthday': '03.01'}])
+    statements = []
+    storage._conn.set_trace_callback(statements.append)
+    storage.apply_diff({
+        'changed': [({'name': 'ИВАНОВ ИВАН', 'birthday': '03.01'}, {'name': 'Иванов Иван-младший', 'birthday': '03.01'})],
+        'removed': [SAMPLE[2]],
+        'added': [],
+    })
+    storage._conn.set_trace_callback(None)
+    # Изменилась именно запись с таким написанием имени
+    assert storage.load_all() == SAMPLE[:2] + [{'name': 'Иванов Иван-младший', 'birthday': '03.01'}]
+
+    # Каждая строка разницы ищется по индексу, без полного просмотра таблицы
+    lookups = [sql for sql in statements if sql.startswith(('UPDATE', 'DELETE'))]
+    assert len(lookups) == 2
+    for sql in lookups:
+        plan = ' '.join(row[-1] for row in storage._conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        assert 'idx_birthdays_name_norm' in plan
+        assert 'SCAN birthdays' not in plan
+    storage.close()
+
+def test_diff_keeps_namesakes():
+    from utils import diff_birthdays
+    stored = [{'name': 'Анна Иванова', 'birthday': '15.03'}]
+    uploaded = [
+        {'name': 'анна иванова', 'birthday': '15.03'},
+        {'name': 'Анна Иванова', 'birthday': '20.07'},
+        {'name': 'Анна  Иванова', 'birthday': '20.07'},
+    ]
+    diff = diff_birthdays(stored, uploaded)
+    # Тёзка с другой датой - новый человек, повтор пары в файле отброшен
+    assert diff['added'] == [uploaded[2]]
+    assert diff['removed'] == []
+    assert diff['changed'] == [(stored[0], uploaded[0])]
+    assert diff['duplicates'] == [uploaded[1]]
+
+def test_store_derived_values(tmp_path):
+    from birthday_store import BirthdayStore
+    from utils import render_birthday_list_pages
+    store = BirthdayStore(str(tmp_path / 'store.json'))
+    assert store.replace_all(SAMPLE)
+    calls = []
+
+    def build(birthdays):
+        calls.append(len(birthdays))
+        return render_birthday_list_pages(birthdays)
+
+    pages = store.derived('list_pages', build)
+    assert store.derived('list_pages', build) is pages
+    assert calls == [3]
+    assert pages[0].index('Иванов Иван') < pages[0].index('Сидоров Пётр') < pages[0].index('Петрова Алёна')
+
+    store.merge(SAMPLE + [{'name': 'Анна', 'birthday': '16.03'}])
+    assert 'Анна' in store.derived('list_pages', build)[0]
+    assert calls == [3, 4]
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Тест утилит работы с днями рождения."""
+
+import sys
+import os
+import random
+from datetime import date, datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import BirthdayIndex, BirthdayTable, get_upcoming_birthdays, parse_birthday_date, parse_birthday_dates
+
+SAMPLE = [
+    {'name': 'Иванов Иван', 'birthday': '03.01'},
+    {'name': 'Петрова Анна', 'birthday': '15.03'},
+    {'name': 'Сидоров Пётр', 'birthday': '15.03'},
+    {'name': 'Високосная Мария', 'birthday': '29.02'},
+    {'name': 'Без даты'},
+]
+
+def test_index_on_date():
+    index = BirthdayIndex(SAMPLE)
+    assert len(index) == 4
+    assert index.names_on(datetime(2025, 3, 15)) == ['Петрова Анна', 'Сидоров Пётр']
+    assert index.names_on(datetime(2025, 3, 16)) == []
+
+def test_index_leap_day():
+    index = BirthdayIndex(SAMPLE)
+    # В високосный год - 29.02, в обычный - 28.02
+    assert index.names_on(datetime(2024, 2, 29)) == ['Високосная Мария']
+    assert index.names_on(datetime(2024, 2, 28)) == []
+    assert index.names_on(datetime(2025, 2, 28)) == ['Високосная Мария']
+
+def test_index_add_remove():
+    index = BirthdayIndex(SAMPLE)
+    record = {'name': 'Новая Ольга', 'birthday': '15.03'}
+    index.add(record)
+    assert len(index.on_date(datetime(2025, 3, 15))) == 3
+    assert index.remove(record)
+    assert not index.remove(record)
+    assert len(index) == 4
+
+def test_upcoming_matches_linear_scan():
+    today = datetime.now()
+    birthdays = [
+        {'name': f'Человек {i}', 'birthday': (today + timedelta(days=i % 20)).strftime("%d.%m")}
+        for i in range(200)
+    ]
+    upcoming = get_upcoming_birthdays(birthdays, days_ahead=7)
+    assert len(upcoming) == len([i for i in range(200) if i % 20 <= 7])
+    assert [u['day_offset'] for u in upcoming] == sorted(u['day_offset'] for u in upcoming)
+    assert upcoming == get_upcoming_birthdays(BirthdayIndex(birthdays), days_ahead=7)
+
+    # "Сегодня" пользователя может отличаться от даты сервера
+    shifted = get_upcoming_birthdays(birthdays, days_ahead=7, now=today + timedelta(days=1))
+    assert {u['date'] for u in shifted if u['day_offset'] == 0} == {(today + timedelta(days=1)).strftime("%d.%m")}
+
+def test_table_matches_index():
+    rnd = random.Random(3)
+    birthdays = SAMPLE + [{'name': 'Короткая Дата', 'birthday': '3.1'}, {'name': 'Ошибка', 'birthday': '31.02'}] + [
+        {'name': f'Человек {i}', 'birthday': f'{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}'}
+        for i in range(2000)
+    ]
+    table = BirthdayTable.from_records(birthdays)
+    index = BirthdayIndex(birthdays)
+    assert table.records() == birthdays
+    assert len(table) == len(birthdays) - 2
+    start = datetime(2023, 1, 1)
+    for offset in range(800):
+        day = start + timedelta(days=offset)
+        assert table.on_date(day) == index.on_date(day), day
+    assert table.names_on(datetime(2025, 1, 3))[:2] == ['Иванов Иван', 'Короткая Дата']
+    assert 'Високосная Мария' in table.names_on(datetime(2025, 2, 28))
+
+    # Порядок по (месяц, день) без разбора строк
+    dated = [(table.month[i], table.day[i]) for i in table.dated_positions()]
+    assert dated == sorted(dated) and len(dated) == len(table)
+    assert table.birthday(table.order[0]) == '01.01'
+
+def _same_table(table, expected):
+    assert table.records() == expected.records()
+    assert len(table) == len(expected)
+    assert [table.record(i) for i in table.dated_positions()] == [expected.record(i) for i in expected.dated_positions()]
+    for day in (datetime(2025, 1, 3), datetime(2025, 2, 28), datetime(2024, 3, 15)):
+        assert table.names_on(day) == expected.names_on(day)
+
+def test_table_apply_diff():
+    from storage import apply_diff_to_list
+    from utils import diff_birthdays
+    rnd = random.Random(5)
+    birthdays = SAMPLE[:4] + [{'name': 'Короткая Дата', 'birthday': '3.1'}] + [
+        {'name': f'Человек {i % 300}', 'birthday': f'{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}'}
+        for i in range(1000)
+    ]
+    table = BirthdayTable.from_records(birthdays)
+    holes = []
+    for step in range(20):
+        current = table.records()
+        uploaded = [dict(bd) for bd in current if rnd.random() > 0.02]
+        for bd in rnd.sample(uploaded, 3):
+            bd['name'] = bd['name'].upper()
+        uploaded += [{'name': f'Новый {step} {i}', 'birthday': f'{rnd.randint(1, 28):02d}.03'} for i in range(5)]
+        diff = diff_birthdays(current, uploaded)
+        updated = table.apply_diff(diff)
+        # Исходная таблица не изменилась
+        assert table.records() == current
+        _same_table(updated, BirthdayTable.from_records(apply_diff_to_list(current, diff)))
+        holes.append(len(updated._removed))
+        table = updated
+    # Изменения применяются на месте, пока удалённых мест не станет слишком много
+    assert holes[0] > 0
+    assert 0 in holes[1:]
+
+def test_table_from_snapshot():
+    from snapshot import BinarySnapshot, encode_snapshot
+    records = SAMPLE[:4]
+    table = BirthdayTable.from_snapshot(BinarySnapshot(encode_snapshot(records)))
+    assert table.records() == records
+    assert table.names_on(datetime(2024, 2, 29)) == ['Високосная Мария']
+
+def test_parse_leap_day():
+    assert parse_birthday_date("29.02") == "29.02"
+    assert parse_birthday_date("29/02") == "29.02"
+    assert parse_birthday_date("2024-02-29") == "29.02"
+
+def test_list_pages():
+    from utils import render_birthday_list_pages
+    birthdays = [{'name': f'Человек {i}', 'birthday': f'{i % 28 + 1:02d}.{i % 12 + 1:02d}'} for i in range(500)]
+    pages = render_birthday_list_pages(birthdays, page_lines=40)
+    assert len(pages) > 1
+    assert all(len(page) <= 4000 and page.count(' - Человек ') <= 40 for page in pages)
+    assert pages[-1].startswith(f"📋 **Все дни рождения** (500 записей), стр. {len(pages)}/{len(pages)}")
+    # Каждая страница начинается с заголовка месяца
+    assert all(page.split('\n')[2].startswith('**') for page in pages)
+    assert sum(page.count(' - Человек ') for page in pages) == 500
+    assert render_birthday_list_pages([]) == []
+
+# Общий корпус для сравнения пакетного и одиночного парсеров
+DATE_CORPUS = [
+    "03.01", "3.1", "29.02", "31.02", "00.01", "15/03", "15-03", "15.03.", "15 03", "15  3",
+    "2024-02-29", "2023-02-29", "2024-1-3", "2024-01-03 00:00:00", "2024-01-03 10:00:00",
+    "03.01.2024", "3/1/2024", "03-01-2024", "29.02.2023", "03.13", "31.12", "1.12", "12.1", "30.02.",
+    "45000", "45000.0", "45000.5", "0", "60", "1.2.3", "99999999999", "2958465", "2958466",
+    "", " ", "nan", "NaT", "None", "abc", "１５.０３",
+    45000, 45000.25, 15.03, 3.1, None, float('nan'), datetime(1990, 5, 6), date(1991, 7, 8),
+]
+
+def _date_corpus():
+    rnd = random.Random(42)
+    corpus = list(DATE_CORPUS)
+    for _ in range(3000):
+        corpus.append(f"{rnd.randint(0, 40)}{rnd.choice('./- ')}{rnd.randint(0, 14)}")
+        corpus.append(f"{rnd.randint(0, 40):02d}.{rnd.randint(0, 14):02d}.{rnd.randint(1800, 2100)}")
+        corpus.append(f"{rnd.randint(1800, 2100)}-{rnd.randint(0, 14)}-{rnd.randint(0, 33)}")
+        corpus.append(str(rnd.uniform(0, 80000)))
+        corpus.append(''.join(rnd.choice('0123456789./- ') for _ in range(rnd.randint(1, 8))))
+    return corpus
+
+def test_batch_parser_matches_scalar():
+    corpus = _date_corpus()
+    dates, errors = parse_birthday_dates(corpus)
+    assert len(dates) == len(errors) == len(corpus)
+    for value, parsed, failed in zip(corpus, dates, errors):
+        try:
+            expected = parse_birthday_date(value)
+        except Exception:
+            expected = None
+        assert (parsed, failed) == (expected, expected is None), value
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Тест webhook: проверка секретного заголовка и синтетические обновления для нагрузочного теста."""
+
+import sys
+import os
+import asyncio
+import socket
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import pytest
+from telegram import MessageEntity, Update
+from telegram.ext import Application, CommandHandler, filters
+
+from fake_bot_api import FakeBotAPI
+from loadtest_webhook import make_update, SECRET_HEADER
+
+TOKEN = '123456:TEST'
+SECRET = 'webhook-secret'
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def test_webhook_rejects_wrong_secret():
+    pytest.importorskip('tornado')
+    handled = []
+
+    async def start(update, context):
+        handled.append(update.update_id)
+
+    async def scenario(api, port):
+        application = Application.builder().token(TOKEN).base_url(api.base_url).build()
+        application.add_handler(CommandHandler('start', start))
+        url = f'http://127.0.0.1:{port}/telegram'
+        async with application:
+            # Те же параметры, что у main.run_webhook
+            await application.updater.start_webhook(
+                listen='127.0.0.1', port=port, url_path='telegram',
+                webhook_url='https://bot.example.com/telegram', secret_token=SECRET,
+                allowed_updates=Update.ALL_TYPES
+            )
+            await application.start()
+            try:
+                async with httpx.AsyncClient() as client:
+                    missing = await client.post(url, json=make_update(1, 42, '/start'))
+                    wrong = await client.post(url, json=make_update(2, 42, '/start'), headers={SECRET_HEADER: 'wrong'})
+                    right = await client.post(url, json=make_update(3, 42, '/start'), headers={SECRET_HEADER: SECRET})
+                for _ in range(100):
+                    if handled:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                await application.updater.stop()
+                await application.stop()
+        return missing.status_code, wrong.status_code, right.status_code
+
+    with FakeBotAPI() as api:
+        assert asyncio.run(scenario(api, _free_port())) == (403, 403, 200)
+        # Telegram получил тот же секрет, который проверяет сервер
+        [request] = [r for r in api.requests if r.method == 'setWebhook']
+        assert request.params['url'] == 'https://bot.example.com/telegram'
+        assert request.params['secret_token'] == SECRET
+    assert handled == [3]
+
+def test_synthetic_update_is_a_command():
+    update = Update.de_json(make_update(7, 42, '/find Анна'), None)
+    assert update.update_id == 7
+    assert update.effective_user.id == 42
+    assert filters.COMMAND.check_update(update)
+    assert list(update.message.parse_entities([MessageEntity.BOT_COMMAND]).values()) == ['/find']
+
+    text_update = Update.de_json(make_update(8, 42, 'привет'), None)
+    assert not filters.COMMAND.check_update(text_update)
@@ -2,50 +2,44 @@
 Утилиты для работы с данными.
 """
 
-import json
+import calendar
+import copy
 import logging
+import re
+from array import array
+from collections import defaultdict
 from datetime import datetime, timedelta
-from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from storage import normalize_name, apply_diff_to_list
 
 logger = logging.getLogger(__name__)
 
 # ===================== ФУНКЦИИ РАБОТЫ С ДАННЫМИ =====================
 
 def load_birthdays(data_file: str) -> list:
-    """Загружает данные о днях рождения из JSON-файла."""
-    try:
-        data_path = Path(data_file)
-        if not data_path.exists():
-            return []
-        
-        with open(data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Ошибка загрузки данных: {e}")
-        return []
+    """Загружает данные о днях рождения из хранилища (путь к JSON или STORAGE_URL)."""
+    from birthday_store import get_store
+    return list(get_store(data_file).birthdays())
 
 def save_birthdays(birthdays: list, data_file: str) -> bool:
-    """Сохраняет данные о днях рождения в JSON-файл."""
-    try:
-        data_path = Path(data_file)
-        data_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(data_path, 'w', encoding='utf-8') as f:
-            json.dump(birthdays, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        logger.error(f"Ошибка сохранения данных: {e}")
-        return False
+    """Сохраняет данные о днях рождения в хранилище (путь к JSON или STORAGE_URL)."""
+    from birthday_store import get_store
+    return get_store(data_file).replace_all(birthdays)
 
 # ===================== ФУНКЦИИ РАБОТЫ С ДАТАМИ =====================
 
-def get_today_date() -> str:
-    """Возвращает текущую дату в формате ДД.ММ."""
-    return datetime.now().strftime("%d.%m")
+def local_now(tz: str = None) -> datetime:
+    """Текущее время в часовом поясе tz (например, Europe/Moscow) или по времени сервера."""
+    return datetime.now(ZoneInfo(tz)) if tz else datetime.now()
+
+def get_today_date(tz: str = None) -> str:
+    """Возвращает текущую дату в формате ДД.ММ (в часовом поясе tz, если задан)."""
+    return local_now(tz).strftime("%d.%m")
 
-def get_tomorrow_date() -> str:
-    """Возвращает завтрашнюю дату в формате ДД.ММ."""
-    tomorrow = datetime.now() + timedelta(days=1)
+def get_tomorrow_date(tz: str = None) -> str:
+    """Возвращает завтрашнюю дату в формате ДД.ММ (в часовом поясе tz, если задан)."""
+    tomorrow = local_now(tz) + timedelta(days=1)
     return tomorrow.strftime("%d.%m")
 
 # ===================== ФУНКЦИИ ИЗВЛЕЧЕНИЯ ИМЕНИ =====================
@@ -74,13 +68,16 @@ def extract_first_name(full_name: str) -> str:
 
 # ===================== ФУНКЦИИ ФОРМАТИРОВАНИЯ =====================
 
-def format_birthday_message(names: list, is_today: bool = True) -> str:
+def format_birthday_message(names: list, is_today: bool = True, greetings: list = None,
+                            remember: bool = True) -> str:
     """
     Форматирует сообщение о днях рождения с уникальными поздравлениями.
     В заголовке показывает полное имя, в поздравлении - только имя.
+    greetings - заранее подготовленные поздравления для names (см. prerender.py).
+    remember=False - пробное сообщение, поздравление не попадает в историю именинника.
     """
     try:
-        from greetings_generator import generate_greeting, generate_collective_greeting
+        from greetings_generator import generate_many, generate_collective_greeting
         
         if not names:
             return ""
@@ -90,10 +87,11 @@ def format_birthday_message(names: list, is_today: bool = True) -> str:
         if len(names) == 1:
             # Для одного человека
             full_name = names[0]
-            # Извлекаем имя для поздравления
-            greeting_name = extract_first_name(full_name)
             # Генерируем поздравление (бот сам извлечет имя)
-            greeting = generate_greeting(full_name, min_sentences=3, max_sentences=4)
+            if greetings:
+                greeting = greetings[0]
+            else:
+                greeting = generate_many(names, min_sentences=3, max_sentences=4, remember=remember)[0]
             
             # В заголовке - полное имя, в поздравлении - только имя
             return f"{day_word} день рождения у {full_name}!\n\n{greeting}"
@@ -120,6 +118,56 @@ def format_birthday_message(names: list, is_today: bool = True) -> str:
             names_str = ", ".join(names)
             return f"{day_word} дни рождения у: {names_str}!"
                 
+MONTH_NAMES = {
+    1: "Январь", 2: "Февраль", 3: "Март", 4: "Апрель",
+    5: "Май", 6: "Июнь", 7: "Июль", 8: "Август",
+    9: "Сентябрь", 10: "Октябрь", 11: "Ноябрь", 12: "Декабрь"
+}
+
+# Размер страницы /list: не больше строк и символов (лимит Telegram - 4096)
+LIST_PAGE_LINES = 50
+LIST_PAGE_LENGTH = 3500
+
+def render_birthday_list_pages(birthdays, page_lines: int = LIST_PAGE_LINES,
+                               page_length: int = LIST_PAGE_LENGTH) -> list:
+    """
+    Готовит страницы для /list: записи по дате, с заголовками месяцев.
+    Если месяц продолжается на следующей странице, заголовок повторяется.
+    birthdays: список записей или BirthdayTable.
+    Возвращает список текстов страниц (пустой, если записей нет).
+    """
+    table = birthdays if isinstance(birthdays, BirthdayTable) else BirthdayTable.from_records(birthdays)
+
+    pages = []
+    lines = []
+    length = 0
+    current_month = None
+    for position in table.dated_positions():
+        month = table.month[position]
+        line = f"  {table.birthday(position)} - {table.names[position]}"
+        new_month = month != current_month
+        extra = len(MONTH_NAMES[month]) + 4 if new_month else 0
+        if lines and (len(lines) >= page_lines or length + len(line) + extra + 1 > page_length):
+            pages.append(lines)
+            lines = []
+            length = 0
+            new_month = True
+        if new_month:
+            header = f"\n**{MONTH_NAMES[month]}**:"
+            lines.append(header)
+            length += len(header) + 1
+            current_month = month
+        lines.append(line)
+        length += len(line) + 1
+    if lines:
+        pages.append(lines)
+
+    title = f"📋 **Все дни рождения** ({len(table)} записей)"
+    return [
+        f"{title}, стр. {number}/{len(pages)}:\n" + "\n".join(page)
+        for number, page in enumerate(pages, 1)
+    ]
+
 # ===================== ФУНКЦИИ ПАРСИНГА ДАТ =====================
 
 def parse_birthday_date(date_value) -> str:
@@ -170,10 +218,12 @@ def parse_birthday_date(date_value) -> str:
             except ValueError:
                 continue
         
-        # Затем пробуем форматы без года
+        # Затем пробуем форматы без года.
+        # Подставляем високосный год, иначе strptime (год по умолчанию 1900)
+        # отвергает 29.02
         for fmt in month_formats:
             try:
-                date_obj = datetime.strptime(date_str, fmt)
+                date_obj = datetime.strptime(f"{date_str} 2000", f"{fmt} %Y")
                 return date_obj.strftime("%d.%m")
             except ValueError:
                 continue
@@ -196,77 +246,532 @@ def parse_birthday_date(date_value) -> str:
         logger.error(f"Ошибка парсинга даты '{date_value}': {e}")
         raise
 
+# ===================== ПАКЕТНЫЙ ПАРСИНГ ДАТ =====================
+
+# Быстрые шаблоны для частых форматов. Результат совпадает с
+# parse_birthday_date; всё, что не распознано или даёт некорректную дату,
+# уходит в parse_birthday_date как есть.
+_YEAR_FIRST_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?: 00:00:00)?', re.ASCII)
+_YEAR_LAST_RE = re.compile(r'(\d{1,2})([./-])(\d{1,2})\2(\d{4})', re.ASCII)
+_NO_YEAR_RE = re.compile(r'(\d{1,2})(?:([./-])(\d{1,2})|\.(\d{1,2})\.|\s+(\d{1,2}))', re.ASCII)
+_SERIAL_RE = re.compile(r'\d+(?:\.\d+)?', re.ASCII)
+
+# Серийный номер Excel: дни от 1899-12-30
+_EXCEL_BASE_ORDINAL = datetime(1899, 12, 30).toordinal()
+_MAX_ORDINAL = datetime.max.toordinal()
+
+try:
+    import numpy as np
+except ImportError:  # без numpy серийные даты считаются в цикле
+    np = None
+
+def _valid_day(year: int, month: int, day: int) -> bool:
+    return year >= 1 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+
+def _parse_fast(date_str: str):
+    """Разбирает строку по быстрым шаблонам. None - шаблон не подошёл."""
+    match = _YEAR_FIRST_RE.fullmatch(date_str)
+    if match:
+        year, month, day = int(match[1]), int(match[2]), int(match[3])
+        return f"{day:02d}.{month:02d}" if _valid_day(year, month, day) else None
+
+    match = _YEAR_LAST_RE.fullmatch(date_str)
+    if match:
+        day, month, year = int(match[1]), int(match[3]), int(match[4])
+        return f"{day:02d}.{month:02d}" if _valid_day(year, month, day) else None
+
+    match = _NO_YEAR_RE.fullmatch(date_str)
+    if match:
+        day = int(match[1])
+        month = int(match[3] or match[4] or match[5])
+        return f"{day:02d}.{month:02d}" if _valid_day(2000, month, day) else None
+
+    return None
+
+def _serials_to_dates(serials: list) -> list:
+    """
+    Переводит серийные номера Excel (строки) в ДД.ММ арифметически.
+    None - номер нужно разобрать через parse_birthday_date
+    (дробная часть у самой границы суток или дата вне диапазона).
+    """
+    if np is not None:
+        values = np.array([float(s) for s in serials], dtype=np.float64)
+        days = np.floor(values)
+        ordinals = days + _EXCEL_BASE_ORDINAL
+        ok = ((values - days) < 1 - 1e-9) & (ordinals >= 1) & (ordinals <= _MAX_ORDINAL)
+        dates = np.datetime64('1899-12-30', 'D') + np.where(ok, days, 0).astype(np.int64).astype('timedelta64[D]')
+        months = dates.astype('datetime64[M]')
+        month_numbers = months.astype(np.int64) % 12 + 1
+        day_numbers = (dates - months).astype(np.int64) + 1
+        return [
+            f"{d:02d}.{m:02d}" if flag else None
+            for d, m, flag in zip(day_numbers.tolist(), month_numbers.tolist(), ok.tolist())
+        ]
+
+    result = []
+    for s in serials:
+        value = float(s)
+        days = int(value)
+        ordinal = days + _EXCEL_BASE_ORDINAL
+        if value - days < 1 - 1e-9 and 1 <= ordinal <= _MAX_ORDINAL:
+            date_obj = datetime.fromordinal(ordinal)
+            result.append(f"{date_obj.day:02d}.{date_obj.month:02d}")
+        else:
+            result.append(None)
+    return result
+
+def parse_birthday_dates(values) -> tuple[list, list]:
+    """
+    Пакетный вариант parse_birthday_date для целого столбца.
+    Каждое уникальное значение разбирается один раз: частые форматы -
+    регулярными выражениями, серийные номера Excel - арифметически сразу
+    для всех, остальное - через parse_birthday_date.
+    Возвращает (даты ДД.ММ или None, маска ошибок).
+    """
+    values = list(values)
+    parsed = {}      # строка -> ДД.ММ или None при ошибке
+    serials = []     # строки, похожие на серийные номера Excel
+    keys = []
+
+    for value in values:
+        if isinstance(value, datetime):
+            keys.append(value)
+            continue
+        date_str = str(value).strip()
+        keys.append(date_str)
+        if date_str in parsed:
+            continue
+        result = _parse_fast(date_str)
+        if result is None and _SERIAL_RE.fullmatch(date_str) and not _NO_YEAR_RE.fullmatch(date_str):
+            serials.append(date_str)
+        parsed[date_str] = result
+
+    if serials:
+        for date_str, result in zip(serials, _serials_to_dates(serials)):
+            parsed[date_str] = result
+
+    dates = []
+    errors = []
+    for key in keys:
+        if isinstance(key, datetime):
+            dates.append(key.strftime("%d.%m"))
+            errors.append(False)
+            continue
+        result = parsed[key]
+        if result is None:
+            # Редкий формат или ошибка - как в одиночном парсере
+            try:
+                result = parse_birthday_date(key)
+            except Exception:
+                result = False
+            parsed[key] = result
+        if result is False:
+            dates.append(None)
+            errors.append(True)
+        else:
+            dates.append(result)
+            errors.append(False)
+
+    return dates, errors
+
+# ===================== ИНДЕКС ДНЕЙ РОЖДЕНИЯ =====================
+
+class BirthdayIndex:
+    """
+    Индекс записей по дате рождения (месяц, день).
+    Строится один раз при изменении данных, после чего выборка на дату
+    стоит O(совпадений), а выборка окна из N дней - O(N + совпадений).
+    Именинники 29.02 в невисокосный год попадают в выборку на 28.02.
+    """
+
+    def __init__(self, birthdays: list):
+        self._by_day = defaultdict(list)
+        self._size = 0
+        for bd in birthdays:
+            self.add(bd)
+
+    @staticmethod
+    def _key(birthday: str):
+        """Преобразует строку ДД.ММ в ключ (месяц, день) или None."""
+        try:
+            day, month = map(int, birthday.split('.'))
+        except (AttributeError, ValueError):
+            return None
+        return month, day
+
+    def add(self, bd: dict) -> None:
+        """Добавляет запись в индекс."""
+        if 'birthday' not in bd or 'name' not in bd:
+            return
+        key = self._key(bd['birthday'])
+        if key is None:
+            return
+        self._by_day[key].append(bd)
+        self._size += 1
+
+    def remove(self, bd: dict) -> bool:
+        """Удаляет запись из индекса. Возвращает True, если запись была найдена."""
+        key = self._key(bd.get('birthday'))
+        bucket = self._by_day.get(key)
+        if not bucket:
+            return False
+        for i, item in enumerate(bucket):
+            if item is bd or item == bd:
+                del bucket[i]
+                self._size -= 1
+                if not bucket:
+                    del self._by_day[key]
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def on_date(self, date: datetime) -> list:
+        """Возвращает записи с днём рождения в указанную дату."""
+        result = list(self._by_day.get((date.month, date.day), ()))
+        # В невисокосный год 29.02 отмечаем 28.02
+        if date.month == 2 and date.day == 28 and not calendar.isleap(date.year):
+            result.extend(self._by_day.get((2, 29), ()))
+        return result
+
+    def names_on(self, date: datetime) -> list:
+        """Возвращает имена именинников в указанную дату."""
+        return [bd['name'] for bd in self.on_date(date)]
+
+# ===================== КОЛОНОЧНАЯ ТАБЛИЦА =====================
+
+# Начало месяца в днях по високосному году: день года = _MONTH_START[месяц] + день
+_MONTH_START = [0, 0]
+for _days in (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31):
+    _MONTH_START.append(_MONTH_START[-1] + _days)
+_DAY_MONTH = [(0, 0)] + [(month, day)
+                         for month in range(1, 13)
+                         for day in range(1, _MONTH_START[month + 1] - _MONTH_START[month] + 1)]
+_DAY_TO_STR = [None] + [f"{day:02d}.{month:02d}" for month, day in _DAY_MONTH[1:]]
+_STR_TO_DAY = {s: i for i, s in enumerate(_DAY_TO_STR) if s}
+_NO_DAY = 0
+_LEAP_DAY = _STR_TO_DAY['29.02']
+_DAYS_IN_YEAR = 366
+# Группа записей без даты в порядке по дате (после всех дней года)
+_UNDATED = _DAYS_IN_YEAR + 1
+
+# BirthdayTable.apply_diff: больше изменений (или больше удалённых мест)
+# выгоднее применить пересборкой таблицы, чем по одному
+TABLE_DIFF_MAX_CHANGES = 1000
+TABLE_MAX_REMOVED_SHARE = 0.25
+
+class BirthdayTable:
+    """
+    Записи в виде параллельных столбцов: имена (список строк),
+    месяц и день (array('B')), день года по високосному году (array('H'))
+    и порядок записей по дате (array('I')). Даты разбираются один раз
+    при построении, выборки по дате и сортировки строк не разбирают.
+    Записи без корректной даты хранятся как есть (день года 0)
+    и в выборки по дате не попадают.
+    Таблица не меняется: apply_diff возвращает новую, поэтому её можно
+    читать из нескольких потоков без блокировок.
+    """
+
+    def __init__(self, names: list, days_of_year, raw: dict = None):
+        self.names = names
+        self.day_of_year = array('H', days_of_year)
+        self.month = array('B', (_DAY_MONTH[d][0] for d in self.day_of_year))
+        self.day = array('B', (_DAY_MONTH[d][1] for d in self.day_of_year))
+        # Записи, которые нельзя восстановить из столбцов (без даты
+        # или с датой не в виде ДД.ММ), хранятся целиком: {позиция: запись}
+        self._raw = raw or {}
+        # Позиции записей, удалённых через apply_diff
+        self._removed = set()
+        self._size = sum(1 for d in self.day_of_year if d != _NO_DAY)
+
+        # Сортировка подсчётом по дню года; записи без даты - в конце
+        counts = [0] * (_UNDATED + 1)
+        for d in self.day_of_year:
+            counts[d or _UNDATED] += 1
+        starts = array('I', [0]) * (_UNDATED + 2)
+        for d in range(1, _UNDATED + 1):
+            starts[d + 1] = starts[d] + counts[d]
+        self.order = array('I', bytes(4 * len(names)))
+        fill = array('I', starts)
+        for position, d in enumerate(self.day_of_year):
+            d = d or _UNDATED
+            self.order[fill[d]] = position
+            fill[d] += 1
+        # Записи дня d - order[_starts[d]:_starts[d + 1]]
+        self._starts = starts
+
+    @staticmethod
+    def parse_record(bd: dict) -> tuple:
+        """
+        (день года, нужно ли хранить запись целиком) для записи.
+        День года 0 - даты нет или она некорректна.
+        """
+        birthday = bd.get('birthday')
+        day = _STR_TO_DAY.get(birthday) if isinstance(birthday, str) else None
+        if day is not None and len(bd) == 2 and 'name' in bd:
+            return day, False
+        # Даты вида 3.1 понимаем так же, как BirthdayIndex
+        key = BirthdayIndex._key(birthday)
+        day = _MONTH_START[key[0]] + key[1] if key and 'name' in bd and _valid_day(2000, *key) else _NO_DAY
+        return day, True
+
+    @classmethod
+    def from_records(cls, birthdays: list) -> 'BirthdayTable':
+        """Строит таблицу из записей {'name': ..., 'birthday': 'ДД.ММ'}."""
+        names = []
+        days = array('H')
+        raw = {}
+        for bd in birthdays:
+            day, keep_raw = cls.parse_record(bd)
+            if keep_raw:
+                raw[len(names)] = bd
+            names.append(bd.get('name'))
+            days.append(day)
+        return cls(names, days, raw)
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'BirthdayTable':
+        """
+        Строит таблицу из двоичного снимка (snapshot.py) без разбора строк дат.
+        Открытие снимка ничего не читает, но сама таблица строится за O(n):
+        каждое имя декодируется один раз, список имён и сортировка по дате
+        собираются заново.
+        """
+        table_names = snapshot.names()
+        return cls(list(map(table_names.__getitem__, snapshot.name_ids)), snapshot.days)
+
+    # ----- изменение -----
+
+    def apply_diff(self, diff: dict) -> 'BirthdayTable':
+        """
+        Новая таблица с применённой разницей из diff_birthdays; записи
+        сопоставляются так же, как в storage.apply_diff_to_list.
+        Столбцы копируются целиком (копирование массивов идёт в C), а меняются
+        только затронутые позиции: удалённые записи остаются пустыми местами,
+        новые дописываются в конец и вставляются в порядок по дате.
+        Большие изменения применяются пересборкой, она же убирает пустые места.
+        """
+        changes = len(diff['added']) + len(diff['removed']) + len(diff['changed'])
+        removed = len(self._removed) + len(diff['removed'])
+        if changes > TABLE_DIFF_MAX_CHANGES or removed > len(self.names) * TABLE_MAX_REMOVED_SHARE:
+            return BirthdayTable.from_records(apply_diff_to_list(self.records(), diff))
+
+        table = copy.copy(self)
+        table.names = list(self.names)
+        table.day_of_year = self.day_of_year[:]
+        table.month = self.month[:]
+        table.day = self.day[:]
+        table.order = self.order[:]
+        table._starts = self._starts[:]
+        table._raw = dict(self._raw)
+        table._removed = set(self._removed)
+
+        for old, new in diff['changed']:
+            # Изменяется первое вхождение: дата та же, меняется написание имени
+            position = table._find(old, last=False)
+            table.names[position] = new.get('name')
+            table._raw.pop(position, None)
+            if table.parse_record(new)[1]:
+                table._raw[position] = new
+        for bd in diff['removed']:
+            table._remove(table._find(bd, last=True))
+        for bd in diff['added']:
+            table._append(bd)
+        return table
+
+    def _find(self, bd: dict, last: bool) -> int:
+        """Позиция первой (или последней) записи, равной bd по имени и дате."""
+        day = self.parse_record(bd)[0] or _UNDATED
+        positions = self.order[self._starts[day]:self._starts[day + 1]]
+        for position in (reversed(positions) if last else positions):
+            if self.names[position] == bd.get('name') and self.birthday(position) == bd.get('birthday'):
+                return position
+        raise KeyError(f"Запись не найдена: {bd}")
+
+    def _shift_starts(self, day: int, delta: int) -> None:
+        for d in range(day + 1, len(self._starts)):
+            self._starts[d] += delta
+
+    def _remove(self, position: int) -> None:
+        day = self.day_of_year[position] or _UNDATED
+        del self.order[self.order.index(position, self._starts[day], self._starts[day + 1])]
+        self._shift_starts(day, -1)
+        if day != _UNDATED:
+            self._size -= 1
+        self.names[position] = None
+        self.day_of_year[position] = self.month[position] = self.day[position] = _NO_DAY
+        self._raw.pop(position, None)
+        self._removed.add(position)
+
+    def _append(self, bd: dict) -> None:
+        day, keep_raw = self.parse_record(bd)
+        position = len(self.names)
+        self.names.append(bd.get('name'))
+        self.day_of_year.append(day)
+        self.month.append(_DAY_MONTH[day][0])
+        self.day.append(_DAY_MONTH[day][1])
+        if keep_raw:
+            self._raw[position] = bd
+        if day:
+            self._size += 1
+        # Позиция больше всех прежних - встаёт в конец своего дня
+        day = day or _UNDATED
+        self.order.insert(self._starts[day + 1], position)
+        self._shift_starts(day, 1)
+
+    # ----- чтение -----
+
+    def __len__(self) -> int:
+        """Число записей с корректной датой."""
+        return self._size
+
+    def birthday(self, position: int) -> str:
+        """Дата записи в виде ДД.ММ."""
+        if position in self._raw:
+            return self._raw[position].get('birthday')
+        return _DAY_TO_STR[self.day_of_year[position]]
+
+    def record(self, position: int) -> dict:
+        """Запись в виде {'name': ..., 'birthday': 'ДД.ММ'}."""
+        if position in self._raw:
+            return self._raw[position]
+        return {'name': self.names[position], 'birthday': _DAY_TO_STR[self.day_of_year[position]]}
+
+    def records(self) -> list:
+        """Все записи в исходном порядке."""
+        if self._removed:
+            return [self.record(i) for i in range(len(self.names)) if i not in self._removed]
+        return [self.record(i) for i in range(len(self.names))]
+
+    def dated_positions(self):
+        """Позиции записей с корректной датой по (месяц, день)."""
+        return self.order[:self._starts[_UNDATED]]
+
+    def positions_on_day(self, day_of_year: int):
+        """Позиции записей с указанным днём года."""
+        return self.order[self._starts[day_of_year]:self._starts[day_of_year + 1]]
+
+    def positions_on(self, date: datetime) -> list:
+        """Позиции записей с днём рождения в указанную дату."""
+        day = _MONTH_START[date.month] + date.day
+        result = list(self.positions_on_day(day))
+        # В невисокосный год 29.02 отмечаем 28.02
+        if date.month == 2 and date.day == 28 and not calendar.isleap(date.year):
+            result.extend(self.positions_on_day(_LEAP_DAY))
+        return result
+
+    def on_date(self, date: datetime) -> list:
+        """Записи с днём рождения в указанную дату."""
+        return [self.record(i) for i in self.positions_on(date)]
+
+    def names_on(self, date: datetime) -> list:
+        """Имена именинников в указанную дату."""
+        return [self.names[i] for i in self.positions_on(date)]
+
 # ===================== ФУНКЦИИ ПОИСКА ДНИ РОЖДЕНИЯ =====================
 
-def get_upcoming_birthdays(birthdays: list, days_ahead: int = 7) -> list:
+def get_upcoming_birthdays(birthdays, days_ahead: int = 7, now: datetime = None) -> list:
     """
     Возвращает список дней рождения на ближайшие N дней.
+    birthdays: список записей, BirthdayTable или BirthdayIndex
     days_ahead: количество дней вперед для поиска (по умолчанию 7)
+    now: текущее время пользователя (по умолчанию время сервера)
     """
     if not birthdays:
         return []
     
-    today = datetime.now()
+    if isinstance(birthdays, (BirthdayTable, BirthdayIndex)):
+        index = birthdays
+    else:
+        index = BirthdayTable.from_records(birthdays)
+    today = now or datetime.now()
     upcoming = []
     
     for day_offset in range(days_ahead + 1):  # +1 чтобы включить сегодня
         target_date = today + timedelta(days=day_offset)
-        target_date_str = target_date.strftime("%d.%m")
+        
+        # Формируем понятное описание дня
+        if day_offset == 0:
+            day_desc = "сегодня"
+        elif day_offset == 1:
+            day_desc = "завтра"
+        elif day_offset == 2:
+            day_desc = "послезавтра"
+        else:
+            day_desc = target_date.strftime("%d.%m")
         
         # Находим дни рождения на эту дату
-        for bd in birthdays:
-            if bd['birthday'] == target_date_str:
-                # Формируем понятное описание дня
-                if day_offset == 0:
-                    day_desc = "сегодня"
-                elif day_offset == 1:
-                    day_desc = "завтра"
-                elif day_offset == 2:
-                    day_desc = "послезавтра"
-                else:
-                    day_desc = target_date.strftime("%d.%m")
-                
-                upcoming.append({
-                    'name': bd['name'],
-                    'date': bd['birthday'],
-                    'day_offset': day_offset,
-                    'day_description': day_desc
-                })
+        for bd in index.on_date(target_date):
+            upcoming.append({
+                'name': bd['name'],
+                'date': bd['birthday'],
+                'day_offset': day_offset,
+                'day_description': day_desc
+            })
     
     # Сортируем по дате
     upcoming.sort(key=lambda x: x['day_offset'])
     return upcoming
-# utils.py – добавить в конец
+# ===================== СРАВНЕНИЕ СПИСКОВ =====================
+
+def diff_birthdays(stored: list, uploaded: list) -> dict:
+    """
+    Сравнивает сохранённые записи с загруженными по паре (нормализованное имя, дата):
+    тёзки с разными датами - разные люди.
+    Возвращает {'added': [...], 'removed': [...], 'changed': [(старая, новая), ...],
+    'duplicates': [...]}. В changed попадает та же пара, записанная иначе
+    (регистр, пробелы, ё); смена даты - это удаление и добавление.
+    Если пара повторяется в загруженных данных, действует последняя запись,
+    а отброшенные повторы попадают в duplicates; лишние повторы пары
+    в сохранённых данных попадают в removed.
+    """
+    uploaded_by_key = {}
+    duplicates = []
+    for bd in uploaded:
+        key = (normalize_name(bd['name']), bd['birthday'])
+        previous = uploaded_by_key.get(key)
+        if previous is not None:
+            duplicates.append(previous)
+        uploaded_by_key[key] = bd
+
+    added = []
+    removed = []
+    changed = []
+    seen = set()
+
+    for bd in stored:
+        key = (normalize_name(bd['name']), bd['birthday'])
+        new_bd = uploaded_by_key.get(key)
+        if new_bd is None or key in seen:
+            removed.append(bd)
+            continue
+        seen.add(key)
+        if new_bd['name'] != bd['name']:
+            changed.append((bd, new_bd))
+
+    for key, bd in uploaded_by_key.items():
+        if key not in seen:
+            added.append(bd)
+
+    return {'added': added, 'removed': removed, 'changed': changed, 'duplicates': duplicates}
+
+# ===================== ФУНКЦИИ ИЗМЕНЕНИЯ СПИСКА =====================
+
+# Функции ниже работают через общий для процесса BirthdayStore:
+# его таблица и поисковый индекс сразу видят изменение
 
 def add_birthday(name: str, birthday: str, data_file: str) -> tuple[bool, str]:
     """Добавляет запись о дне рождения. Возвращает (успех, сообщение)."""
-    birthdays = load_birthdays(data_file)
-    # Проверка на дубликат (имя + дата)
-    for b in birthdays:
-        if b['name'].lower() == name.lower() and b['birthday'] == birthday:
-            return False, f"❌ {name} уже есть в списке с датой {birthday}."
-    birthdays.append({'name': name.strip(), 'birthday': birthday})
-    if save_birthdays(birthdays, data_file):
-        return True, f"✅ Добавлен {name} ({birthday})"
-    else:
-        return False, "❌ Ошибка сохранения"
+    from birthday_store import get_store
+    return get_store(data_file).add(name, birthday)
 
 def remove_birthday(name: str, data_file: str) -> tuple[bool, str, int]:
     """Удаляет запись(и) по имени. Возвращает (успех, сообщение, кол-во удалённых)."""
-    birthdays = load_birthdays(data_file)
-    original_len = len(birthdays)
-    # Удаляем все совпадения по имени (без учёта регистра)
-    new_birthdays = [b for b in birthdays if b['name'].lower() != name.lower()]
-    removed = original_len - len(new_birthdays)
-    if removed == 0:
-        return False, f"❌ Именинник '{name}' не найден.", 0
-    if save_birthdays(new_birthdays, data_file):
-        return True, f"✅ Удалено {removed} запись(и) для '{name}'.", removed
-    else:
-        return False, "❌ Ошибка сохранения", 0
+    from birthday_store import get_store
+    return get_store(data_file).remove(name)
 
 def find_birthday(name: str, data_file: str) -> list:
     """Поиск записей по части имени."""
-    birthdays = load_birthdays(data_file)
-    name_lower = name.lower()
-    return [b for b in birthdays if name_lower in b['name'].lower()]
+    from birthday_store import get_store
+    return get_store(data_file).find(name)